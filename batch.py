@@ -0,0 +1,208 @@
+# batch.py
+"""
+Evaluación por lotes de FK / IK sobre archivos grandes (CSV o .npy), en paralelo.
+
+  python batch.py fk  juntas.npy    -o poses.npy            # (M, n) rad  -> (M, 4, 4)
+  python batch.py ik  objetivos.csv -o q.npy                # (M, 3) mm   -> (M, n), IK analítica
+  python batch.py dls objetivos.npy -o q.npy --tol 0.01     # (M, 3) mm   -> (M, n), IK DLS iterativa
+
+Además del resultado se escribe <salida>.valid.npy con un flag por fila
+(FK dentro de límites / rama analítica que llega al objetivo / DLS convergida).
+La entrada se lee por memoria mapeada y cada proceso escribe su bloque
+directamente en la salida mapeada, así la memoria no crece con M.
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+from pathlib import Path
+import numpy as np
+
+from rvcore.io import load_robot_from_csv_dir, RobotCsvBundle, JointLimits
+from rvcore.robot_model import from_csv_bundle
+
+MODES = ("fk", "ik", "dls")
+
+# ==============================================================
+# MODELO EN MEMORIA COMPARTIDA
+# ==============================================================
+def _pack_model(model):
+    """Empaqueta dh/base/tool/límites en un bloque de memoria compartida."""
+    parts = [model.dh, model.base, model.tool, model.limits.q_min, model.limits.q_max,
+             model.limits.dq_max, model.limits.ddq_max]
+    layout = [(p.shape, int(p.size)) for p in parts]
+    flat = np.concatenate([np.ravel(p) for p in parts]).astype(float)
+    shm = shared_memory.SharedMemory(create=True, size=flat.nbytes)
+    np.ndarray(flat.shape, dtype=float, buffer=shm.buf)[:] = flat
+    return shm, layout
+
+def _unpack_model(shm_name, layout, name):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        flat = np.ndarray((sum(n for _, n in layout),), dtype=float, buffer=shm.buf)
+        arrays, off = [], 0
+        for shape, n in layout:
+            arrays.append(flat[off:off + n].reshape(shape).copy())
+            off += n
+    finally:
+        shm.close()
+    dh, base, tool, q_min, q_max, dq_max, ddq_max = arrays
+    limits = JointLimits(q_min=q_min, q_max=q_max, dq_max=dq_max, ddq_max=ddq_max)
+    return from_csv_bundle(RobotCsvBundle(name=name, dh=dh, base=base, tool=tool, limits=limits))
+
+# ==============================================================
+# TRABAJADORES
+# ==============================================================
+_W = {}
+
+def _init_worker(shm_name, layout, name, in_path, out_path, valid_path, mode, opts):
+    _W["model"] = _unpack_model(shm_name, layout, name)
+    _W["X"] = np.load(in_path, mmap_mode="r")
+    _W["out"] = np.load(out_path, mmap_mode="r+")
+    _W["valid"] = np.load(valid_path, mmap_mode="r+")
+    _W["mode"] = mode
+    _W["opts"] = opts
+
+def _run_chunk(span):
+    s, e = span
+    model, X, out, valid = _W["model"], _W["X"], _W["out"], _W["valid"]
+    rows = np.asarray(X[s:e], dtype=float)
+    mode = _W["mode"]
+
+    if mode == "fk":
+        from rvcore.kinematics import fk_dh_batch
+        out[s:e] = fk_dh_batch(model, rows)
+        lim = model.limits
+        valid[s:e] = np.all((rows >= lim.q_min) & (rows <= lim.q_max), axis=1)
+
+    elif mode == "ik":
+        from rvcore.ik_analytic import ik_rvm2_position_batch
+        from rvcore.kinematics import fk_dh_batch
+        tol = _W["opts"]["tol"]
+        sols, ok = ik_rvm2_position_batch(model, rows, tol=tol)
+        # Primera rama válida (codo arriba si ambas lo son)
+        idx = np.arange(rows.shape[0])
+        branch = np.where(ok[:, 0] | ~ok[:, 1], 0, 1)
+        q = sols[idx, branch]
+        out[s:e] = q
+        # Válida solo si la configuración escrita llega de verdad al objetivo
+        err = np.linalg.norm(fk_dh_batch(model, q)[:, :3, 3] - rows, axis=1)
+        valid[s:e] = ok[idx, branch] & (err <= tol)
+
+    else:  # dls
+        from rvcore.ik import ik_solve
+        opts = _W["opts"]
+        q = np.zeros(model.dof)
+        for r, p in enumerate(rows):
+            # Arranque en caliente desde la fila anterior del mismo bloque
+            res = ik_solve(model, p, q, tol=opts["tol"], max_iter=opts["max_iter"])
+            if not res.converged and np.any(q != 0.0):
+                res = ik_solve(model, p, np.zeros(model.dof), tol=opts["tol"], max_iter=opts["max_iter"])
+            out[s + r] = res.q
+            valid[s + r] = res.converged
+            q = res.q if res.converged else np.zeros(model.dof)
+
+    out.flush()
+    valid.flush()
+    return e - s
+
+# ==============================================================
+# ENTRADA / SALIDA
+# ==============================================================
+def _as_npy(path, out_dir, chunk=100_000):
+    """
+    Devuelve una ruta .npy para la entrada. Un CSV se convierte una sola vez, por
+    bloques de chunk filas escritos en un .npy mapeado (la memoria no crece con M).
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".npy":
+        return str(path), None
+    # CSV: cabecera opcional (se salta si la primera fila no es numérica)
+    with open(path, encoding="utf-8") as f:
+        lines = (line for line in f if line.strip())
+        first = next(lines, "")
+        skip = 0 if _is_numeric(first) else 1
+        sample = next(lines, "") if skip else first
+        rows = (1 if sample else 0) + sum(1 for _ in lines)
+    ncols = len(sample.split(",")) if sample else 0
+
+    tmp = Path(out_dir) / (path.stem + ".input.npy")
+    data = np.lib.format.open_memmap(tmp, mode="w+", dtype=float, shape=(rows, ncols))
+    with open(path, encoding="utf-8") as f:
+        lines = itertools.islice((line for line in f if line.strip()), skip, None)
+        for s in range(0, rows, chunk):
+            block = list(itertools.islice(lines, chunk))
+            data[s:s + len(block)] = np.loadtxt(block, delimiter=",", ndmin=2)
+    data.flush()
+    del data
+    return str(tmp), str(tmp)
+
+def _is_numeric(line):
+    try:
+        [float(c) for c in line.split(",")]
+        return True
+    except ValueError:
+        return False
+
+def run_batch(model, mode, in_path, out_path, workers=None, chunk=20_000, tol=1e-2, max_iter=50):
+    if mode not in MODES:
+        raise ValueError(f"Modo desconocido: {mode} (usar {MODES})")
+    out_path = Path(out_path)
+    in_npy, tmp = _as_npy(in_path, out_path.parent)
+    try:
+        X = np.load(in_npy, mmap_mode="r")
+        M = X.shape[0]
+        want = model.dof if mode == "fk" else 3
+        if X.ndim != 2 or X.shape[1] != want:
+            raise ValueError(f"La entrada para '{mode}' debe ser (M, {want}), obtuve {X.shape}")
+
+        out_shape = (M, 4, 4) if mode == "fk" else (M, model.dof)
+        valid_path = out_path.with_suffix(".valid.npy")
+        np.lib.format.open_memmap(out_path, mode="w+", dtype=float, shape=out_shape).flush()
+        np.lib.format.open_memmap(valid_path, mode="w+", dtype=bool, shape=(M,)).flush()
+
+        spans = [(s, min(s + chunk, M)) for s in range(0, M, chunk)]
+        shm, layout = _pack_model(model)
+        try:
+            opts = dict(tol=tol, max_iter=max_iter)
+            init = (shm.name, layout, model.name, in_npy, str(out_path), str(valid_path), mode, opts)
+            with Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=init) as pool:
+                done = 0
+                for n in pool.imap_unordered(_run_chunk, spans):
+                    done += n
+                    print(f"\r{done}/{M} filas", end="", file=sys.stderr)
+            print(file=sys.stderr)
+        finally:
+            shm.close()
+            shm.unlink()
+        return str(out_path), str(valid_path)
+    finally:
+        if tmp:
+            os.remove(tmp)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="FK / IK por lotes en paralelo para el RV-M2")
+    ap.add_argument("mode", choices=MODES)
+    ap.add_argument("input", help="archivo .npy o .csv")
+    ap.add_argument("-o", "--output", required=True, help="salida .npy")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="procesos (por defecto: núcleos)")
+    ap.add_argument("--chunk", type=int, default=20_000, help="filas por bloque")
+    ap.add_argument("--tol", type=float, default=1e-2, help="tolerancia de posición [mm] (DLS y comprobación por FK de ik)")
+    ap.add_argument("--max-iter", type=int, default=50, help="iteraciones máximas DLS")
+    ap.add_argument("--config", default=str(Path(__file__).parent / "config_csv"))
+    args = ap.parse_args(argv)
+
+    bundle = load_robot_from_csv_dir(args.config, name="Mitsubishi RV-M2 (CSV)")
+    model = from_csv_bundle(bundle)
+
+    t0 = time.perf_counter()
+    out, valid = run_batch(model, args.mode, args.input, args.output, workers=args.workers,
+                           chunk=args.chunk, tol=args.tol, max_iter=args.max_iter)
+    ok = np.load(valid, mmap_mode="r")
+    print(f"{args.mode}: {ok.size} filas en {time.perf_counter() - t0:.2f} s, "
+          f"{int(ok.sum())} válidas -> {out}, {valid}")
+
+if __name__ == "__main__":
+    main()
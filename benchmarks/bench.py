@@ -0,0 +1,230 @@
+# benchmarks/bench.py
+"""
+Benchmarks reproducibles de las rutas críticas (FK, Jacobiano, IK, PID, tick y dibujo).
+
+  python -m benchmarks.bench                          # mide e imprime
+  python -m benchmarks.bench --save base.json         # guarda línea base
+  python -m benchmarks.bench --compare base.json      # marca regresiones (código de salida 1)
+
+Latencia por llamada: percentiles p50/p99 sobre llamadas cronometradas una a una.
+Rendimiento por lotes: muestras/s para varios tamaños M.
+Cada caso se mide en --repeats ejecuciones completas y se queda con la mejor
+(p50 mínimo / muestras/s máximas); la dispersión entre ejecuciones (máx/mín)
+se guarda con la línea base y amplía el umbral de regresión de ese caso.
+El dibujo se mide sobre un lienzo Agg fuera de pantalla (no requiere display).
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+from rvcore.io import load_robot_from_csv_dir
+from rvcore.robot_model import from_csv_bundle
+
+ROOT = Path(__file__).resolve().parent.parent
+SEED = 1234
+BATCH_SIZES = (100, 1_000, 10_000, 100_000)
+
+# ==============================================================
+# MEDICIÓN
+# ==============================================================
+def latency(fn, n=2000, warmup=200):
+    """Cronometra n llamadas individuales; retorna estadísticas en microsegundos."""
+    for _ in range(warmup):
+        fn()
+    t = np.empty(n)
+    clock = time.perf_counter_ns
+    for k in range(n):
+        t0 = clock()
+        fn()
+        t[k] = clock() - t0
+    t /= 1e3
+    return dict(p50_us=float(np.percentile(t, 50)), p99_us=float(np.percentile(t, 99)),
+                mean_us=float(t.mean()), n=n)
+
+def throughput(fn, size, min_time=0.2):
+    """Muestras por segundo de fn() procesando `size` muestras por llamada (mejor de varias)."""
+    fn()
+    best, total, reps = np.inf, 0.0, 0
+    while total < min_time or reps < 3:
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best, total, reps = min(best, dt), total + dt, reps + 1
+    return dict(samples_per_s=float(size / best), best_ms=float(best * 1e3), size=size)
+
+# ==============================================================
+# CASOS
+# ==============================================================
+def _model():
+    bundle = load_robot_from_csv_dir(ROOT / "config_csv", name="Mitsubishi RV-M2 (CSV)")
+    return from_csv_bundle(bundle)
+
+def bench_latency(model, n):
+    from rvcore.kinematics import fk_dh
+    from rvcore.ik import numerical_jacobian_pos, geometric_jacobian, ik_step_dls, ik_solve
+    from rvcore.ik_analytic import ik_rvm2_position
+    from rvcore.controllers import PID3
+    from rvcore.simulator import Simulator
+
+    rng = np.random.default_rng(SEED)
+    q = rng.uniform(model.limits.q_min, model.limits.q_max) * 0.5
+    p = fk_dh(model, q)[0][:3, 3]
+    dx = np.array([1.0, -0.5, 0.3])
+    pid = PID3()
+    e = np.array([1.0, 2.0, -1.0])
+    sim = Simulator(model)
+    sim.set_lever("x", 0.5)
+    out_T, out_j = np.empty((4, 4)), np.empty((model.dof + 2, 3))
+
+    cases = {
+        "fk_dh": lambda: fk_dh(model, q),
+        "chain.fk_into": lambda: model.chain.fk_into(q, out_T, out_j),
+        "numerical_jacobian_pos": lambda: numerical_jacobian_pos(model, q),
+        "geometric_jacobian": lambda: geometric_jacobian(model, q),
+        "ik_step_dls": lambda: ik_step_dls(model, q, dx),
+        "ik_solve_warm": lambda: ik_solve(model, p + dx, q),
+        "ik_rvm2_position": lambda: ik_rvm2_position(model, p),
+        "PID3.step": lambda: pid.step(e, 1.0 / 30),
+        "Simulator.step": lambda: sim.step(),
+    }
+    return {name: latency(fn, n=n) for name, fn in cases.items()}
+
+def bench_render(model, n):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from ui.viz_matplotlib import RobotArtists, draw_robot_frame, setup_robot_axes
+    from rvcore.simulator import Simulator
+
+    # Misma escena y mismo cuerpo de frame que RobotGUI._draw_robot, sobre Agg
+    sim = Simulator(model)
+    fig = Figure(figsize=(6, 5))
+    canvas = FigureCanvasAgg(fig)
+    artists = RobotArtists(setup_robot_axes(fig), sim.joints)
+    dx = np.array([0.5, 0.5, 0.0])
+    drawn = [None]
+
+    def frame():
+        # Un paso del simulador + el frame de la GUI (draw_idle en Agg dibuja síncrono)
+        sim.step(dx)
+        state = sim.state
+        if draw_robot_frame(artists, canvas, state, drawn[0]):
+            drawn[0] = state.q
+
+    return {"gui_frame_agg": latency(frame, n=max(n // 20, 30), warmup=5)}
+
+def bench_batch(model, sizes):
+    from rvcore.kinematics import fk_dh_batch
+    from rvcore.ik import geometric_jacobian_batch, ik_step_dls_batch
+    from rvcore.ik_analytic import ik_rvm2_position_batch
+
+    rng = np.random.default_rng(SEED)
+    res = {}
+    for M in sizes:
+        Q = rng.uniform(model.limits.q_min, model.limits.q_max, size=(M, model.dof))
+        P = fk_dh_batch(model, Q)[:, :3, 3]
+        res[f"fk_dh_batch[{M}]"] = throughput(lambda: fk_dh_batch(model, Q), M)
+        res[f"geometric_jacobian_batch[{M}]"] = throughput(lambda: geometric_jacobian_batch(model, Q), M)
+        res[f"ik_rvm2_position_batch[{M}]"] = throughput(lambda: ik_rvm2_position_batch(model, P), M)
+        DX = rng.normal(0.0, 2.0, size=(M, 3))
+        res[f"ik_step_dls_batch[{M}]"] = throughput(lambda: ik_step_dls_batch(model, Q, DX), M)
+    return res
+
+# ==============================================================
+# LÍNEA BASE / REGRESIONES
+# ==============================================================
+def aggregate(runs):
+    """
+    Combina varias ejecuciones de run(): por caso, el registro de la mejor
+    (p50 mínimo o muestras/s máximas) más spread = máx/mín entre ejecuciones.
+    """
+    out = {}
+    for name in runs[0]:
+        rs = [r[name] for r in runs]
+        if "p50_us" in rs[0]:
+            vals = [r["p50_us"] for r in rs]
+            best = rs[int(np.argmin(vals))]
+        else:
+            vals = [r["samples_per_s"] for r in rs]
+            best = rs[int(np.argmax(vals))]
+        out[name] = dict(best, spread=float(max(vals) / min(vals)), repeats=len(rs))
+    return out
+
+def compare(current, baseline, threshold):
+    """
+    Lista de (caso, métrica, base, actual, razón, límite) que empeoran más que su
+    límite: threshold multiplicado por la dispersión medida al guardar la línea base.
+    """
+    regressions = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = threshold * max(base.get("spread", 1.0), 1.0)
+        if "p50_us" in cur:
+            ratio = cur["p50_us"] / base["p50_us"]
+            if ratio > limit:
+                regressions.append((name, "p50_us", base["p50_us"], cur["p50_us"], ratio, limit))
+        elif "samples_per_s" in cur:
+            ratio = base["samples_per_s"] / cur["samples_per_s"]
+            if ratio > limit:
+                regressions.append((name, "samples_per_s", base["samples_per_s"], cur["samples_per_s"], ratio, limit))
+    return regressions
+
+def run(n=2000, sizes=BATCH_SIZES, render=True, repeats=5):
+    """Ejecuta todos los casos repeats veces (intercaladas) y agrega con aggregate()."""
+    model = _model()
+    runs = []
+    for _ in range(max(1, repeats)):
+        results = {}
+        results.update(bench_latency(model, n))
+        if render:
+            results.update(bench_render(model, n))
+        results.update(bench_batch(model, sizes))
+        runs.append(results)
+    return aggregate(runs)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks de rvcore y del lazo de la GUI")
+    ap.add_argument("-n", type=int, default=2000, help="llamadas cronometradas por caso")
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(BATCH_SIZES), help="tamaños de lote")
+    ap.add_argument("--no-render", action="store_true", help="omitir el dibujo en Agg")
+    ap.add_argument("--save", help="guardar resultados como línea base JSON")
+    ap.add_argument("--compare", help="línea base JSON contra la que comparar")
+    ap.add_argument("--repeats", type=int, default=5, help="ejecuciones completas por caso (se toma la mejor)")
+    ap.add_argument("--threshold", type=float, default=1.25,
+                    help="razón que cuenta como regresión (se multiplica por la dispersión de la línea base)")
+    args = ap.parse_args(argv)
+
+    results = run(n=args.n, sizes=args.sizes, render=not args.no_render, repeats=args.repeats)
+
+    for name, r in results.items():
+        if "p50_us" in r:
+            print(f"{name:36s} p50 {r['p50_us']:10.1f} us   p99 {r['p99_us']:10.1f} us   (disp. x{r['spread']:.2f})")
+        else:
+            print(f"{name:36s} {r['samples_per_s']:14.0f} muestras/s   (disp. x{r['spread']:.2f})")
+
+    if args.save:
+        doc = dict(python=sys.version.split()[0], numpy=np.__version__,
+                   machine=platform.machine(), processor=platform.processor(),
+                   results=results)
+        Path(args.save).write_text(json.dumps(doc, indent=2), encoding="utf-8")
+        print(f"Línea base guardada en {args.save}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, base, cur, ratio, limit in regressions:
+            print(f"REGRESIÓN {name}: {metric} {base:.1f} -> {cur:.1f} (x{ratio:.2f}, límite x{limit:.2f})")
+        if regressions:
+            return 1
+        print("Sin regresiones")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
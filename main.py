@@ -1,15 +1,18 @@
 # main.py
 from pathlib import Path
 import numpy as np
-import matplotlib.pyplot as plt
 
 from rvcore.io import load_robot_from_csv_dir
 from rvcore.robot_model import from_csv_bundle
 from rvcore.kinematics import fk_dh
-from ui.viz_matplotlib import plot_robot
+# Los módulos de UI (Tkinter / Matplotlib) se importan solo en la rama que los usa
 
 # Bandera para activar/desactivar la GUI Tkinter
 USE_TKINTER_GUI = True  # <— pon False para usar las figuras secuenciales como antes
+# Rechazar jogs fuera del espacio alcanzable (la 1ª vez construye el índice, unos segundos)
+USE_WORKSPACE_LIMIT = False
+# Puerto TCP local para jog remoto (rvcore.command_server); None lo desactiva
+COMMAND_PORT = None
 
 def main():
     root = Path(__file__).parent
@@ -20,11 +23,17 @@ def main():
         # === MODO GUI TKINTER ===
         # GUI con joystick. El modo de solo visualizacion queda comentado más abajo.
         from ui.gui_tk import RobotGUI
-        app = RobotGUI(model, update_hz=30)
+        workspace = None
+        if USE_WORKSPACE_LIMIT:
+            from rvcore.workspace import load_or_build_workspace
+            workspace = load_or_build_workspace(model, str(root / "workspace.cache.npz"))
+        app = RobotGUI(model, update_hz=30, workspace=workspace, command_port=COMMAND_PORT)
         app.mainloop()
 
     else:
         # === MODO ANTERIOR (comenta/descomenta a gusto) ===
+        from ui.viz_matplotlib import plot_robot
+
         #Pruebas de visualización estática de varias coordenadas del robot.
         # Caso A: Home
         qA = np.deg2rad([0, 0, 0, 0, 0])
@@ -0,0 +1,227 @@
+# rvcore/collision.py
+from dataclasses import dataclass, field
+import numpy as np
+from rvcore.kinematics import fk_dh_batch
+
+DEFAULT_RADIUS = 30.0   # mm, radio de cápsula por defecto de cada eslabón
+
+# ==============================================================
+# OBSTÁCULOS ESTÁTICOS
+# ==============================================================
+@dataclass
+class Sphere:
+    center: np.ndarray      # mm
+    radius: float           # mm
+
+    def __post_init__(self):
+        self.center = np.asarray(self.center, dtype=float)
+
+    def aabb(self):
+        return self.center - self.radius, self.center + self.radius
+
+    def distance(self, P0, P1):
+        """Distancia de los segmentos P0→P1 (…, 3) a la superficie (negativa si penetra)."""
+        return point_segment_distance(self.center, P0, P1) - self.radius
+
+@dataclass
+class Box:
+    lo: np.ndarray          # esquina mínima (caja alineada con los ejes), mm
+    hi: np.ndarray          # esquina máxima, mm
+
+    def __post_init__(self):
+        self.lo = np.asarray(self.lo, dtype=float)
+        self.hi = np.asarray(self.hi, dtype=float)
+
+    def aabb(self):
+        return self.lo, self.hi
+
+    def distance(self, P0, P1, iters=40):
+        """
+        Distancia segmento–caja. La distancia a un convexo a lo largo de un segmento
+        es convexa en t, así que basta una búsqueda de sección áurea vectorizada.
+        """
+        d = P1 - P0
+        f = lambda t: _point_box_distance(P0 + t[..., None] * d, self.lo, self.hi)
+        g = 0.5 * (np.sqrt(5.0) - 1.0)
+        a = np.zeros(P0.shape[:-1])
+        b = np.ones(P0.shape[:-1])
+        c, e = b - g * (b - a), a + g * (b - a)
+        fc, fe = f(c), f(e)
+        for _ in range(iters):
+            left = fc < fe
+            b = np.where(left, e, b)
+            a = np.where(left, a, c)
+            c, e = b - g * (b - a), a + g * (b - a)
+            fc, fe = f(c), f(e)
+        return np.minimum.reduce([fc, fe, f(np.zeros_like(a)), f(np.ones_like(a))])
+
+@dataclass
+class Plane:
+    point: np.ndarray       # punto del plano, mm
+    normal: np.ndarray      # normal hacia el lado libre (el otro lado es sólido)
+
+    def __post_init__(self):
+        self.point = np.asarray(self.point, dtype=float)
+        n = np.asarray(self.normal, dtype=float)
+        self.normal = n / np.linalg.norm(n)
+
+    def aabb(self):
+        return None         # infinito: siempre pasa la fase amplia
+
+    def distance(self, P0, P1):
+        s0 = (P0 - self.point) @ self.normal
+        s1 = (P1 - self.point) @ self.normal
+        return np.minimum(s0, s1)
+
+# ==============================================================
+# DISTANCIAS VECTORIZADAS
+# ==============================================================
+def _dot(a, b):
+    return np.einsum("...i,...i->...", a, b)
+
+def _point_box_distance(P, lo, hi):
+    return np.linalg.norm(np.maximum(np.maximum(lo - P, P - hi), 0.0), axis=-1)
+
+def point_segment_distance(C, P0, P1):
+    """Distancia del punto C a los segmentos P0→P1 (…, 3)."""
+    d = P1 - P0
+    dd = _dot(d, d)
+    t = np.where(dd > 1e-12, _dot(C - P0, d) / np.where(dd > 1e-12, dd, 1.0), 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.linalg.norm(P0 + t[..., None] * d - C, axis=-1)
+
+def segment_segment_distance(P1, Q1, P2, Q2, eps=1e-12):
+    """
+    Distancia mínima entre los segmentos P1→Q1 y P2→Q2 (…, 3), vectorizada.
+    Puntos más cercanos según Ericson (Real-Time Collision Detection, 5.1.9),
+    incluidos los casos degenerados (segmentos de longitud cero).
+    """
+    d1, d2, r = Q1 - P1, Q2 - P2, P1 - P2
+    a, e, f = _dot(d1, d1), _dot(d2, d2), _dot(d2, r)
+    c, b = _dot(d1, r), _dot(d1, d2)
+    a_ok, e_ok = a > eps, e > eps
+    a_s, e_s = np.where(a_ok, a, 1.0), np.where(e_ok, e, 1.0)
+
+    denom = a * e - b * b
+    s = np.where(denom > eps, np.clip((b * f - c * e) / np.where(denom > eps, denom, 1.0), 0.0, 1.0), 0.0)
+    t = (b * s + f) / e_s
+    s = np.where(t < 0.0, np.clip(-c / a_s, 0.0, 1.0), np.where(t > 1.0, np.clip((b - c) / a_s, 0.0, 1.0), s))
+    t = np.clip(t, 0.0, 1.0)
+
+    # Degenerados: primer segmento es un punto / segundo segmento es un punto
+    s = np.where(a_ok, np.where(e_ok, s, np.clip(-c / a_s, 0.0, 1.0)), 0.0)
+    t = np.where(e_ok, np.where(a_ok, t, np.clip(f / e_s, 0.0, 1.0)), 0.0)
+
+    C1 = P1 + s[..., None] * d1
+    C2 = P2 + t[..., None] * d2
+    return np.linalg.norm(C1 - C2, axis=-1)
+
+# ==============================================================
+# COMPROBADOR POR LOTES
+# ==============================================================
+@dataclass
+class CollisionResult:
+    collides: np.ndarray        # (M,) bool, autocolisión o entorno
+    self_hit: np.ndarray        # (M,) bool
+    env_hit: np.ndarray         # (M,) bool
+    clearance: np.ndarray       # (M,) holgura mínima [mm] entre los pares evaluados
+
+@dataclass
+class CollisionChecker:
+    """
+    Cada eslabón entre filas consecutivas de `joints` (fk_dh) es una cápsula.
+    - radii: escalar o (n+1,) radios por segmento [mm]
+    - obstacles: Sphere / Box / Plane estáticos
+    - check_base: incluir el segmento fijo de la base contra el entorno
+    Los segmentos de longitud nula (a = d = 0 en DH, tool sin traslación) se
+    fusionan con sus vecinos para decidir qué pares son adyacentes.
+    """
+    model: object
+    radii: object = DEFAULT_RADIUS
+    obstacles: list = field(default_factory=list)
+    check_base: bool = False
+    chunk: int = 50_000
+
+    def __post_init__(self):
+        nseg = self.model.dof + 1
+        self.radii = np.broadcast_to(np.asarray(self.radii, dtype=float), (nseg,)).copy()
+
+        # Longitud constante de cada segmento (fila DH i, último = traslación del tool)
+        lengths = np.r_[np.hypot(self.model.dh[:, 0], self.model.dh[:, 2]),
+                        np.linalg.norm(self.model.tool[:3, 3])]
+        self.active = np.flatnonzero(lengths > 1e-9)
+
+        # Pares no adyacentes entre segmentos activos (en la cadena ya fusionada)
+        pos = {s: k for k, s in enumerate(self.active)}
+        self.pairs = np.array([(i, j) for i in self.active for j in self.active
+                               if pos[j] - pos[i] > 1], dtype=int).reshape(-1, 2)
+        env = self.active if self.check_base else self.active[self.active > 0]
+        self.env_segments = env
+
+    def check(self, Q):
+        """Evalúa (M, n) configuraciones por bloques. Retorna CollisionResult."""
+        Q = np.atleast_2d(np.asarray(Q, dtype=float))
+        M = Q.shape[0]
+        self_hit = np.zeros(M, dtype=bool)
+        env_hit = np.zeros(M, dtype=bool)
+        clearance = np.full(M, np.inf)
+        for s in range(0, M, self.chunk):
+            e = min(s + self.chunk, M)
+            _, joints = fk_dh_batch(self.model, Q[s:e], return_joints=True)
+            sh, ch1 = self._self_collision(joints)
+            eh, ch2 = self._env_collision(joints)
+            self_hit[s:e], env_hit[s:e] = sh, eh
+            clearance[s:e] = np.minimum(ch1, ch2)
+        return CollisionResult(collides=self_hit | env_hit, self_hit=self_hit,
+                               env_hit=env_hit, clearance=clearance)
+
+    def _self_collision(self, joints):
+        M = joints.shape[0]
+        hit = np.zeros(M, dtype=bool)
+        clear = np.full(M, np.inf)
+        if self.pairs.size == 0:
+            return hit, clear
+        i, j = self.pairs[:, 0], self.pairs[:, 1]
+        A0, A1 = joints[:, i], joints[:, i + 1]          # (M, P, 3)
+        B0, B1 = joints[:, j], joints[:, j + 1]
+        rsum = self.radii[i] + self.radii[j]
+
+        # Fase amplia: cajas envolventes de las cápsulas
+        ra, rb = self.radii[i][:, None], self.radii[j][:, None]
+        lo_a, hi_a = np.minimum(A0, A1) - ra, np.maximum(A0, A1) + ra
+        lo_b, hi_b = np.minimum(B0, B1) - rb, np.maximum(B0, B1) + rb
+        cand = np.all((lo_a <= hi_b) & (lo_b <= hi_a), axis=-1)   # (M, P)
+
+        m, p = np.nonzero(cand)
+        if m.size:
+            gap = segment_segment_distance(A0[m, p], A1[m, p], B0[m, p], B1[m, p]) - rsum[p]
+            np.logical_or.at(hit, m, gap < 0.0)
+            np.minimum.at(clear, m, gap)
+        return hit, clear
+
+    def _env_collision(self, joints):
+        M = joints.shape[0]
+        hit = np.zeros(M, dtype=bool)
+        clear = np.full(M, np.inf)
+        seg = self.env_segments
+        if not self.obstacles or seg.size == 0:
+            return hit, clear
+        S0, S1 = joints[:, seg], joints[:, seg + 1]      # (M, S, 3)
+        r = self.radii[seg]
+        lo = np.minimum(S0, S1) - r[:, None]
+        hi = np.maximum(S0, S1) + r[:, None]
+
+        for obs in self.obstacles:
+            box = obs.aabb()
+            if box is None:
+                cand = np.ones(S0.shape[:2], dtype=bool)
+            else:
+                # Fase amplia: caja de la cápsula contra caja del obstáculo
+                cand = np.all((lo <= box[1]) & (box[0] <= hi), axis=-1)
+            m, s = np.nonzero(cand)
+            if m.size == 0:
+                continue
+            gap = obs.distance(S0[m, s], S1[m, s]) - r[s]
+            np.logical_or.at(hit, m, gap < 0.0)
+            np.minimum.at(clear, m, gap)
+        return hit, clear
@@ -0,0 +1,451 @@
+# rvcore/command_server.py
+"""
+Servidor local de comandos (asyncio, TCP y/o socket Unix) para mover el robot desde
+otros programas (PLC de línea, bancos de prueba) y recibir su estado a la tasa de control.
+
+  python -m rvcore.command_server --port 5007 --unix /tmp/rvm2.sock    # simulador sin GUI
+
+Trama binaria little-endian: cabecera HEADER = (u16 longitud del cuerpo, u8 tipo) + cuerpo.
+  Cliente → servidor                       cuerpo
+    MSG_JOG        velocidad por eje       u32 seq, 3×f64 vx vy vz [mm/tick]
+    MSG_IMPULSE    impulso de un tick      u32 seq, 3×f64 dx dy dz [mm]
+    MSG_TARGET     ir a un punto           u32 seq, 3×f64 x y z [mm], f64 velocidad [mm/tick]
+    MSG_STOP       soltar palancas         u32 seq
+    MSG_HOME       volver a q = 0          u32 seq
+    MSG_SUBSCRIBE  recibir estado          u16 cada N ticks (0 = baja)
+    MSG_PING       eco inmediato           u32 seq, f64 marca del cliente
+  Servidor → cliente
+    MSG_STATE      estado tras un tick     u32 ticks, u32 último seq aplicado de ese cliente,
+                                           f64 t [s], f64 residuo [mm], u8 n,
+                                           3×f64 posición EE [mm], 9×f64 rotación (por filas), n×f64 q [rad]
+    MSG_PONG       respuesta a MSG_PING    mismo cuerpo que el ping
+    MSG_ERROR      trama no válida         texto UTF-8
+
+Los comandos que llegan entre dos ticks se combinan (el último jog/objetivo manda,
+los impulsos se suman) y se aplican una vez por tick con set_lever / add_impulse,
+el mismo camino que usan las palancas y botones de la GUI.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import struct
+import threading
+from pathlib import Path
+import numpy as np
+
+from rvcore import profiling
+
+HEADER = struct.Struct("<HB")
+
+MSG_JOG, MSG_IMPULSE, MSG_TARGET, MSG_STOP, MSG_HOME, MSG_SUBSCRIBE, MSG_PING = range(1, 8)
+MSG_STATE, MSG_PONG, MSG_ERROR = 0x81, 0x82, 0x83
+
+VEC = struct.Struct("<I3d")
+TARGET = struct.Struct("<I4d")
+SEQ = struct.Struct("<I")
+SUBSCRIBE = struct.Struct("<H")
+PING = struct.Struct("<Id")
+STATE_HEAD = struct.Struct("<IIddB")
+
+PAYLOADS = {MSG_JOG: VEC, MSG_IMPULSE: VEC, MSG_TARGET: TARGET, MSG_STOP: SEQ,
+            MSG_HOME: SEQ, MSG_SUBSCRIBE: SUBSCRIBE, MSG_PING: PING}
+
+MAX_BUFFER = 64 * 1024   # bytes pendientes por cliente a partir de los que se descartan estados
+
+def frame(kind, payload=b""):
+    return HEADER.pack(len(payload), kind) + payload
+
+def unpack_state(payload):
+    """Cuerpo de MSG_STATE → dict(ticks, seq, t, residual, p (3,), R (3,3), q (n,))."""
+    ticks, seq, t, residual, n = STATE_HEAD.unpack_from(payload)
+    v = np.frombuffer(payload, dtype="<f8", offset=STATE_HEAD.size, count=12 + n)
+    return dict(ticks=ticks, seq=seq, t=t, residual=residual,
+                p=v[:3].copy(), R=v[3:12].reshape(3, 3).copy(), q=v[12:].copy())
+
+class _Client:
+    __slots__ = ("id", "writer", "every")
+
+    def __init__(self, cid, writer):
+        self.id = cid
+        self.writer = writer
+        self.every = 0           # 0 = sin suscripción al estado
+
+# ==============================================================
+# SERVIDOR
+# ==============================================================
+class CommandServer:
+    """
+    Servidor de comandos sobre un Simulator.
+    - worker=None: el servidor lleva su propio lazo de control (un step() cada sim.dt)
+    - worker=SimulationThread: se engancha a su tick (before_step/after_step), p.ej. junto a la GUI
+    start()/close() son corutinas; start_in_thread()/stop_thread() lo ejecutan en un hilo propio.
+    """
+    def __init__(self, sim, worker=None, max_buffer=MAX_BUFFER):
+        self.sim = sim
+        self.worker = worker
+        self.max_buffer = int(max_buffer)
+        self.addresses = []
+        self.commands = self.ticks = self.dropped = 0
+
+        self._clients = {}
+        self._ids = itertools.count(1)
+        self._servers = []
+        self._tick_task = None
+        self._loop = None
+        self._thread = None
+
+        # Comandos combinados del tick en curso (los escribe asyncio, los consume el tick)
+        self._lock = threading.Lock()
+        self._vel = None          # último jog (3,) mm/tick
+        self._impulse = np.zeros(3)
+        self._target = None       # último objetivo (p, velocidad)
+        self._halt = False        # stop / jog / home anulan el objetivo activo
+        self._home = False
+        self._seqs = {}           # id de cliente → último seq recibido
+        self._applied = {}        # id de cliente → último seq aplicado
+        self._active_target = None
+
+    # ==============================================================
+    # ARRANQUE / PARADA
+    # ==============================================================
+    async def start(self, host="127.0.0.1", port=None, path=None):
+        """Escucha en TCP host:port (port=0 → libre) y/o en el socket Unix path."""
+        if port is None and path is None:
+            raise ValueError("Indicar port (TCP) y/o path (socket Unix)")
+        self._loop = asyncio.get_running_loop()
+        if port is not None:
+            srv = await asyncio.start_server(self._handle, host, port)
+            self._servers.append(srv)
+            self.addresses.append(srv.sockets[0].getsockname()[:2])
+        if path is not None:
+            if os.path.exists(path):
+                os.unlink(path)
+            srv = await asyncio.start_unix_server(self._handle, path)
+            self._servers.append(srv)
+            self.addresses.append(str(path))
+
+        if self.worker is not None:
+            self.worker.before_step.append(self._apply_pending)
+            self.worker.after_step.append(self._on_step)
+        else:
+            self._tick_task = asyncio.create_task(self._run_ticks())
+        return self
+
+    async def close(self):
+        if self._tick_task is not None:
+            self._tick_task.cancel()
+            try:
+                await self._tick_task
+            except asyncio.CancelledError:
+                pass
+            self._tick_task = None
+        if self.worker is not None:
+            for hooks, fn in ((self.worker.before_step, self._apply_pending),
+                              (self.worker.after_step, self._on_step)):
+                if fn in hooks:
+                    hooks.remove(fn)
+        for srv in self._servers:
+            srv.close()
+        for c in list(self._clients.values()):
+            c.writer.close()
+        for srv in self._servers:
+            await srv.wait_closed()
+        self._servers.clear()
+        for addr in self.addresses:
+            if isinstance(addr, str) and os.path.exists(addr):
+                os.unlink(addr)
+
+    def start_in_thread(self, **kwargs):
+        """Arranca el servidor en un hilo demonio con su propio bucle asyncio (retorna self)."""
+        ready = threading.Event()
+        error = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.start(**kwargs))
+            except Exception as e:
+                error.append(e)
+                ready.set()
+                loop.close()
+                return
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(self.close())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="rv-cmd", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if error:
+            raise error[0]
+        return self
+
+    def stop_thread(self, timeout=1.0):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        return dict(clients=len(self._clients), commands=self.commands, ticks=self.ticks,
+                    dropped_states=self.dropped)
+
+    # ==============================================================
+    # CONEXIONES
+    # ==============================================================
+    async def _handle(self, reader, writer):
+        client = _Client(next(self._ids), writer)
+        self._clients[client.id] = client
+        profiling.gauge("server.clients", len(self._clients))
+        try:
+            while True:
+                size, kind = HEADER.unpack(await reader.readexactly(HEADER.size))
+                payload = await reader.readexactly(size) if size else b""
+                self._dispatch(client, kind, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.pop(client.id, None)
+            with self._lock:
+                self._seqs.pop(client.id, None)
+            self._applied.pop(client.id, None)
+            profiling.gauge("server.clients", len(self._clients))
+            writer.close()
+
+    def _dispatch(self, client, kind, payload):
+        fmt = PAYLOADS.get(kind)
+        if fmt is None or len(payload) != fmt.size:
+            client.writer.write(frame(MSG_ERROR, f"trama no válida: tipo {kind}, {len(payload)} bytes".encode()))
+            return
+        if kind == MSG_PING:
+            client.writer.write(frame(MSG_PONG, payload))      # sin esperar al tick
+            return
+        if kind == MSG_SUBSCRIBE:
+            client.every = fmt.unpack(payload)[0]
+            return
+
+        vals = fmt.unpack(payload)
+        with self._lock:
+            # Combinar en orden de llegada: el último jog/objetivo manda, los impulsos se suman
+            if kind == MSG_JOG:
+                self._vel = np.array(vals[1:4])
+                self._target = None
+                self._halt = True
+            elif kind == MSG_IMPULSE:
+                self._impulse += vals[1:4]
+            elif kind == MSG_TARGET:
+                self._target = (np.array(vals[1:4]), float(vals[4]))
+                self._vel = None
+            elif kind == MSG_STOP:
+                self._vel = np.zeros(3)
+                self._impulse[:] = 0.0
+                self._target = None
+                self._halt = True
+            elif kind == MSG_HOME:
+                self._home = True
+                self._vel = None
+                self._impulse[:] = 0.0
+                self._target = None
+            self._seqs[client.id] = vals[0]
+            self.commands += 1
+
+    # ==============================================================
+    # TICK DE CONTROL
+    # ==============================================================
+    def _apply_pending(self):
+        """Aplica los comandos combinados del tick (en el hilo que ejecuta sim.step)."""
+        with self._lock:
+            vel, target, halt, home = self._vel, self._target, self._halt, self._home
+            impulse = self._impulse.copy() if self._impulse.any() else None
+            seqs = self._seqs
+            self._vel = self._target = None
+            self._halt = self._home = False
+            self._impulse[:] = 0.0
+            self._seqs = {}
+        sim = self.sim
+        if home:
+            sim.home()
+            self._active_target = None
+        if halt:
+            self._active_target = None
+        if target is not None:
+            self._active_target = target
+        if vel is not None:
+            for i in range(3):
+                sim.set_lever(i, vel[i])
+        if impulse is not None:
+            for i in np.flatnonzero(impulse):
+                sim.add_impulse(int(i), impulse[i])
+        if self._active_target is not None:
+            # Objetivo: velocidad de palanca hacia el punto, recortada para llegar exacto
+            p, speed = self._active_target
+            e = p - sim.ee_target
+            dist = float(np.linalg.norm(e))
+            v = e * min(1.0, speed / dist) if dist > 1e-9 else np.zeros(3)
+            if dist <= 1e-9:
+                self._active_target = None
+            for i in range(3):
+                sim.set_lever(i, v[i])
+        self._applied.update(seqs)
+
+    def _on_step(self, state):
+        # Hilo de simulación → bucle asyncio
+        self._loop.call_soon_threadsafe(self._broadcast, state)
+
+    async def _run_ticks(self):
+        """Lazo de control propio con plazos absolutos (como FixedRateLoop)."""
+        dt = self.sim.dt
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            deadline += dt
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif -delay > 5 * dt:
+                deadline = loop.time()      # re-sincronizar en lugar de encadenar ticks
+            self._apply_pending()
+            self.sim.step()
+            self._broadcast(self.sim.state)
+
+    def _broadcast(self, state):
+        self.ticks += 1
+        subs = [c for c in self._clients.values() if c.every and state.ticks % c.every == 0]
+        if not subs:
+            return
+        T = state.T
+        tail = np.concatenate([T[:3, 3], T[:3, :3].ravel(), state.q]).astype("<f8").tobytes()
+        size = STATE_HEAD.size + len(tail)
+        t = state.ticks * self.sim.dt
+        for c in subs:
+            if c.writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.dropped += 1     # cliente lento: se salta este estado en vez de encolarlo
+                continue
+            head = STATE_HEAD.pack(state.ticks, self._applied.get(c.id, 0), t, state.residual, state.q.size)
+            c.writer.write(HEADER.pack(size, MSG_STATE) + head + tail)
+
+# ==============================================================
+# CLIENTE
+# ==============================================================
+class CommandClient:
+    """Cliente asyncio del protocolo (bancos de prueba, scripts)."""
+    def __init__(self):
+        self.state = None            # último MSG_STATE recibido (dict de unpack_state)
+        self.errors = []
+        self._seq = 0
+        self._pongs = {}
+        self._state_event = asyncio.Event()
+        self._reader = self._writer = self._task = None
+
+    async def connect(self, host="127.0.0.1", port=None, path=None):
+        if path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._task = asyncio.create_task(self._read_loop())
+        return self
+
+    async def close(self):
+        self._writer.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _read_loop(self):
+        try:
+            while True:
+                size, kind = HEADER.unpack(await self._reader.readexactly(HEADER.size))
+                payload = await self._reader.readexactly(size) if size else b""
+                if kind == MSG_STATE:
+                    self.state = unpack_state(payload)
+                    self._state_event.set()
+                elif kind == MSG_PONG:
+                    seq, _ = PING.unpack(payload)
+                    fut = self._pongs.pop(seq, None)
+                    if fut is not None and not fut.done():
+                        fut.set_result(asyncio.get_running_loop().time())
+                elif kind == MSG_ERROR:
+                    self.errors.append(payload.decode("utf-8", "replace"))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def _send(self, kind, fmt, *vals):
+        self._seq += 1
+        self._writer.write(frame(kind, fmt.pack(self._seq, *vals)))
+        return self._seq
+
+    def jog(self, v):
+        return self._send(MSG_JOG, VEC, *map(float, v))
+
+    def impulse(self, d):
+        return self._send(MSG_IMPULSE, VEC, *map(float, d))
+
+    def target(self, p, speed=5.0):
+        return self._send(MSG_TARGET, TARGET, *map(float, p), float(speed))
+
+    def stop(self):
+        return self._send(MSG_STOP, SEQ)
+
+    def home(self):
+        return self._send(MSG_HOME, SEQ)
+
+    def subscribe(self, every=1):
+        self._writer.write(frame(MSG_SUBSCRIBE, SUBSCRIBE.pack(int(every))))
+
+    async def ping(self):
+        """Ida y vuelta [s] medida con el reloj del bucle."""
+        loop = asyncio.get_running_loop()
+        self._seq += 1
+        fut = loop.create_future()
+        self._pongs[self._seq] = fut
+        t0 = loop.time()
+        self._writer.write(frame(MSG_PING, PING.pack(self._seq, t0)))
+        return await fut - t0
+
+    async def next_state(self):
+        """Espera al siguiente MSG_STATE (requiere subscribe())."""
+        self._state_event.clear()
+        await self._state_event.wait()
+        return self.state
+
+# ==============================================================
+# SERVIDOR SIN GUI
+# ==============================================================
+def main(argv=None):
+    from rvcore.io import load_robot_from_csv_dir
+    from rvcore.robot_model import from_csv_bundle
+    from rvcore.simulator import Simulator
+
+    ap = argparse.ArgumentParser(description="Servidor local de comandos para el simulador RV-M2")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=None, help="puerto TCP (0 = libre)")
+    ap.add_argument("--unix", default=None, help="ruta de socket Unix")
+    ap.add_argument("--rate", type=float, default=30.0, help="tasa de control [Hz]")
+    ap.add_argument("--config", default=str(Path(__file__).resolve().parent.parent / "config_csv"))
+    args = ap.parse_args(argv)
+    if args.port is None and args.unix is None:
+        args.port = 5007
+
+    model = from_csv_bundle(load_robot_from_csv_dir(args.config, name="Mitsubishi RV-M2 (CSV)"))
+    server = CommandServer(Simulator(model, dt=1.0 / args.rate))
+
+    async def serve():
+        await server.start(host=args.host, port=args.port, path=args.unix)
+        print(f"Escuchando en {server.addresses} a {args.rate:g} Hz (Ctrl+C para salir)")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
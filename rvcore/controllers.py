@@ -41,3 +41,79 @@ class PID3:
         if self.umax is not None:
             u = np.minimum(u, self.umax)
         return u
+
+class PIDBank:
+    """
+    Banco de N controladores PID de k ejes con estado en arrays (N, k).
+    Misma ley que PID3 (integral simple, derivada filtrada, saturación posterior),
+    pero todos los controladores avanzan en una sola llamada vectorizada y sin
+    reservar memoria: step() escribe en buffers internos.
+    Ganancias, tau y saturación admiten un valor común o uno por controlador.
+    """
+    def __init__(self, n, k=3, kp=0.6, ki=0.0, kd=0.12, umin=None, umax=None, tau=0.05):
+        self.n, self.k = int(n), int(k)
+        shape = (self.n, self.k)
+        self.kp = np.array(np.broadcast_to(kp, shape), dtype=float)
+        self.ki = np.array(np.broadcast_to(ki, shape), dtype=float)
+        self.kd = np.array(np.broadcast_to(kd, shape), dtype=float)
+        self.tau = np.array(np.broadcast_to(tau, (self.n,)), dtype=float)[:, None]
+        self.umin = None if umin is None else np.array(np.broadcast_to(umin, shape), dtype=float)
+        self.umax = None if umax is None else np.array(np.broadcast_to(umax, shape), dtype=float)
+
+        self.i = np.zeros(shape, dtype=float)
+        self.d = np.zeros(shape, dtype=float)
+        self.e_prev = np.zeros(shape, dtype=float)
+
+        # Buffers de trabajo
+        self.u = np.zeros(shape, dtype=float)
+        self._tmp = np.zeros(shape, dtype=float)
+        self._de = np.zeros(shape, dtype=float)
+        self._alpha = np.zeros((self.n, 1), dtype=float)
+
+    def reset(self, mask=None):
+        """Resetea todos los controladores o solo los marcados en mask (N,) bool."""
+        if mask is None:
+            self.i[:] = 0.0
+            self.d[:] = 0.0
+            self.e_prev[:] = 0.0
+        else:
+            mask = np.asarray(mask, dtype=bool)
+            self.i[mask] = 0.0
+            self.d[mask] = 0.0
+            self.e_prev[mask] = 0.0
+
+    def step(self, E, dt):
+        """
+        Avanza los N controladores con errores E (N, k).
+        Retorna self.u (N, k); el buffer se reutiliza en la siguiente llamada.
+        """
+        tmp, de, alpha = self._tmp, self._de, self._alpha
+
+        # Integral (anti-windup simple por saturación posterior)
+        np.multiply(E, dt, out=tmp)
+        self.i += tmp
+
+        # Derivada filtrada (Tustin / low-pass)
+        np.subtract(E, self.e_prev, out=de)
+        de /= max(dt, 1e-6)
+        np.add(self.tau, dt, out=alpha)
+        np.divide(self.tau, alpha, out=alpha)
+        self.d *= alpha
+        np.subtract(1.0, alpha, out=alpha)
+        de *= alpha
+        self.d += de
+        self.e_prev[...] = E
+
+        u = self.u
+        np.multiply(self.kp, E, out=u)
+        np.multiply(self.ki, self.i, out=tmp)
+        u += tmp
+        np.multiply(self.kd, self.d, out=tmp)
+        u += tmp
+
+        # Saturación
+        if self.umin is not None:
+            np.maximum(u, self.umin, out=u)
+        if self.umax is not None:
+            np.minimum(u, self.umax, out=u)
+        return u
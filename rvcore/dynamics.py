@@ -0,0 +1,158 @@
+# rvcore/dynamics.py
+"""
+Dinámica inversa vectorizada (Newton–Euler recursivo) y comprobación de pares.
+Requiere model.inertia (inertia.csv). Unidades: el modelo está en mm y kg·mm²;
+aquí se pasa a SI, así que los pares salen en N·m.
+"""
+import numpy as np
+from rvcore.ik import _cross
+
+GRAVITY = np.array([0.0, 0.0, -9.81])   # m/s² en el marco mundo (base.csv)
+
+def _require_inertia(model):
+    inertia = getattr(model, "inertia", None)
+    if inertia is None:
+        raise ValueError("El modelo no tiene inercias: añadir inertia.csv junto a dh.csv")
+    return inertia
+
+def rnea_batch(model, Q, dQ, ddQ, gravity=GRAVITY):
+    """
+    Pares articulares τ = M(q)·q̈ + C(q, q̇)·q̇ + g(q) para M muestras a la vez.
+      Q, dQ, ddQ: (M, n) rad, rad/s, rad/s²
+    Retorna tau (M, n) en N·m. Bucle Python solo sobre los n eslabones; cada
+    paso opera sobre las M muestras (formulación de Luh–Walker–Paul en los
+    marcos DH de cada eslabón).
+    """
+    inertia = _require_inertia(model)
+    Q = np.atleast_2d(np.asarray(Q, dtype=float))
+    dQ = np.broadcast_to(np.asarray(dQ, dtype=float), Q.shape)
+    ddQ = np.broadcast_to(np.asarray(ddQ, dtype=float), Q.shape)
+    M, n = Q.shape
+
+    a = model.dh[:, 0] * 1e-3
+    alpha = model.dh[:, 1]
+    d = model.dh[:, 2] * 1e-3
+    theta = model.dh[:, 3] + Q
+    mass = inertia.mass
+    com = inertia.com * 1e-3                    # s_i: centro de masas respecto al origen del marco i
+    I = inertia.inertia * 1e-6
+
+    ca, sa = np.cos(alpha), np.sin(alpha)
+    ct, st = np.cos(theta), np.sin(theta)
+    # p*_i: origen del marco i respecto al i-1, expresado en el marco i
+    pstar = np.stack([a, d * sa, d * ca], axis=1)
+
+    # R[i] = rotación del marco i-1 al i (parte rotacional de A_i), (M, 3, 3)
+    R = np.empty((n, M, 3, 3))
+    for i in range(n):
+        R[i, :, 0, 0], R[i, :, 0, 1], R[i, :, 0, 2] = ct[:, i], -st[:, i] * ca[i], st[:, i] * sa[i]
+        R[i, :, 1, 0], R[i, :, 1, 1], R[i, :, 1, 2] = st[:, i], ct[:, i] * ca[i], -ct[:, i] * sa[i]
+        R[i, :, 2, 0], R[i, :, 2, 1], R[i, :, 2, 2] = 0.0, sa[i], ca[i]
+
+    # --- Recursión hacia delante: velocidades y aceleraciones en cada marco ---
+    w = np.zeros((M, 3))
+    dw = np.zeros((M, 3))
+    # Aceleración de la base = -g (truco habitual: incluye la gravedad en todas las fuerzas)
+    dv = np.broadcast_to(-(model.base[:3, :3].T @ np.asarray(gravity, dtype=float)), (M, 3)).copy()
+    z = np.zeros((M, 3))
+    F = np.empty((n, M, 3))
+    N = np.empty((n, M, 3))
+    W = np.empty((n, M, 3))
+    for i in range(n):
+        Rt = R[i].transpose(0, 2, 1)
+        z[:, 2] = dQ[:, i]
+        wz = w + z                                          # ω_{i-1} + z0·q̇_i
+        dwz = dw.copy()
+        dwz[:, 2] += ddQ[:, i]
+        dwz += _cross(w, z)
+        w = np.einsum("mij,mj->mi", Rt, wz)
+        dw = np.einsum("mij,mj->mi", Rt, dwz)
+        dv = (np.einsum("mij,mj->mi", Rt, dv)
+              + _cross(dw, pstar[i]) + _cross(w, _cross(w, pstar[i])))
+        dvc = dv + _cross(dw, com[i]) + _cross(w, _cross(w, com[i]))
+        F[i] = mass[i] * dvc
+        Iw = w @ I[i].T
+        N[i] = dw @ I[i].T + _cross(w, Iw)
+        W[i] = w
+
+    # --- Recursión hacia atrás: fuerzas y momentos, par = proyección sobre z_{i-1} ---
+    tau = np.empty((M, n))
+    f = np.zeros((M, 3))
+    nm = np.zeros((M, 3))
+    for i in range(n - 1, -1, -1):
+        if i < n - 1:
+            Rn = R[i + 1]
+            # Momento del eslabón siguiente trasladado: n_{i+1} + (ᶦ⁺¹R_i·p*_i) × f_{i+1}
+            p_next = np.einsum("mji,j->mi", Rn, pstar[i])
+            nm = np.einsum("mij,mj->mi", Rn, nm + _cross(p_next, f))
+            f = np.einsum("mij,mj->mi", Rn, f)
+        nm = nm + _cross(pstar[i] + com[i], F[i]) + N[i]
+        f = f + F[i]
+        # Eje z_{i-1} expresado en el marco i = tercera fila de R_i
+        tau[:, i] = np.einsum("mj,mj->m", nm, R[i][:, 2, :])
+    return tau
+
+def gravity_torques(model, Q, gravity=GRAVITY):
+    """Pares de gravedad g(q) (M, n) N·m."""
+    Q = np.atleast_2d(np.asarray(Q, dtype=float))
+    zero = np.zeros_like(Q)
+    return rnea_batch(model, Q, zero, zero, gravity)
+
+def torque_limits(model):
+    tau_max = _require_inertia(model).tau_max
+    if tau_max is None:
+        raise ValueError("inertia.csv no define tau_max_Nm")
+    return tau_max
+
+def check_torques(model, Q, dQ, ddQ, gravity=GRAVITY):
+    """
+    Evalúa pares y uso relativo para (M, n) muestras.
+    Retorna (tau (M, n), usage (M, n) = |τ|/τ_max, ok (M,) bool).
+    """
+    tau = rnea_batch(model, Q, dQ, ddQ, gravity)
+    usage = np.abs(tau) / torque_limits(model)
+    return tau, usage, np.all(usage <= 1.0, axis=1)
+
+def _min_time_scale(tau, tau_g, tau_max):
+    """
+    Factor k >= 1 mínimo tal que, ralentizando t → k·t (q̇/k, q̈/k²),
+    |g + (τ - g)/k²| <= τ_max en todas las muestras. Exacto: τ es afín en 1/k².
+    """
+    dyn = tau - tau_g
+    if np.any(np.abs(tau_g) > tau_max):
+        raise ValueError("Los pares de gravedad superan tau_max: la trayectoria es inviable a cualquier velocidad")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.where(dyn > 0, (tau_max - tau_g) / dyn, np.where(dyn < 0, (tau_max + tau_g) / -dyn, np.inf))
+    u_min = float(np.min(u, initial=np.inf))
+    return 1.0 if u_min >= 1.0 else 1.0 / np.sqrt(u_min)
+
+def time_scale_trajectory(model, traj, rate_hz=1000.0, margin=1.0, gravity=GRAVITY):
+    """
+    Alarga los tramos de una JointTrajectory (rvcore.trajectory) que superan
+    tau_max·margin. Como la trayectoria se detiene en cada waypoint, cada tramo
+    se escala por separado con su propio factor (k = 1 si ya cumple).
+    Muestrea a rate_hz (los picos entre muestras no se ven: usar margin < 1 si
+    hace falta holgura). Retorna (trayectoria escalada, k por tramo).
+    """
+    from rvcore.trajectory import JointTrajectory
+
+    tau_max = torque_limits(model) * margin
+    t, q, dq, ddq = traj.sample(rate_hz)
+    tau = rnea_batch(model, q, dq, ddq, gravity)
+    tau_g = gravity_torques(model, q, gravity)
+
+    nseg = traj.waypoints.shape[0] - 1
+    if nseg == 0:
+        return traj, np.ones(0)
+    seg = np.clip(np.searchsorted(traj.t_knots, t, side="right") - 1, 0, nseg - 1)
+    k = np.ones(nseg)
+    for s in range(nseg):
+        m = seg == s
+        if m.any():
+            k[s] = _min_time_scale(tau[m], tau_g[m], tau_max)
+
+    T = np.diff(traj.t_knots) * k
+    scaled = JointTrajectory(waypoints=traj.waypoints, t_knots=np.r_[0.0, np.cumsum(T)],
+                             v_peak=traj.v_peak / k, a_peak=traj.a_peak / k**2,
+                             t_ramp=traj.t_ramp * k, profile=traj.profile)
+    return scaled, k
@@ -0,0 +1,110 @@
+# rvcore/fleet.py
+import numpy as np
+from rvcore.kinematics import fk_frames_batch
+from rvcore.ik import ik_step_dls_batch
+from rvcore.utils import wrap_to_pi, clip_joints
+
+class Fleet:
+    """
+    N células RV-M2 simuladas en paralelo con estado en arrays (structure of arrays).
+    Cada step() equivale a N pasos DLS de Simulator (sin IK analítica), con una
+    sola FK, un solo cálculo de Jacobianos y un solo np.linalg.solve apilado.
+    - lam: escalar o (N,) amortiguación por robot
+    - q_min / q_max: (n,) o (N, n) límites por robot (por defecto model.limits)
+    - pid: PIDBank(N) opcional (rvcore.controllers), como use_pid en Simulator
+    """
+    def __init__(self, model, n, dt=1.0/30, lam=2.0, q0=None, q_min=None, q_max=None,
+                 step_clip=np.deg2rad(2.0), pid=None):
+        self.model = model
+        self.n = int(n)
+        self.dt = float(dt)
+        dof = model.dof
+        self.lam = np.array(np.broadcast_to(lam, (self.n,)), dtype=float)
+        self.step_clip = step_clip
+        if q_min is None and hasattr(model, "limits"):
+            q_min, q_max = model.limits.q_min, model.limits.q_max
+        self.q_min = None if q_min is None else np.array(np.broadcast_to(q_min, (self.n, dof)), dtype=float)
+        self.q_max = None if q_max is None else np.array(np.broadcast_to(q_max, (self.n, dof)), dtype=float)
+        self.pid = pid
+
+        self.Q = np.zeros((self.n, dof), dtype=float)
+        if q0 is not None:
+            self.Q[:] = q0
+        self.ticks = 0
+        self._update_fk()
+        self.ee_target = self.ee_position.copy()          # (N, 3) objetivo cartesiano absoluto
+        self.residual = np.zeros(self.n)
+        self.last_dx = np.zeros((self.n, 3))
+
+    # ==============================================================
+    # ESTADO
+    # ==============================================================
+    def _update_fk(self):
+        # Los marcos sirven para la pose actual y para los Jacobianos del próximo paso
+        self.F = fk_frames_batch(self.model, self.Q)
+
+    @property
+    def T(self):
+        """(N, 4, 4) poses base→tool."""
+        return self.F[:, -1]
+
+    @property
+    def ee_position(self):
+        return self.F[:, -1, :3, 3]
+
+    @property
+    def t(self):
+        return self.ticks * self.dt
+
+    def home(self, mask=None):
+        """Lleva a q = 0 todos los robots o los marcados en mask (N,) bool."""
+        sel = slice(None) if mask is None else np.asarray(mask, dtype=bool)
+        self.Q[sel] = 0.0
+        if self.pid is not None:
+            self.pid.reset(mask)
+        self._update_fk()
+        self.ee_target[sel] = self.ee_position[sel]
+        self.residual[sel] = 0.0
+
+    # ==============================================================
+    # PASO DE SIMULACIÓN
+    # ==============================================================
+    def step(self, DX):
+        """
+        Avanza un tick con incrementos cartesianos DX (N, 3) mm/tick (o (3,) común).
+        Los robots con incremento nulo no mueven sus juntas, como en Simulator.
+        Retorna Q (N, n).
+        """
+        DX = np.array(np.broadcast_to(DX, (self.n, 3)), dtype=float)
+        ee_meas = self.ee_position.copy()
+        self.ee_target += DX
+        self.last_dx = DX
+
+        if self.pid is not None:
+            DX = self.pid.step(self.ee_target - ee_meas, self.dt)
+
+        moving = np.any(DX != 0.0, axis=1)
+        if moving.all():
+            self.Q = ik_step_dls_batch(self.model, self.Q, DX, lam=self.lam, step_clip=self.step_clip,
+                                       q_min=self.q_min, q_max=self.q_max, frames=self.F)
+        elif moving.any():
+            idx = np.flatnonzero(moving)
+            clip = np.asarray(self.step_clip, float)
+            self.Q[idx] = ik_step_dls_batch(
+                self.model, self.Q[idx], DX[idx], lam=self.lam[idx],
+                step_clip=clip[idx] if clip.ndim else clip,
+                q_min=None if self.q_min is None else self.q_min[idx],
+                q_max=None if self.q_max is None else self.q_max[idx],
+                frames=self.F[idx])
+
+        # Normalizar y limitar juntas
+        self.Q = clip_joints(wrap_to_pi(self.Q), self.q_min, self.q_max)
+        self._update_fk()
+        self.residual = np.linalg.norm(self.ee_target - self.ee_position, axis=1)
+        self.ticks += 1
+        return self.Q
+
+    def run(self, n_ticks, DX):
+        for _ in range(int(n_ticks)):
+            self.step(DX)
+        return self.Q
@@ -1,6 +1,8 @@
 # rvcore/ik.py
+from dataclasses import dataclass
 import numpy as np
-from rvcore.kinematics import fk_dh
+from rvcore.kinematics import fk_dh, fk_frames, fk_frames_batch
+from rvcore.profiling import timed
 
 def ee_position(model, q):
     T, _ = fk_dh(model, q)
@@ -22,21 +24,229 @@ def numerical_jacobian_pos(model, q, eps=1e-4):
         J[:, i] = (x1 - x0) / eps
     return J
 
+def _cross(a, b):
+    """Producto vectorial sobre el último eje (más barato que np.cross en arrays pequeños)."""
+    out = np.empty(np.broadcast(a, b).shape, dtype=float)
+    out[..., 0] = a[..., 1]*b[..., 2] - a[..., 2]*b[..., 1]
+    out[..., 1] = a[..., 2]*b[..., 0] - a[..., 0]*b[..., 2]
+    out[..., 2] = a[..., 0]*b[..., 1] - a[..., 1]*b[..., 0]
+    return out
+
+def geometric_jacobian(model, q):
+    """
+    Jacobiano geométrico analítico 6xN a partir de una sola pasada de FK:
+      J[:3, i] = z_i x (p_e - o_i)   (posición, mm/rad)
+      J[3:, i] = z_i                 (orientación, rad/rad)
+    z_i, o_i: eje y origen de la junta i (todas de revolución), p_e: punta de herramienta.
+    """
+    return _jacobian_from_frames(fk_frames(model, q))
+
+def _jacobian_from_frames(F):
+    """Jacobiano geométrico 6xN a partir de los marcos (n+2, 4, 4) de fk_frames."""
+    z = F[:-2, :3, 2]                 # ejes z_0..z_{n-1}
+    o = F[:-2, :3, 3]                 # orígenes o_0..o_{n-1}
+    pe = F[-1, :3, 3]
+
+    J = np.empty((6, F.shape[0] - 2), dtype=float)
+    J[:3] = _cross(z, pe - o).T
+    J[3:] = z.T
+    return J
+
+def geometric_jacobian_batch(model, Q):
+    """
+    Jacobianos geométricos para M configuraciones:
+      Q: (M, n) → (M, 6, n)
+    """
+    return _jacobian_from_frames_batch(fk_frames_batch(model, Q))
+
+def _jacobian_from_frames_batch(F):
+    """Jacobianos (M, 6, n) a partir de los marcos (M, n+2, 4, 4) de fk_frames_batch."""
+    z = F[:, :-2, :3, 2]              # (M, n, 3)
+    o = F[:, :-2, :3, 3]
+    pe = F[:, -1:, :3, 3]             # (M, 1, 3)
+
+    J = np.empty((F.shape[0], 6, F.shape[1] - 2), dtype=float)
+    J[:, :3] = _cross(z, pe - o).transpose(0, 2, 1)
+    J[:, 3:] = z.transpose(0, 2, 1)
+    return J
+
+@timed("ik_step_dls")
 def ik_step_dls(model, q, dx_mm, lam=2.0, step_clip=np.deg2rad(2.0)):
     """
     Un paso de IK DLS para mover la herramienta por delta cartesiano (mm).
-    - dx_mm: np.array([dx, dy, dz]) mm
+    - dx_mm: np.array([dx, dy, dz]) mm, o bien [dx, dy, dz, wx, wy, wz]
+      (mm + rad) para incluir las filas de orientación del Jacobiano
     - lam: amortiguación (λ)
     - step_clip: límite de paso articular por iteración (rad)
     Retorna q_next (clamp a límites).
     """
     q = np.asarray(q, float)
-    J = numerical_jacobian_pos(model, q)  # 3xN
+    dx_mm = np.asarray(dx_mm, float)
+    J = geometric_jacobian(model, q)[:dx_mm.size]  # 3xN (o 6xN)
     JT = J.T
-    A = J @ JT + (lam**2) * np.eye(3)
+    A = J @ JT + (lam**2) * np.eye(dx_mm.size)
     dq = JT @ np.linalg.solve(A, dx_mm)
     dq = np.clip(dq, -step_clip, step_clip)
     q_next = q + dq
     if hasattr(model, "limits"):
         q_next = np.minimum(np.maximum(q_next, model.limits.q_min), model.limits.q_max)
     return q_next
+
+@timed("ik_step_dls_batch")
+def ik_step_dls_batch(model, Q, DX, lam=2.0, step_clip=np.deg2rad(2.0), q_min=None, q_max=None,
+                      frames=None):
+    """
+    Un paso DLS para N robots a la vez (misma ley que ik_step_dls, fila a fila).
+    - Q: (N, n) rad; DX: (N, 3) mm o (N, 6) mm + rad
+    - lam: escalar o (N,) amortiguación por robot
+    - step_clip: escalar, (N,) o (N, n) límite de paso [rad]
+    - q_min / q_max: (n,) o (N, n); por defecto model.limits
+    - frames: fk_frames_batch(model, Q) ya calculado (evita repetir la FK)
+    Los N sistemas amortiguados se resuelven en una sola llamada apilada a
+    np.linalg.solve. Retorna Q_next (N, n).
+    """
+    Q = np.asarray(Q, float)
+    DX = np.asarray(DX, float)
+    N, m = DX.shape
+    F = fk_frames_batch(model, Q) if frames is None else frames
+    J = _jacobian_from_frames_batch(F)[:, :m]                    # (N, m, n)
+    JT = J.transpose(0, 2, 1)
+    lam2 = np.broadcast_to(np.asarray(lam, float)**2, (N,))
+    A = J @ JT
+    A[:, np.arange(m), np.arange(m)] += lam2[:, None]
+    dq = (JT @ np.linalg.solve(A, DX[:, :, None]))[:, :, 0]
+
+    clip = np.asarray(step_clip, float)
+    if clip.ndim == 1:
+        clip = clip[:, None]
+    Q_next = Q + np.clip(dq, -clip, clip)
+    if q_min is None and hasattr(model, "limits"):
+        q_min, q_max = model.limits.q_min, model.limits.q_max
+    if q_min is not None and q_max is not None:
+        Q_next = np.minimum(np.maximum(Q_next, q_min), q_max)
+    return Q_next
+
+@dataclass
+class IKResult:
+    q: np.ndarray       # solución articular [rad]
+    iters: int          # iteraciones realizadas
+    residual: float     # |target - p(q)| final [mm]
+    converged: bool     # residual <= tol
+
+@timed("ik_solve")
+def ik_solve(model, target, q0, tol=1e-3, max_iter=50, lam=1.0,
+             lam_min=1e-4, lam_max=1e4, step_clip=np.deg2rad(15.0)):
+    """
+    IK de posición iterativa (DLS con λ adaptativo, estilo Levenberg–Marquardt).
+    - target: np.array([x, y, z]) mm, posición absoluta de la herramienta
+    - q0: semilla [rad]; pasar la solución anterior para arranque en caliente
+    - tol: tolerancia de residuo (mm); se sale en cuanto se alcanza
+    - lam: amortiguación inicial; se reduce si el paso mejora y crece si empeora
+    - step_clip: límite de paso articular por iteración (rad)
+    Cada iterado se limita a model.limits. Retorna IKResult.
+    """
+    target = np.asarray(target, float)
+    q = np.asarray(q0, float).copy()
+    qmin = qmax = None
+    if hasattr(model, "limits"):
+        qmin, qmax = model.limits.q_min, model.limits.q_max
+        q = np.minimum(np.maximum(q, qmin), qmax)
+
+    F = fk_frames(model, q)
+    e = target - F[-1, :3, 3]
+    err = float(np.linalg.norm(e))
+    I3 = np.eye(3)
+
+    it = 0
+    while err > tol and it < max_iter:
+        it += 1
+        J = _jacobian_from_frames(F)[:3]
+        JT = J.T
+        dq = JT @ np.linalg.solve(J @ JT + (lam**2) * I3, e)
+        dq = np.clip(dq, -step_clip, step_clip)
+        q_try = q + dq
+        if qmin is not None:
+            q_try = np.minimum(np.maximum(q_try, qmin), qmax)
+
+        F_try = fk_frames(model, q_try)
+        e_try = target - F_try[-1, :3, 3]
+        err_try = float(np.linalg.norm(e_try))
+
+        if err_try < err:
+            # Paso aceptado: acercarse a Gauss-Newton
+            q, F, e, err = q_try, F_try, e_try, err_try
+            lam = max(lam * 0.5, lam_min)
+        else:
+            # Paso rechazado: más amortiguación (hacia gradiente)
+            lam = lam * 4.0
+            if lam > lam_max:
+                break
+
+    return IKResult(q=q, iters=it, residual=err, converged=err <= tol)
+
+# ==============================================================
+# IK DE POSE (posición + orientación)
+# ==============================================================
+# Pesos del error de pose [ex, ey, ez, wx, wy, wz]: 1 por mm y 200 por rad
+# (un error de 1 rad en orientación "vale" como 200 mm, del orden del alcance del brazo)
+POSE_WEIGHTS = np.array([1.0, 1.0, 1.0, 200.0, 200.0, 200.0])
+
+def pose_error(T, T_target):
+    """
+    Error de pose 6D en la base: [dp (mm), dθ (rad)].
+    dθ = ½ Σ r_i x r_i* (columnas de R y de R*); coincide con el vector de rotación
+    para errores pequeños y es compatible con las filas angulares del Jacobiano.
+    """
+    R, Rd = T[:3, :3], T_target[:3, :3]
+    e = np.empty(6, dtype=float)
+    e[:3] = T_target[:3, 3] - T[:3, 3]
+    e[3:] = 0.5 * _cross(R.T, Rd.T).sum(axis=0)
+    return e
+
+@timed("ik_pose_dls")
+def ik_pose_dls(model, T_target, q0, weights=POSE_WEIGHTS, tol=1e-3, max_iter=50, lam=1.0,
+                lam_min=1e-4, lam_max=1e4, step_clip=np.deg2rad(15.0)):
+    """
+    IK de pose por mínimos cuadrados ponderados (LM, como ik_solve):
+      min_q |W·e(q)|²,  e = pose_error(FK(q), T_target),  W = diag(weights)
+    Con 5 juntas no toda orientación es alcanzable: el resultado es el mejor
+    compromiso según los pesos. residual = |W·e| (mm equivalentes);
+    converged indica residual <= tol.
+    """
+    T_target = np.asarray(T_target, float)
+    w = np.asarray(weights, float)
+    q = np.asarray(q0, float).copy()
+    qmin = qmax = None
+    if hasattr(model, "limits"):
+        qmin, qmax = model.limits.q_min, model.limits.q_max
+        q = np.minimum(np.maximum(q, qmin), qmax)
+
+    F = fk_frames(model, q)
+    e = w * pose_error(F[-1], T_target)
+    err = float(np.linalg.norm(e))
+    I6 = np.eye(6)
+
+    it = 0
+    while err > tol and it < max_iter:
+        it += 1
+        J = w[:, None] * _jacobian_from_frames(F)
+        JT = J.T
+        dq = JT @ np.linalg.solve(J @ JT + (lam**2) * I6, e)
+        dq = np.clip(dq, -step_clip, step_clip)
+        q_try = q + dq
+        if qmin is not None:
+            q_try = np.minimum(np.maximum(q_try, qmin), qmax)
+
+        F_try = fk_frames(model, q_try)
+        e_try = w * pose_error(F_try[-1], T_target)
+        err_try = float(np.linalg.norm(e_try))
+
+        if err_try < err:
+            q, F, e, err = q_try, F_try, e_try, err_try
+            lam = max(lam * 0.5, lam_min)
+        else:
+            lam = lam * 4.0
+            if lam > lam_max:
+                break
+
+    return IKResult(q=q, iters=it, residual=err, converged=err <= tol)
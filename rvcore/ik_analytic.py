@@ -1,11 +1,20 @@
 # rvcore/ik_analytic.py
+import math
 import numpy as np
+from rvcore.profiling import timed
+from rvcore.kinematics import fk_dh, fk_dh_batch, model_chain
+from rvcore.ik import IKResult, POSE_WEIGHTS, ik_pose_dls, pose_error
 
+@timed("ik_analytic")
 def ik_rvm2_position(model, target_pos):
     """
     Cinemática inversa analítica simplificada para el Mitsubishi RV-M2.
     Basada en los parámetros DH del modelo (solo posición x, y, z).
     Retorna una lista de posibles soluciones articulares [q1..q5].
+    Es aproximada: ignora d5 (la herramienta) y el signo de alpha1, por lo que
+    el punto que alcanza no coincide con el pedido. Se conserva tal cual porque
+    la interfaz compensa ese desvío; para configuraciones que lleguen de verdad
+    usar ik_rvm2_position_batch o ik_rvm2_pose.
     """
 
     # --- Extraer parámetros desde el modelo DH ---
@@ -64,3 +73,279 @@ def ik_rvm2_position(model, target_pos):
         valid_solutions.append(clipped)
 
     return valid_solutions
+
+def ik_rvm2_position_batch(model, targets, tol=1e-3):
+    """
+    IK de posición exacta y vectorizada para M objetivos a la vez.
+      targets: (M, 3) posiciones [x, y, z] en mm de la herramienta
+    Retorna:
+      sols:  (M, 2, 5) soluciones articulares; [:,0] codo arriba, [:,1] codo abajo
+      valid: (M, 2) bool, True si la rama alcanza el objetivo (residual de FK
+             <= tol mm) y respeta q_min/q_max
+    Misma convención que ik_rvm2_position (q1 = azimut del objetivo,
+    q2 + q3 + q4 = 0, q5 = 0), pero resuelta con la forma cerrada de pose
+    (_rvm2_pose_closed_form): tiene en cuenta d5 y la herramienta, así que las
+    ramas válidas llegan al punto pedido. No recorta a límites ni al alcance:
+    las ramas fuera de rango quedan marcadas con valid=False.
+    """
+    if not _rvm2_pose_structure_ok(model.dh):
+        raise ValueError("La IK de posición vectorizada requiere la estructura DH del RV-M2")
+    P = np.atleast_2d(np.asarray(targets, dtype=float))
+    M = P.shape[0]
+
+    # Orientación de la convención: la de q = (azimut, 0, 0, 0, 0) con el punto pedido
+    q_ref = np.zeros((M, model.dof))
+    q_ref[:, 0] = np.arctan2(P[:, 1], P[:, 0])
+    T = fk_dh_batch(model, q_ref)
+    T[:, :3, 3] = P
+    sols, reach, _ = _rvm2_pose_closed_form(model, T)
+    sols, valid = np.ascontiguousarray(sols[:, :2]), reach[:, :2].copy()
+
+    # Comprobación por FK: descarta ramas que no llegan (p. ej. objetivo sobre el eje)
+    err = np.linalg.norm(fk_dh_batch(model, sols.reshape(-1, model.dof))[:, :3, 3].reshape(M, 2, 3)
+                         - P[:, None, :], axis=2)
+    valid &= err <= tol
+
+    qmin = getattr(model.limits, "q_min", None)
+    qmax = getattr(model.limits, "q_max", None)
+    if qmin is not None and qmax is not None:
+        valid &= np.all((sols >= qmin) & (sols <= qmax), axis=2)
+    return sols, valid
+
+# ==============================================================
+# IK DE POSE (posición + orientación) EN FORMA CERRADA
+# ==============================================================
+# Ramas de la IK de pose: hombro delante/detrás (q1 o q1+π) × codo arriba/abajo
+POSE_BRANCHES = ("front-up", "front-down", "back-up", "back-down")
+
+def _rvm2_pose_structure_ok(dh):
+    """
+    La forma cerrada supone la estructura del RV-M2: juntas 2-3-4 paralelas
+    (alpha2 = alpha3 = 0), sin desplazamientos laterales (d2 = d3 = d4 = 0),
+    muñeca sin a4/a5, eje 5 perpendicular a los anteriores (alpha4 = ±90°) y
+    giro final coaxial con la herramienta (alpha5 = 0).
+    """
+    if dh.shape[0] != 5:
+        return False
+    (_, al1, _, _), (_, al2, d2, _), (_, al3, d3, _), (a4, al4, d4, _), (a5, al5, _, _) = dh.tolist()
+    eps = 1e-9
+    return (max(abs(d2), abs(d3), abs(d4), abs(a4), abs(a5)) < eps
+            and max(abs(al2), abs(al3), abs(al5)) < eps
+            and abs(math.cos(al4)) < eps and abs(math.sin(al1)) > 0.5)
+
+def _flange_targets(model, T):
+    """base⁻¹ · T · tool⁻¹ (inversas precalculadas en model.chain si existe)."""
+    chain = model_chain(model)
+    if chain is not None:
+        return chain.base_inv @ T @ chain.tool_inv
+    return np.linalg.inv(model.base) @ T @ np.linalg.inv(model.tool)
+
+def _rvm2_pose_closed_form(model, T_targets):
+    """
+    Núcleo vectorizado de la IK de pose. T_targets: (M, 4, 4) base→tool.
+    Retorna sols (M, 4, 5) en el orden de POSE_BRANCHES, reach (M, 4) posición
+    alcanzable y orient_err (M,) ángulo [rad] entre la aproximación pedida y
+    la alcanzable más cercana.
+
+    Con 5 juntas la herramienta vive en el plano vertical que contiene el eje
+    de la base (azimut q1): el eje de aproximación z5 debe estar en ese plano.
+    Se proyecta sobre él y el giro q5 es el que mejor alinea x/y (Procrustes
+    en 2D); si la orientación ya estaba en el subconjunto alcanzable la
+    solución es exacta.
+    """
+    dh = model.dh
+    a1, alpha1, d1 = dh[0, 0], dh[0, 1], dh[0, 2]
+    a2, a3 = dh[1, 0], dh[2, 0]
+    d5 = dh[4, 2]
+    th0 = dh[:, 3]
+    ca1, sa1 = np.cos(alpha1), np.sin(alpha1)
+    sa4 = np.sign(np.sin(dh[3, 1]))                          # alpha4 = ±90°
+
+    Tf = _flange_targets(model, np.asarray(T_targets, dtype=float).reshape(-1, 4, 4))
+    M = Tf.shape[0]
+
+    # --- J1: azimut del punto de la herramienta (si está sobre el eje, el de la
+    # aproximación); la rama "detrás" gira π y alcanza por encima del eje ---
+    px, py = Tf[:, 0, 3], Tf[:, 1, 3]
+    r = np.hypot(px, py)
+    th1 = np.where(r > 1e-9, np.arctan2(py, px), np.arctan2(Tf[:, 1, 2], Tf[:, 0, 2]))
+    th1 = np.concatenate([th1, th1 + np.pi])                 # (2M,)
+    Tf = np.concatenate([Tf, Tf])
+    R, p = Tf[:, :3, :3], Tf[:, :3, 3]
+    c1, s1 = np.cos(th1), np.sin(th1)
+
+    # Pasar al marco 1: v1 = R01ᵀ (v - o1), R01 = Rz(θ1)·Rx(α1)
+    R01 = np.zeros((2 * M, 3, 3))
+    R01[:, 0, 0], R01[:, 0, 1], R01[:, 0, 2] = c1, -s1 * ca1, s1 * sa1
+    R01[:, 1, 0], R01[:, 1, 1], R01[:, 1, 2] = s1, c1 * ca1, -c1 * sa1
+    R01[:, 2, 1], R01[:, 2, 2] = sa1, ca1
+    o1 = np.stack([a1 * c1, a1 * s1, np.full(2 * M, d1)], axis=1)
+    R1 = np.einsum("mji,mjk->mik", R01, R)                   # R15 pedido
+    p1 = np.einsum("mji,mj->mi", R01, p - o1)
+
+    # --- Aproximación proyectada al plano del brazo (z1 = normal del plano) ---
+    ax, ay, az = R1[:, 0, 2], R1[:, 1, 2], R1[:, 2, 2]
+    orient_err = np.abs(np.arctan2(az, np.hypot(ax, ay)))[:M]
+    # Aproximación alcanzable: sen(α4)·(sen φ, −cos φ, 0) en el marco 1, φ = θ2+θ3+θ4
+    phi = np.arctan2(sa4 * ax, -sa4 * ay)
+    cp, sp = np.cos(phi), np.sin(phi)
+
+    # Giro final: Rz(ψ) ≈ Bᵀ·R15 con B = Rz(φ)·Rx(α4); B[:,0] = (cφ, sφ, 0), B[:,1] = (0, 0, sα4)
+    m00 = cp * R1[:, 0, 0] + sp * R1[:, 1, 0]
+    m01 = cp * R1[:, 0, 1] + sp * R1[:, 1, 1]
+    m10 = sa4 * R1[:, 2, 0]
+    m11 = sa4 * R1[:, 2, 1]
+    psi = np.arctan2(m10 - m01, m00 + m11)
+
+    # --- Centro de muñeca y codo planar 2R ---
+    wx = p1[:, 0] - d5 * sa4 * sp
+    wy = p1[:, 1] + d5 * sa4 * cp
+    D = (wx**2 + wy**2 - a2**2 - a3**2) / (2 * a2 * a3)
+    reach = np.abs(D) <= 1.0 + 1e-12
+    D = np.clip(D, -1.0, 1.0)
+    s3 = np.sqrt(1.0 - D**2)
+    th3 = np.arctan2(np.stack([s3, -s3], axis=1), D[:, None])          # (2M, 2)
+    th2 = np.arctan2(wy, wx)[:, None] - np.arctan2(a3 * np.sin(th3), a2 + a3 * np.cos(th3))
+
+    sols = np.empty((2 * M, 2, 5), dtype=float)
+    sols[:, :, 0] = th1[:, None]
+    sols[:, :, 1] = th2
+    sols[:, :, 2] = th3
+    sols[:, :, 3] = phi[:, None] - th2 - th3
+    sols[:, :, 4] = psi[:, None]
+    sols = np.mod(sols - th0 + np.pi, 2.0 * np.pi) - np.pi
+
+    # Codo arriba = codo más alto: z_codo = d1 + a2·sen(α1)·sen θ2
+    up_first = sa1 * np.sin(th2[:, 0]) >= sa1 * np.sin(th2[:, 1])
+    sols = np.where(up_first[:, None, None], sols, sols[:, ::-1])
+
+    sols = sols.reshape(2, M, 2, 5).transpose(1, 0, 2, 3).reshape(M, 4, 5)
+    reach = np.repeat(reach.reshape(2, M).T, 2, axis=1)
+    return sols, reach, orient_err
+
+def _rvm2_pose_scalar(model, T_target):
+    """
+    Misma forma cerrada que _rvm2_pose_closed_form para un único objetivo, con
+    escalares de math (sin la sobrecarga de numpy en arrays diminutos).
+    Retorna sols (4, 5), reach (4,) y orient_err.
+    """
+    dh = model.dh
+    a1, alpha1, d1 = float(dh[0, 0]), float(dh[0, 1]), float(dh[0, 2])
+    a2, a3, d5 = float(dh[1, 0]), float(dh[2, 0]), float(dh[4, 2])
+    ca1, sa1 = math.cos(alpha1), math.sin(alpha1)
+    sa4 = math.copysign(1.0, math.sin(float(dh[3, 1])))
+
+    Tf = _flange_targets(model, T_target).tolist()
+    (r00, r01, r02, px), (r10, r11, r12, py), (r20, r21, r22, pz) = Tf[:3]
+
+    th1 = math.atan2(py, px) if math.hypot(px, py) > 1e-9 else math.atan2(r12, r02)
+    orient_err = 0.0
+    sols, reach = [], []
+    for t1 in (th1, th1 + math.pi):
+        c1, s1 = math.cos(t1), math.sin(t1)
+        # Columnas de R01 = Rz(θ1)·Rx(α1) en el marco 0:
+        #   x1 = (c1, s1, 0), y1 = (-s1·cα1, c1·cα1, sα1), z1 = (s1·sα1, -c1·sα1, cα1)
+        # Proyecciones de u sobre ellas: u·x1, u·y1, u·z1
+        h = lambda u0, u1, u2: (c1 * u0 + s1 * u1,
+                                ca1 * (c1 * u1 - s1 * u0) + sa1 * u2,
+                                sa1 * (s1 * u0 - c1 * u1) + ca1 * u2)
+        xx, xy, xz = h(r00, r10, r20)         # eje x pedido en el marco 1
+        yx, yy, yz = h(r01, r11, r21)         # eje y
+        ax, ay, az = h(r02, r12, r22)         # aproximación
+        vx, vy, _ = h(px - a1 * c1, py - a1 * s1, pz - d1)
+
+        orient_err = abs(math.atan2(az, math.hypot(ax, ay)))
+        phi = math.atan2(sa4 * ax, -sa4 * ay)
+        cp, sp = math.cos(phi), math.sin(phi)
+
+        m00 = cp * xx + sp * xy
+        m01 = cp * yx + sp * yy
+        m10 = sa4 * xz
+        m11 = sa4 * yz
+        psi = math.atan2(m10 - m01, m00 + m11)
+
+        wx = vx - d5 * sa4 * sp
+        wy = vy + d5 * sa4 * cp
+        D = (wx * wx + wy * wy - a2 * a2 - a3 * a3) / (2.0 * a2 * a3)
+        ok = abs(D) <= 1.0 + 1e-12
+        D = min(max(D, -1.0), 1.0)
+        s3 = math.sqrt(1.0 - D * D)
+        pair = []
+        for t3 in (math.atan2(s3, D), math.atan2(-s3, D)):
+            t2 = math.atan2(wy, wx) - math.atan2(a3 * math.sin(t3), a2 + a3 * math.cos(t3))
+            pair.append((t1, t2, t3, phi - t2 - t3, psi))
+        if sa1 * math.sin(pair[0][1]) < sa1 * math.sin(pair[1][1]):
+            pair.reverse()
+        sols += pair
+        reach += [ok, ok]
+
+    sols = np.array(sols) - dh[:, 3]
+    sols = np.mod(sols + np.pi, 2.0 * np.pi) - np.pi
+    return sols, np.array(reach), orient_err
+
+def ik_rvm2_pose_batch(model, T_targets, ang_tol=1e-6):
+    """
+    IK de pose en forma cerrada para M marcos objetivo (M, 4, 4), respetando model.tool.
+    Retorna:
+      sols:  (M, 4, 5) soluciones en el orden de POSE_BRANCHES
+      valid: (M, 4) bool, pose exacta (posición alcanzable, orientación dentro
+             del subconjunto de 5 GDL con tolerancia ang_tol) y dentro de límites
+    Las filas sin rama válida llevan la orientación proyectada; se pueden
+    refinar con rvcore.ik.ik_pose_dls.
+    """
+    if not _rvm2_pose_structure_ok(model.dh):
+        raise ValueError("La IK de pose en forma cerrada requiere la estructura DH del RV-M2")
+    sols, reach, orient_err = _rvm2_pose_closed_form(model, T_targets)
+    valid = reach & (orient_err <= ang_tol)[:, None]
+    qmin = getattr(model.limits, "q_min", None)
+    qmax = getattr(model.limits, "q_max", None)
+    if qmin is not None and qmax is not None:
+        valid &= np.all((sols >= qmin) & (sols <= qmax), axis=2)
+    return sols, valid
+
+@timed("ik_pose")
+def ik_rvm2_pose(model, T_target, q_seed=None, branch=None, weights=POSE_WEIGHTS,
+                 tol=1e-3, ang_tol=1e-6, refine=True, max_iter=50):
+    """
+    IK de pose (4x4 base→tool) para el RV-M2.
+    - Forma cerrada para las orientaciones alcanzables con 5 GDL.
+    - Si la pose no es exacta (orientación fuera del plano del brazo, fuera de
+      alcance o de límites) y refine=True, mínimos cuadrados ponderados
+      (ik_pose_dls) arrancando de la mejor rama cerrada.
+    - branch: uno de POSE_BRANCHES, o "up"/"down" (solo el codo); None = cualquiera.
+      Entre las ramas permitidas se elige la válida más cercana a q_seed
+      (sin semilla, la primera válida).
+    Retorna IKResult (residual = |W·e| en mm equivalentes).
+    """
+    T_target = np.asarray(T_target, dtype=float)
+    if not _rvm2_pose_structure_ok(model.dh):
+        raise ValueError("La IK de pose en forma cerrada requiere la estructura DH del RV-M2")
+    sols, reach, orient_err = _rvm2_pose_scalar(model, T_target)
+    valid = reach & (orient_err <= ang_tol)
+    qmin = getattr(model.limits, "q_min", None)
+    qmax = getattr(model.limits, "q_max", None)
+    if qmin is not None and qmax is not None:
+        valid &= np.all((sols >= qmin) & (sols <= qmax), axis=1)
+
+    allowed = np.array([branch is None or b == branch or b.endswith("-" + str(branch))
+                        for b in POSE_BRANCHES])
+    if not allowed.any():
+        raise ValueError(f"Rama desconocida: {branch} (usar {POSE_BRANCHES}, 'up' o 'down')")
+    cost = np.zeros(4) if q_seed is None else np.linalg.norm(sols - np.asarray(q_seed, float), axis=1)
+    # Prioridad: válida y permitida, después permitida (se refina), y luego cercanía a la semilla
+    cost = cost + np.where(valid, 0.0, 1e6) + np.where(allowed, 0.0, 1e9)
+    k = int(np.argmin(cost))
+    q = sols[k]
+
+    if valid[k]:
+        # Rama exacta: posición y aproximación exactas por construcción; el único
+        # error es la elevación de la aproximación fuera del plano (<= ang_tol)
+        err = float(np.max(np.asarray(weights)[3:]) * orient_err)
+        return IKResult(q=q, iters=0, residual=err, converged=err <= tol)
+    if not refine:
+        T, _ = fk_dh(model, q)
+        err = float(np.linalg.norm(np.asarray(weights) * pose_error(T, T_target)))
+        return IKResult(q=q, iters=0, residual=err, converged=err <= tol)
+    if hasattr(model, "limits"):
+        q = np.clip(q, model.limits.q_min, model.limits.q_max)
+    return ik_pose_dls(model, T_target, q, weights=weights, tol=tol, max_iter=max_iter)
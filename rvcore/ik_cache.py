@@ -0,0 +1,215 @@
+# rvcore/ik_cache.py
+from collections import OrderedDict
+import itertools
+import numpy as np
+from rvcore.ik import IKResult, ee_position, ik_solve
+from rvcore.robot_model import model_fingerprint
+
+_NEIGHBORS = [o for o in itertools.product((-1, 0, 1), repeat=3) if any(o)]
+
+class IKCache:
+    """
+    Caché LRU de soluciones de IK indexada por el objetivo cuantizado.
+    - resolution: lado de la celda de posición [mm]; dos objetivos de la misma
+      celda pueden distar hasta resolution·√3, por eso cada acierto se comprueba
+      antes de devolverlo (FK en solve, objetivo guardado en analytic)
+    - ang_resolution: cuantización de la orientación opcional (3x3) [rad]
+    - branch: preferencia de rama del codo ("up"/"down"/None), forma parte de la clave
+    - maxsize: entradas máximas; se descarta la menos usada recientemente
+    Las soluciones analíticas y las de DLS se guardan con claves distintas.
+    Invalidación al cambiar el modelo: sustituir dh/base/tool/límites por arrays
+    nuevos se detecta en cada consulta; un cambio in situ (solo posible en
+    límites o en modelos sin build_chain, que deja dh/base/tool de solo lectura)
+    se detecta con la huella completa cada check_every consultas. Tras editar
+    in situ, llamar a clear() para no servir soluciones viejas mientras tanto.
+    """
+    def __init__(self, model, resolution=0.5, ang_resolution=np.deg2rad(0.5),
+                 maxsize=4096, check_every=256):
+        self.model = model
+        self.resolution = float(resolution)
+        self.ang_resolution = float(ang_resolution)
+        self.maxsize = int(maxsize)
+        self.check_every = int(check_every)
+        self._data = OrderedDict()
+        self._fingerprint = model_fingerprint(model)
+        self._model_ids = self._ids()
+        self._since_check = 0
+        self.hits = self.misses = self.seeds = self.evictions = self.invalidations = 0
+
+    # ==============================================================
+    # CLAVES E INVALIDACIÓN
+    # ==============================================================
+    def key(self, target, rot=None, branch=None, kind="dls"):
+        """Clave (solver, celda de posición, celda de orientación, rama); kind: "dls" o "analytic"."""
+        p = np.asarray(target, dtype=float)[:3]
+        kp = tuple(np.floor(p / self.resolution).astype(np.int64).tolist())
+        kr = None
+        if rot is not None:
+            R = np.asarray(rot, dtype=float)[:3, :3]
+            kr = tuple(np.rint(R.ravel() / self.ang_resolution).astype(np.int64).tolist())
+        return kind, kp, kr, branch
+
+    def _ids(self):
+        m = self.model
+        lim = getattr(m, "limits", None)
+        return (id(m.dh), id(m.base), id(m.tool), id(lim),
+                id(getattr(lim, "q_min", None)), id(getattr(lim, "q_max", None)))
+
+    def _check_model(self):
+        # Arrays sustituidos: se detecta en cada llamada (comparar ids es gratis).
+        # Cambios in situ: huella completa cada check_every consultas.
+        self._since_check += 1
+        ids = self._ids()
+        if ids == self._model_ids and self._since_check < self.check_every:
+            return
+        self._since_check = 0
+        self._model_ids = ids
+        fp = model_fingerprint(self.model)
+        if fp != self._fingerprint:
+            self._fingerprint = fp
+            self._data.clear()
+            self.invalidations += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    # ==============================================================
+    # CONSULTA / ALMACENAMIENTO
+    # ==============================================================
+    def get(self, target, rot=None, branch=None, kind="dls"):
+        """Lista de soluciones guardadas para la celda del objetivo (copias) o None."""
+        entry = self._lookup(self.key(target, rot, branch, kind))
+        return None if entry is None else [q.copy() for q in entry[0]]
+
+    def _lookup(self, k):
+        self._check_model()
+        entry = self._data.get(k)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(k)
+        self.hits += 1
+        return entry
+
+    def put(self, target, sols, rot=None, branch=None, kind="dls"):
+        """Guarda una solución (array) o una lista de soluciones para el objetivo (y el objetivo)."""
+        if isinstance(sols, np.ndarray) and sols.ndim == 1:
+            sols = [sols]
+        frozen = []
+        for q in sols:
+            q = np.array(q, dtype=float)
+            q.flags.writeable = False
+            frozen.append(q)
+        k = self.key(target, rot, branch, kind)
+        p = np.array(target, dtype=float)[:3]
+        p.flags.writeable = False
+        self._data[k] = (tuple(frozen), p)
+        self._data.move_to_end(k)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def seed(self, target, rot=None, branch=None):
+        """
+        Semilla de arranque en caliente para DLS: solución de la celda del objetivo
+        o, si no hay, de cualquiera de sus 26 vecinas. None si no hay nada cerca.
+        """
+        self._check_model()
+        kind, kp, kr, br = self.key(target, rot, branch)
+        for off in [(0, 0, 0)] + _NEIGHBORS:
+            k = (kind, tuple(a + o for a, o in zip(kp, off)), kr, br)
+            entry = self._data.get(k)
+            if entry is not None:
+                self._data.move_to_end(k)
+                self.seeds += 1
+                return entry[0][0].copy()
+        return None
+
+    # ==============================================================
+    # ENVOLTORIOS DE LOS SOLVERS
+    # ==============================================================
+    def analytic(self, target, branch=None, tol=1e-3):
+        """
+        Igual que model.ik_solver(model, target) pero memorizado.
+        branch="up"/"down" deja solo esa rama (si es válida; si no, [] y no se
+        guarda nada); None devuelve todas.
+        Un acierto solo se usa si se resolvió para un objetivo a menos de tol mm
+        de este; si no, se vuelve a resolver y se sustituye. (El solver analítico
+        no es exacto: su error cambia con el objetivo dentro de la celda, así que
+        una FK del acierto no dice cuánto peor es que resolver de nuevo.)
+        """
+        target = np.asarray(target, dtype=float)
+        entry = self._lookup(self.key(target, branch=branch, kind="analytic"))
+        if entry is not None:
+            sols, p0 = entry
+            if float(np.linalg.norm(target[:3] - p0)) <= tol:
+                return [q.copy() for q in sols]
+            self.hits -= 1                       # acierto descartado: cuenta como fallo
+            self.misses += 1
+        sols = self.model.ik_solver(self.model, target)
+        if branch is not None:
+            if len(sols) == 2:
+                sols = [sols[0] if branch == "up" else sols[1]]
+            else:
+                # Una sola rama sobrevivió a los límites: se reconoce por el signo del codo
+                sols = [q for q in sols if _on_branch(q, branch)]
+        if sols:
+            self.put(target, sols, branch=branch, kind="analytic")
+        return sols
+
+    def solve(self, target, q0, rot=None, branch=None, tol=1e-3, **kwargs):
+        """
+        ik_solve memorizado. Un acierto se comprueba con una FK: si el residuo
+        respecto al objetivo exacto supera tol, se usa como semilla de DLS.
+        Sin acierto se arranca desde la semilla vecina más próxima (o q0).
+        branch="up"/"down": si DLS converge en el otro codo se reintenta desde la
+        configuración reflejada; si tampoco, el resultado sale con converged=False.
+        Solo se guardan soluciones convergidas (y en la rama pedida).
+        """
+        target = np.asarray(target, dtype=float)
+        sols = self.get(target, rot, branch)
+        if sols is not None:
+            q = sols[0]
+            err = float(np.linalg.norm(target - ee_position(self.model, q)))
+            if err <= tol:
+                return IKResult(q=q, iters=0, residual=err, converged=True)
+            seed = q
+        else:
+            seed = self.seed(target, rot, branch)
+        res = ik_solve(self.model, target, q0 if seed is None else seed, tol=tol, **kwargs)
+        if not res.converged and seed is not None:
+            res = ik_solve(self.model, target, q0, tol=tol, **kwargs)
+        if branch is not None and res.converged and not _on_branch(res.q, branch):
+            res = ik_solve(self.model, target, _flip_elbow(self.model, res.q), tol=tol, **kwargs)
+            if not _on_branch(res.q, branch):
+                res = IKResult(q=res.q, iters=res.iters, residual=res.residual, converged=False)
+        if res.converged:
+            self.put(target, res.q, rot, branch)
+        return res
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return dict(hits=self.hits, misses=self.misses, seeds=self.seeds,
+                    hit_rate=self.hits / lookups if lookups else 0.0,
+                    size=len(self._data), maxsize=self.maxsize,
+                    evictions=self.evictions, invalidations=self.invalidations)
+
+def _on_branch(q, branch):
+    """Rama del codo por el signo de q3 (>= 0 arriba, <= 0 abajo; con q3 = 0 coinciden)."""
+    return q[2] >= 0.0 if branch == "up" else q[2] <= 0.0
+
+def _flip_elbow(model, q):
+    """
+    Configuración con el codo reflejado sobre la recta hombro-muñeca (mismo
+    punto de muñeca en el 2R planar a2/a3) y la misma inclinación q2+q3+q4.
+    """
+    a2, a3 = model.dh[1, 0], model.dh[2, 0]
+    q = np.array(q, dtype=float)
+    dq2 = 2.0 * np.arctan2(a3 * np.sin(q[2]), a2 + a3 * np.cos(q[2]))
+    q[1] += dq2
+    q[3] -= dq2 - 2.0 * q[2]
+    q[2] = -q[2]
+    return q
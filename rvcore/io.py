@@ -1,10 +1,16 @@
 # rvcore/io.py
 from __future__ import annotations
+import csv
+import hashlib
 import os
+import zipfile
 import numpy as np
-import pandas as pd
 from dataclasses import dataclass
 
+CSV_FILES = ("dh.csv", "base.csv", "tool.csv", "limits.csv")
+OPTIONAL_CSV_FILES = ("inertia.csv",)
+CACHE_VERSION = 2
+
 @dataclass
 class JointLimits:
     q_min: np.ndarray      # rad
@@ -12,6 +18,13 @@ class JointLimits:
     dq_max: np.ndarray     # rad/s
     ddq_max: np.ndarray    # rad/s^2
 
+@dataclass
+class LinkInertia:
+    mass: np.ndarray       # (n,) kg
+    com: np.ndarray        # (n,3) mm, centro de masas en el marco DH i del eslabón
+    inertia: np.ndarray    # (n,3,3) kg·mm², tensor respecto al centro de masas (ejes del marco i)
+    tau_max: np.ndarray = None   # (n,) N·m, par máximo por junta (opcional)
+
 @dataclass
 class RobotCsvBundle:
     name: str
@@ -19,40 +32,151 @@ class RobotCsvBundle:
     base: np.ndarray       # (4,4)
     tool: np.ndarray       # (4,4)
     limits: JointLimits
+    inertia: LinkInertia = None   # opcional (inertia.csv)
+
+# ---------- Lectura de CSV (módulo csv estándar, sin pandas) ----------
+def _read_csv_rows(path: str) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [[c.strip() for c in row] for row in csv.reader(f) if row and any(c.strip() for c in row)]
+
+def _to_float(cells, path: str) -> list:
+    try:
+        return [float(c) for c in cells]
+    except ValueError as e:
+        raise ValueError(f"Valor no numérico en {path}: {e}") from None
 
-# ---------- Lectura de CSV ----------
 def read_dh_csv(path: str) -> np.ndarray:
-    df = pd.read_csv(path)
+    rows = _read_csv_rows(path)
+    header, body = rows[0], rows[1:]
     required = ["a_mm", "alpha_deg", "d_mm", "theta0_deg"]
-    missing = [c for c in required if c not in df.columns]
+    missing = [c for c in required if c not in header]
     if missing:
         raise ValueError(f"Faltan columnas en dh.csv: {missing}")
-    dh = df[required].to_numpy(dtype=float)  # [a, alpha_deg, d, theta0_deg]
+    cols = [header.index(c) for c in required]
+    dh = np.array([_to_float([r[i] for i in cols], path) for r in body], dtype=float)  # [a, alpha_deg, d, theta0_deg]
     dh[:, 1] = np.deg2rad(dh[:, 1])  # alpha → rad
     dh[:, 3] = np.deg2rad(dh[:, 3])  # theta0 → rad
     return dh
 
 def read_matrix4_csv(path: str) -> np.ndarray:
-    M = pd.read_csv(path, header=None).to_numpy(dtype=float)
+    M = np.array([_to_float(r, path) for r in _read_csv_rows(path)], dtype=float)
     if M.shape != (4, 4):
         raise ValueError(f"Matriz en {path} debe ser 4x4, obtuve {M.shape}")
     return M
 
 def read_limits_wide_csv(path: str) -> JointLimits:
-    df = pd.read_csv(path)
-    if "type" not in df.columns:
+    rows = _read_csv_rows(path)
+    header, body = rows[0], rows[1:]
+    if "type" not in header:
         raise ValueError("limits.csv debe tener columna 'type'")
-    df = df.set_index("type")
+    it = header.index("type")
+    table = {r[it]: _to_float([c for i, c in enumerate(r) if i != it], path) for r in body}
+
+    def row(key):
+        if key not in table:
+            raise KeyError(key)
+        return np.deg2rad(np.array(table[key], dtype=float))
+
     # Convertir deg → rad (también vel y acel en deg/s y deg/s^2)
-    q_min = np.deg2rad(df.loc["q_min_deg"].to_numpy(dtype=float))
-    q_max = np.deg2rad(df.loc["q_max_deg"].to_numpy(dtype=float))
-    dq_max = np.deg2rad(df.loc["dq_max_deg_s"].to_numpy(dtype=float))
-    ddq_max = np.deg2rad(df.loc["ddq_max_deg_s2"].to_numpy(dtype=float))
-    return JointLimits(q_min=q_min, q_max=q_max, dq_max=dq_max, ddq_max=ddq_max)
-
-def load_robot_from_csv_dir(dirpath: str, name: str = "Robot (CSV)") -> RobotCsvBundle:
-    dh = read_dh_csv(os.path.join(dirpath, "dh.csv"))
-    base = read_matrix4_csv(os.path.join(dirpath, "base.csv"))
-    tool = read_matrix4_csv(os.path.join(dirpath, "tool.csv"))
-    limits = read_limits_wide_csv(os.path.join(dirpath, "limits.csv"))
-    return RobotCsvBundle(name=name, dh=dh, base=base, tool=tool, limits=limits)
+    return JointLimits(q_min=row("q_min_deg"), q_max=row("q_max_deg"),
+                       dq_max=row("dq_max_deg_s"), ddq_max=row("ddq_max_deg_s2"))
+
+def read_inertia_csv(path: str) -> LinkInertia:
+    """
+    inertia.csv (opcional): una fila por eslabón, en el orden de dh.csv.
+      mass_kg, cx_mm, cy_mm, cz_mm           masa y centro de masas en el marco DH i
+      ixx_kgmm2, iyy_kgmm2, izz_kgmm2        momentos respecto al centro de masas
+      ixy_kgmm2, ixz_kgmm2, iyz_kgmm2        productos (opcionales, 0 por defecto)
+      tau_max_Nm                             par máximo de la junta (opcional)
+    """
+    rows = _read_csv_rows(path)
+    header, body = rows[0], rows[1:]
+    required = ["mass_kg", "cx_mm", "cy_mm", "cz_mm", "ixx_kgmm2", "iyy_kgmm2", "izz_kgmm2"]
+    missing = [c for c in required if c not in header]
+    if missing:
+        raise ValueError(f"Faltan columnas en inertia.csv: {missing}")
+
+    def col(name, default=None):
+        if name not in header:
+            return None if default is None else np.full(len(body), default, dtype=float)
+        i = header.index(name)
+        return np.array(_to_float([r[i] for r in body], path), dtype=float)
+
+    ixx, iyy, izz = col("ixx_kgmm2"), col("iyy_kgmm2"), col("izz_kgmm2")
+    ixy, ixz, iyz = col("ixy_kgmm2", 0.0), col("ixz_kgmm2", 0.0), col("iyz_kgmm2", 0.0)
+    inertia = np.stack([np.stack([ixx, ixy, ixz], axis=1),
+                        np.stack([ixy, iyy, iyz], axis=1),
+                        np.stack([ixz, iyz, izz], axis=1)], axis=1)
+    com = np.stack([col("cx_mm"), col("cy_mm"), col("cz_mm")], axis=1)
+    return LinkInertia(mass=col("mass_kg"), com=com, inertia=inertia, tau_max=col("tau_max_Nm"))
+
+# ---------- Caché binaria del modelo ----------
+def model_cache_path(dirpath: str) -> str:
+    """Ruta de la caché: junto al directorio de CSV (config_csv → config_csv.cache.npz)."""
+    return os.path.normpath(str(dirpath)) + ".cache.npz"
+
+def _csv_digest(dirpath: str) -> str:
+    """Huella del contenido de los CSV (cambia si se edita cualquiera)."""
+    h = hashlib.sha1(f"v{CACHE_VERSION}".encode())
+    for fname in CSV_FILES + OPTIONAL_CSV_FILES:
+        path = os.path.join(dirpath, fname)
+        h.update(fname.encode())
+        if fname in OPTIONAL_CSV_FILES and not os.path.exists(path):
+            h.update(b"<ausente>")      # añadir o quitar el archivo invalida la caché
+            continue
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def _load_cache(path: str, digest: str):
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            if str(z["digest"]) != digest:
+                return None
+            return {k: z[k] for k in z.files if k != "digest"}
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        return None             # caché ausente, truncada o corrupta: releer los CSV
+
+def _save_cache(path: str, digest: str, arrays: dict) -> None:
+    tmp = path + ".tmp.npz"
+    try:
+        np.savez(tmp, digest=np.array(digest), **arrays)
+        os.replace(tmp, path)   # escritura atómica
+    except OSError:
+        # directorio de solo lectura o disco lleno: seguir sin caché
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+def load_robot_from_csv_dir(dirpath: str, name: str = "Robot (CSV)", use_cache: bool = True) -> RobotCsvBundle:
+    digest = _csv_digest(dirpath) if use_cache else None
+    cache = model_cache_path(dirpath)
+    arrays = _load_cache(cache, digest) if use_cache else None
+
+    if arrays is None:
+        limits = read_limits_wide_csv(os.path.join(dirpath, "limits.csv"))
+        arrays = dict(
+            dh=read_dh_csv(os.path.join(dirpath, "dh.csv")),
+            base=read_matrix4_csv(os.path.join(dirpath, "base.csv")),
+            tool=read_matrix4_csv(os.path.join(dirpath, "tool.csv")),
+            q_min=limits.q_min, q_max=limits.q_max,
+            dq_max=limits.dq_max, ddq_max=limits.ddq_max,
+        )
+        inertia_path = os.path.join(dirpath, "inertia.csv")
+        if os.path.exists(inertia_path):
+            inertia = read_inertia_csv(inertia_path)
+            arrays.update(mass=inertia.mass, com=inertia.com, inertia=inertia.inertia)
+            if inertia.tau_max is not None:
+                arrays["tau_max"] = inertia.tau_max
+        if use_cache:
+            _save_cache(cache, digest, arrays)
+
+    limits = JointLimits(q_min=arrays["q_min"], q_max=arrays["q_max"],
+                         dq_max=arrays["dq_max"], ddq_max=arrays["ddq_max"])
+    inertia = None
+    if "mass" in arrays:
+        inertia = LinkInertia(mass=arrays["mass"], com=arrays["com"], inertia=arrays["inertia"],
+                              tau_max=arrays.get("tau_max"))
+    return RobotCsvBundle(name=name, dh=arrays["dh"], base=arrays["base"],
+                          tool=arrays["tool"], limits=limits, inertia=inertia)
@@ -1,5 +1,8 @@
 # rvcore/kinematics.py
+import math
+import threading
 import numpy as np
+from rvcore.profiling import timed
 
 def _A(a, alpha, d, theta):
     ca, sa = np.cos(alpha), np.sin(alpha)
@@ -11,6 +14,147 @@ def _A(a, alpha, d, theta):
         [0.0,   0.0,   0.0,  1.0]
     ], dtype=float)
 
+def _A_batch(a, alpha, d, theta):
+    """
+    Versión apilada de _A: theta con forma (M,) → (M, 4, 4).
+    a, alpha, d son escalares del eslabón.
+    """
+    ca, sa = np.cos(alpha), np.sin(alpha)
+    ct, st = np.cos(theta), np.sin(theta)
+    A = np.zeros(theta.shape + (4, 4), dtype=float)
+    A[:, 0, 0] = ct
+    A[:, 0, 1] = -st*ca
+    A[:, 0, 2] = st*sa
+    A[:, 0, 3] = a*ct
+    A[:, 1, 0] = st
+    A[:, 1, 1] = ct*ca
+    A[:, 1, 2] = -ct*sa
+    A[:, 1, 3] = a*st
+    A[:, 2, 1] = sa
+    A[:, 2, 2] = ca
+    A[:, 2, 3] = d
+    A[:, 3, 3] = 1.0
+    return A
+
+class DHChain:
+    """
+    Cadena cinemática DH precompilada.
+    Guarda los términos constantes de cada eslabón (a, d, theta0, cos/sin(alpha)),
+    copias de base/tool y buffers de trabajo reutilizables, de modo que
+    fk_into() no reserva memoria en cada llamada. Los buffers son por hilo
+    (threading.local): la misma cadena se puede usar desde la GUI y desde el
+    hilo de simulación a la vez.
+    Guarda también qué arrays dh/base/tool la generaron (built_from): ver model_chain.
+    """
+    def __init__(self, dh, base, tool):
+        self._src = (dh, base, tool)
+        dh = np.asarray(dh, dtype=float)
+        self.dof = dh.shape[0]
+        # Escalares Python: más baratos que indexar arrays dentro del bucle
+        self.a = dh[:,0].tolist()
+        self.d = dh[:,2].tolist()
+        self.theta0 = dh[:,3].tolist()
+        self.ca = np.cos(dh[:,1]).tolist()
+        self.sa = np.sin(dh[:,1]).tolist()
+        self.base = np.array(base, dtype=float)
+        self.tool = np.array(tool, dtype=float)
+        self.base_inv = np.linalg.inv(self.base)
+        self.tool_inv = np.linalg.inv(self.tool)
+
+        # Buffers de trabajo (uno por hilo, se crean en el primer uso)
+        self._local = threading.local()
+
+    def built_from(self, model):
+        """True si la cadena se compiló con los arrays dh/base/tool actuales del modelo."""
+        dh, base, tool = self._src
+        return dh is model.dh and base is model.base and tool is model.tool
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _buffers(self):
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            A = np.zeros((4, 4), dtype=float)
+            A[3, 3] = 1.0
+            buf = self._local.buf = (A, A.reshape(-1)[:12], np.empty((2, 4, 4), dtype=float))
+        return buf
+
+    def fk_into(self, q, out_T, out_joints=None):
+        """
+        FK sin reservas de memoria.
+          q: (n,) ángulos [rad]
+          out_T: (4,4) recibe base→tool
+          out_joints: (n+2, 3) opcional, recibe base, juntas y punta [mm]
+        Devuelve out_T.
+        """
+        A, A_top, TT = self._buffers()
+        T, tmp = TT[0], TT[1]
+        T[...] = self.base
+        if out_joints is not None:
+            out_joints[0] = T[:3,3]
+
+        for i in range(self.dof):
+            theta = self.theta0[i] + q[i]
+            ct, st = math.cos(theta), math.sin(theta)
+            ca, sa, a = self.ca[i], self.sa[i], self.a[i]
+            # Filas 0..2 de _A en una sola asignación (la fila 3 es constante)
+            A_top[:] = (ct, -st*ca,  st*sa, a*ct,
+                        st,  ct*ca, -ct*sa, a*st,
+                        0.0,    sa,     ca, self.d[i])
+            np.dot(T, A, out=tmp)
+            T, tmp = tmp, T
+            if out_joints is not None:
+                out_joints[i+1] = T[:3,3]
+
+        np.dot(T, self.tool, out=out_T)
+        if out_joints is not None:
+            out_joints[-1] = out_T[:3,3]  # tool tip
+        return out_T
+
+    def frames_into(self, q, out_frames):
+        """
+        Igual que fk_into pero guarda todos los marcos intermedios.
+          out_frames: (n+2, 4, 4) → [base, marco_1..marco_n, tool]
+        """
+        A, A_top, _ = self._buffers()
+        out_frames[0] = self.base
+        for i in range(self.dof):
+            theta = self.theta0[i] + q[i]
+            ct, st = math.cos(theta), math.sin(theta)
+            ca, sa, a = self.ca[i], self.sa[i], self.a[i]
+            A_top[:] = (ct, -st*ca,  st*sa, a*ct,
+                        st,  ct*ca, -ct*sa, a*st,
+                        0.0,    sa,     ca, self.d[i])
+            np.dot(out_frames[i], A, out=out_frames[i+1])
+        np.dot(out_frames[self.dof], self.tool, out=out_frames[-1])
+        return out_frames
+
+def build_chain(model):
+    """
+    Compila (o recompila) la cadena DH de un modelo. dh/base/tool quedan de solo
+    lectura: para cambiar la geometría se asigna un array nuevo (model.dh = ...)
+    y model_chain recompila la cadena en la siguiente llamada.
+    """
+    for arr in (model.dh, model.base, model.tool):
+        if isinstance(arr, np.ndarray):
+            arr.flags.writeable = False
+    return DHChain(model.dh, model.base, model.tool)
+
+def model_chain(model):
+    """Cadena precompilada del modelo al día (None si no tiene); se recompila si dh/base/tool se sustituyeron."""
+    chain = getattr(model, "chain", None)
+    if chain is not None and not chain.built_from(model):
+        chain = model.chain = build_chain(model)
+    return chain
+
+@timed("fk_dh")
 def fk_dh(model, q):
     """
     Devuelve:
@@ -20,6 +164,14 @@ def fk_dh(model, q):
     q = np.asarray(q, dtype=float)
     assert q.size == model.dof
 
+    # Camino rápido: cadena precompilada (constantes DH ya cacheadas)
+    chain = model_chain(model)
+    if chain is not None:
+        T = np.empty((4, 4), dtype=float)
+        joints = np.empty((model.dof + 2, 3), dtype=float)
+        chain.fk_into(q, T, joints)
+        return T, joints
+
     a, alpha, d, theta0 = model.dh[:,0], model.dh[:,1], model.dh[:,2], model.dh[:,3]
     thetas = theta0 + q
 
@@ -33,3 +185,75 @@ def fk_dh(model, q):
     T = T @ model.tool
     joints.append(T[:3,3].copy())  # tool tip
     return T, np.vstack(joints)
+
+def fk_dh_batch(model, Q, return_joints=False):
+    """
+    FK vectorizada para M configuraciones a la vez.
+      Q: (M, n) ángulos articulares [rad]
+    Devuelve:
+      T0e: (M, 4, 4) matrices base→tool
+      joints (si return_joints): (M, n+2, 3) posiciones de base, juntas y tool [mm]
+    Mismo orden de productos que fk_dh, sin bucle Python sobre las muestras.
+    """
+    Q = np.atleast_2d(np.asarray(Q, dtype=float))
+    assert Q.shape[1] == model.dof
+    M = Q.shape[0]
+
+    a, alpha, d, theta0 = model.dh[:,0], model.dh[:,1], model.dh[:,2], model.dh[:,3]
+    thetas = theta0 + Q  # (M, n)
+
+    T = np.broadcast_to(model.base, (M, 4, 4)).copy()
+    if return_joints:
+        joints = np.empty((M, model.dof + 2, 3), dtype=float)
+        joints[:, 0] = T[:, :3, 3]  # base
+
+    for i in range(model.dof):
+        T = np.matmul(T, _A_batch(a[i], alpha[i], d[i], thetas[:, i]))
+        if return_joints:
+            joints[:, i + 1] = T[:, :3, 3]
+
+    T = np.matmul(T, model.tool)
+    if return_joints:
+        joints[:, -1] = T[:, :3, 3]  # tool tip
+        return T, joints
+    return T
+
+def fk_frames(model, q):
+    """
+    Marcos de toda la cadena para una configuración:
+      (n+2, 4, 4) → [base, marco_1..marco_n, tool]
+    """
+    q = np.asarray(q, dtype=float)
+    assert q.size == model.dof
+
+    F = np.empty((model.dof + 2, 4, 4), dtype=float)
+    chain = model_chain(model)
+    if chain is not None:
+        return chain.frames_into(q, F)
+
+    a, alpha, d, theta0 = model.dh[:,0], model.dh[:,1], model.dh[:,2], model.dh[:,3]
+    thetas = theta0 + q
+    F[0] = model.base
+    for i in range(model.dof):
+        F[i+1] = F[i] @ _A(a[i], alpha[i], d[i], thetas[i])
+    F[-1] = F[model.dof] @ model.tool
+    return F
+
+def fk_frames_batch(model, Q):
+    """
+    Versión vectorizada de fk_frames:
+      Q: (M, n) → (M, n+2, 4, 4)
+    """
+    Q = np.atleast_2d(np.asarray(Q, dtype=float))
+    assert Q.shape[1] == model.dof
+    M = Q.shape[0]
+
+    a, alpha, d, theta0 = model.dh[:,0], model.dh[:,1], model.dh[:,2], model.dh[:,3]
+    thetas = theta0 + Q
+
+    F = np.empty((M, model.dof + 2, 4, 4), dtype=float)
+    F[:, 0] = model.base
+    for i in range(model.dof):
+        np.matmul(F[:, i], _A_batch(a[i], alpha[i], d[i], thetas[:, i]), out=F[:, i+1])
+    np.matmul(F[:, model.dof], model.tool, out=F[:, -1])
+    return F
@@ -0,0 +1,201 @@
+# rvcore/profiling.py
+"""
+Instrumentación ligera de rutas críticas.
+Desactivada por defecto: cada punto instrumentado solo comprueba una bandera.
+  profiling.enable()
+  ... usar el simulador ...
+  profiling.stats()            # dict con calls/s, media y máximo por sonda
+  profiling.export_json(path)  # volcado a archivo
+  profiling.serve(9100)        # http://127.0.0.1:9100/metrics (texto Prometheus) y /stats.json
+"""
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+WINDOW_S = 5.0          # ventana de las estadísticas móviles
+MAX_SAMPLES = 8192      # muestras guardadas por sonda
+
+class _State:
+    enabled = False
+
+_state = _State()
+_probes = {}
+_gauges = {}
+_lock = threading.Lock()
+
+class Probe:
+    """Serie temporal acotada de (instante de fin, duración) de una sonda."""
+    def __init__(self, name):
+        self.name = name
+        self.samples = deque(maxlen=MAX_SAMPLES)
+        self.count = 0
+        self.t_first = None
+
+    def add(self, t_end, dt):
+        if self.t_first is None:
+            self.t_first = t_end - dt
+        self.samples.append((t_end, dt))
+        self.count += 1
+
+    def stats(self, now, window=WINDOW_S):
+        recent = [dt for t, dt in list(self.samples) if t >= now - window]
+        if not recent:
+            return dict(calls_per_s=0.0, mean_ms=0.0, max_ms=0.0, count=self.count)
+        span = min(window, max(now - self.t_first, 1e-9))  # al arrancar la ventana aún no está llena
+        return dict(calls_per_s=len(recent) / span,
+                    mean_ms=1e3 * sum(recent) / len(recent),
+                    max_ms=1e3 * max(recent),
+                    count=self.count)
+
+def get_probe(name):
+    p = _probes.get(name)
+    if p is None:
+        with _lock:
+            p = _probes.setdefault(name, Probe(name))
+    return p
+
+def enable(flag=True):
+    _state.enabled = bool(flag)
+
+def is_enabled():
+    return _state.enabled
+
+def reset():
+    """Vacía las muestras (las sondas siguen enlazadas a sus decoradores)."""
+    with _lock:
+        for p in _probes.values():
+            p.samples.clear()
+            p.count = 0
+            p.t_first = None
+        _gauges.clear()
+
+# ==============================================================
+# PUNTOS DE MEDIDA
+# ==============================================================
+def timed(name):
+    """Decorador: cronometra cada llamada a la función cuando la instrumentación está activa."""
+    def deco(fn):
+        probe = get_probe(name)
+        clock = time.perf_counter
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            t0 = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                t1 = clock()
+                probe.add(t1, t1 - t0)
+        return wrapper
+    return deco
+
+class _Span:
+    __slots__ = ("probe", "t0")
+
+    def __init__(self, probe):
+        self.probe = probe
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        t1 = time.perf_counter()
+        self.probe.add(t1, t1 - self.t0)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullSpan()
+
+def span(name):
+    """Context manager para cronometrar un bloque (no hace nada si está desactivada)."""
+    if not _state.enabled:
+        return _NULL
+    return _Span(get_probe(name))
+
+def gauge(name, value):
+    """Registra el último valor de una magnitud (p.ej. residuo de IK) con su máximo en la ventana."""
+    if not _state.enabled:
+        return
+    g = _gauges.get(name)
+    if g is None:
+        with _lock:
+            g = _gauges.setdefault(name, deque(maxlen=MAX_SAMPLES))
+    g.append((time.perf_counter(), float(value)))
+
+# ==============================================================
+# EXPORTACIÓN
+# ==============================================================
+def stats(window=WINDOW_S):
+    now = time.perf_counter()
+    out = {name: p.stats(now, window) for name, p in list(_probes.items()) if p.count}
+    for name, g in list(_gauges.items()):
+        vals = [v for t, v in list(g) if t >= now - window]
+        if g:
+            out[name] = dict(last=g[-1][1], max=max(vals) if vals else g[-1][1])
+    return out
+
+def format_stats(window=WINDOW_S):
+    """Texto compacto para paneles: una línea por sonda."""
+    lines = []
+    for name, s in sorted(stats(window).items()):
+        if "calls_per_s" in s:
+            lines.append(f"{name:18s} {s['calls_per_s']:7.1f}/s {s['mean_ms']:7.3f} ms (máx {s['max_ms']:.2f})")
+        else:
+            lines.append(f"{name:18s} {s['last']:10.3f} (máx {s['max']:.3f})")
+    return "\n".join(lines)
+
+def export_json(path, window=WINDOW_S):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(time=time.time(), window_s=window, stats=stats(window)), f, indent=2)
+
+def _prometheus(window=WINDOW_S):
+    lines = []
+    for name, s in sorted(stats(window).items()):
+        metric = "rv_" + "".join(c if c.isalnum() else "_" for c in name)
+        for key, val in s.items():
+            lines.append(f"{metric}_{key} {val}")
+    return "\n".join(lines) + "\n"
+
+def serve(port=9100, host="127.0.0.1"):
+    """
+    Expone las métricas por HTTP local en un hilo demonio:
+      /metrics    texto estilo Prometheus
+      /stats.json JSON
+    Retorna el servidor (llamar shutdown() para pararlo).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics"):
+                body, ctype = _prometheus().encode(), "text/plain; version=0.0.4"
+            elif self.path.startswith("/stats.json"):
+                body, ctype = json.dumps(stats()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="rv-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,132 @@
+# rvcore/realtime.py
+import threading
+import time
+from collections import deque
+
+class FixedRateLoop:
+    """
+    Planificador de tasa fija con compensación de deriva.
+    Los plazos se calculan como t0 + k·dt (no "ahora + dt"), así el coste de
+    cada iteración no se acumula. Si el retraso supera max_lag periodos se
+    re-sincroniza en lugar de encadenar iteraciones para recuperar.
+    """
+    def __init__(self, dt, max_lag=5):
+        self.dt = float(dt)
+        self.max_lag = int(max_lag)
+        self.overruns = 0            # iteraciones que no llegaron a su plazo
+        self.resyncs = 0
+        self._periods = deque(maxlen=64)
+        self._next = None
+        self._last = None
+
+    def reset(self):
+        self._next = None
+        self._last = None
+        self._periods.clear()
+
+    def wait(self, stop_event=None):
+        """Espera al siguiente plazo. Retorna False si stop_event se activó."""
+        if stop_event is not None and stop_event.is_set():
+            return False                 # también con retraso, sin esperar
+        now = time.perf_counter()
+        if self._next is None:
+            self._next = now
+        self._next += self.dt
+
+        delay = self._next - now
+        if delay < 0.0:
+            self.overruns += 1
+            if -delay > self.max_lag * self.dt:
+                self.resyncs += 1
+                self._next = now
+        elif stop_event is not None:
+            if stop_event.wait(delay):
+                return False
+        else:
+            time.sleep(delay)
+
+        now = time.perf_counter()
+        if self._last is not None:
+            self._periods.append(now - self._last)
+        self._last = now
+        return True
+
+    @property
+    def rate_hz(self):
+        """Tasa real media de las últimas iteraciones."""
+        if not self._periods:
+            return 0.0
+        return len(self._periods) / sum(self._periods)
+
+class SimulationThread:
+    """
+    Ejecuta Simulator.step() en un hilo de trabajo a tasa fija (sim.dt).
+    Los lectores usan sim.state (foto inmutable) sin bloquear el lazo.
+    Operaciones que tocan el estado completo (p.ej. home) se encolan con call()
+    y se ejecutan entre pasos, en el mismo hilo de trabajo.
+    before_step / after_step: funciones que se llaman en cada tick desde el hilo
+    de trabajo, antes de step() y después con la foto publicada (fn(sim.state)).
+    """
+    def __init__(self, sim, max_lag=5):
+        self.sim = sim
+        self.loop = FixedRateLoop(sim.dt, max_lag=max_lag)
+        self.step_ms = 0.0                   # coste medio por paso (media móvil)
+        self._pending = deque()
+        self.before_step = []
+        self.after_step = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            if not self._stop.is_set():
+                return
+            self._thread.join()              # terminando tras un stop() con timeout agotado
+        self._stop.clear()
+        self.loop.reset()
+        self._thread = threading.Thread(target=self._run, name="rv-sim", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Pide parar y espera hasta timeout s. Retorna False si el hilo sigue en
+        un paso: entonces no se toca la cola (la vacía el propio hilo al salir).
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+        self._drain()
+        return True
+
+    def call(self, fn, *args):
+        """Ejecuta fn(*args) en el hilo de simulación antes del próximo paso (o ya, si está parado)."""
+        if self.running:
+            self._pending.append((fn, args))
+            if not self.running:
+                self._drain()            # el hilo salió mientras se encolaba: su último _drain pudo no verlo
+        else:
+            fn(*args)
+
+    def _drain(self):
+        while self._pending:
+            fn, args = self._pending.popleft()
+            fn(*args)
+
+    def _run(self):
+        while self.loop.wait(self._stop):
+            self._drain()
+            for fn in self.before_step:
+                fn()
+            t0 = time.perf_counter()
+            self.sim.step()
+            self.step_ms += 0.1 * ((time.perf_counter() - t0) * 1000.0 - self.step_ms)
+            for fn in self.after_step:
+                fn(self.sim.state)
+        self._drain()
@@ -0,0 +1,167 @@
+# rvcore/recording.py
+import json
+import os
+import time
+import numpy as np
+from rvcore.kinematics import fk_dh
+
+MODE_DLS = 0
+MODE_ANALYTIC = 1
+
+META_FILE = "meta.json"
+LOG_VERSION = 1
+
+def record_dtype(dof):
+    """Registro binario de un frame (tamaño fijo → acceso O(1) por índice)."""
+    return np.dtype([
+        ("t", "f8"),                # s
+        ("q", "f8", (dof,)),        # rad
+        ("T", "f8", (4, 4)),        # pose base→tool
+        ("dx", "f8", (3,)),         # incremento cartesiano comandado [mm]
+        ("mode", "u1"),             # MODE_DLS / MODE_ANALYTIC
+        ("residual", "f8"),         # |ee_target - ee| [mm]
+    ])
+
+def _chunk_path(path, k):
+    return os.path.join(path, f"chunk_{k:06d}.bin")
+
+class TrajectoryRecorder:
+    """
+    Grabación en un directorio de bloques binarios mapeados en memoria.
+    Cada bloque se reserva completo (chunk_frames registros); al llenarse se abre
+    el siguiente, así una sesión larga no acumula listas de Python.
+    El número de frames válidos se guarda en meta.json (flush/close).
+    """
+    def __init__(self, path, dof, chunk_frames=65536, flush_every=1024):
+        self.path = str(path)
+        self.dof = int(dof)
+        self.chunk_frames = int(chunk_frames)
+        self.flush_every = int(flush_every)
+        self.dtype = record_dtype(self.dof)
+        self.frames = 0
+        self._chunk = None
+        self._chunk_id = -1
+        os.makedirs(self.path, exist_ok=True)
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = dict(version=LOG_VERSION, dof=self.dof, chunk_frames=self.chunk_frames,
+                    frames=self.frames)
+        tmp = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    def _open_chunk(self, k):
+        if self._chunk is not None:
+            self._chunk.flush()
+        self._chunk = np.memmap(_chunk_path(self.path, k), dtype=self.dtype, mode="w+",
+                                shape=(self.chunk_frames,))
+        self._chunk_id = k
+
+    def append(self, t, q, T, dx, mode, residual):
+        k, row = divmod(self.frames, self.chunk_frames)
+        if k != self._chunk_id:
+            self._open_chunk(k)
+        rec = self._chunk[row]
+        rec["t"] = t
+        rec["q"] = q
+        rec["T"] = T
+        rec["dx"] = dx
+        rec["mode"] = mode
+        rec["residual"] = residual
+        self.frames += 1
+        if self.frames % self.flush_every == 0:
+            self.flush()
+
+    def record(self, sim):
+        """Añade el estado actual de un Simulator (tras step())."""
+        mode = MODE_ANALYTIC if sim.use_analytic_ik else MODE_DLS
+        self.append(sim.t, sim.q, sim.T, sim.last_dx, mode, sim.residual)
+
+    def flush(self):
+        if self._chunk is not None:
+            self._chunk.flush()
+        self._write_meta()
+
+    def close(self):
+        self.flush()
+        self._chunk = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TrajectoryLog:
+    """
+    Lectura de una grabación. Frame k está en el bloque k // chunk_frames, fila
+    k % chunk_frames: el salto a cualquier frame es inmediato. Para buscar por
+    tiempo se indexa el primer instante de cada bloque.
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        with open(os.path.join(self.path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dof = int(meta["dof"])
+        self.chunk_frames = int(meta["chunk_frames"])
+        self.frames = int(meta["frames"])
+        self.dtype = record_dtype(self.dof)
+        nchunks = -(-self.frames // self.chunk_frames)
+        self._chunks = [np.memmap(_chunk_path(self.path, k), dtype=self.dtype, mode="r",
+                                  shape=(self.chunk_frames,)) for k in range(nchunks)]
+        self._chunk_t0 = np.array([c["t"][0] for c in self._chunks])
+
+    def __len__(self):
+        return self.frames
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += self.frames
+        if not 0 <= k < self.frames:
+            raise IndexError(k)
+        c, row = divmod(k, self.chunk_frames)
+        return self._chunks[c][row]
+
+    def read(self, start=0, stop=None):
+        """Copia contigua de los frames [start, stop) aunque crucen bloques."""
+        stop = self.frames if stop is None else min(stop, self.frames)
+        out = np.empty(max(stop - start, 0), dtype=self.dtype)
+        k = start
+        while k < stop:
+            c, row = divmod(k, self.chunk_frames)
+            n = min(self.chunk_frames - row, stop - k)
+            out[k - start:k - start + n] = self._chunks[c][row:row + n]
+            k += n
+        return out
+
+    def seek_time(self, t):
+        """Índice del último frame con instante <= t (el primero si t es anterior; -1 si no hay frames)."""
+        if self.frames == 0:
+            return -1
+        c = max(int(np.searchsorted(self._chunk_t0, t, side="right")) - 1, 0)
+        n = min(self.chunk_frames, self.frames - c * self.chunk_frames)
+        row = int(np.searchsorted(self._chunks[c]["t"][:n], t, side="right")) - 1
+        return max(c * self.chunk_frames + row, 0)
+
+    def replay(self, model=None, speed=1.0, start=0, stop=None, realtime=True):
+        """
+        Genera (registro, joints) desde el frame start. Si se da un modelo,
+        las posiciones de juntas se recalculan con fk_dh para el renderizador.
+        realtime=True respeta los instantes grabados escalados por speed;
+        False entrega los frames tan rápido como se consuman.
+        """
+        stop = self.frames if stop is None else min(stop, self.frames)
+        wall0 = time.perf_counter()
+        t_rec0 = None
+        for k in range(start, stop):
+            rec = self[k]
+            if realtime:
+                if t_rec0 is None:
+                    t_rec0 = float(rec["t"])
+                delay = (float(rec["t"]) - t_rec0) / speed - (time.perf_counter() - wall0)
+                if delay > 0:
+                    time.sleep(delay)
+            joints = fk_dh(model, rec["q"])[1] if model is not None else None
+            yield rec, joints
@@ -1,8 +1,10 @@
 # rvcore/robot_model.py
 from dataclasses import dataclass
+import hashlib
 import numpy as np
-from rvcore.io import RobotCsvBundle, JointLimits
-from rvcore.ik_analytic import ik_rvm2_position
+from rvcore.io import RobotCsvBundle, JointLimits, LinkInertia
+from rvcore.ik_analytic import ik_rvm2_position, ik_rvm2_pose
+from rvcore.kinematics import DHChain, build_chain
 
 @dataclass
 class RobotModel:
@@ -13,6 +15,9 @@ class RobotModel:
     tool: np.ndarray
     limits: JointLimits
     ik_solver: callable = None  # Campo opcional
+    pose_ik_solver: callable = None  # IK de pose 4x4 (opcional)
+    chain: DHChain = None       # Cadena DH precompilada (ver build_chain)
+    inertia: LinkInertia = None # Masas e inercias (opcional, para rvcore.dynamics)
 
 def from_csv_bundle(bundle: RobotCsvBundle) -> RobotModel:
     """Convierte un paquete CSV en un modelo de robot utilizable."""
@@ -25,11 +30,29 @@ def from_csv_bundle(bundle: RobotCsvBundle) -> RobotModel:
         dh=bundle.dh,
         base=bundle.base,
         tool=bundle.tool,
-        limits=limits
+        limits=limits,
+        inertia=getattr(bundle, "inertia", None)
     )
 
+    # --- Precompilar la cadena DH (constantes + buffers); dh/base/tool quedan de solo lectura ---
+    model.chain = build_chain(model)
+
     # --- Asignar solver analítico si es RV-M2 ---
     if "RV-M2" in bundle.name.upper():
         model.ik_solver = ik_rvm2_position
+        model.pose_ik_solver = ik_rvm2_pose
 
     return model
+
+def model_fingerprint(model) -> str:
+    """Huella de dh/base/tool/límites: sirve de clave para cachés derivadas del modelo."""
+    h = hashlib.sha1()
+    arrays = [model.dh, model.base, model.tool]
+    limits = getattr(model, "limits", None)
+    if limits is not None:
+        arrays += [limits.q_min, limits.q_max, limits.dq_max, limits.ddq_max]
+    for a in arrays:
+        a = np.ascontiguousarray(a, dtype=float)
+        h.update(str(a.shape).encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
@@ -0,0 +1,378 @@
+# rvcore/sequencing.py
+"""
+Optimización del orden de visita de listas de puntos pick/place (tiempo de ciclo).
+
+El coste entre dos puntos es el tiempo de viaje articular punto a punto con los
+límites dq_max/ddq_max (misma temporización que plan_joint_trajectory), así el
+tiempo de ciclo previsto coincide con la duración de la trayectoria planificada.
+La búsqueda es local (2-opt + or-opt con listas de vecinos) iterada con
+perturbaciones double-bridge, repartida en un pool de procesos que comparten la
+matriz de costes por memoria compartida.
+"""
+import os
+import time
+from dataclasses import dataclass
+from multiprocessing import Pool, shared_memory
+import numpy as np
+
+from rvcore.ik_analytic import ik_rvm2_position_batch
+from rvcore.kinematics import fk_dh_batch
+from rvcore.trajectory import PROFILES, segment_duration, segment_timing
+
+EPS = 1e-6              # ganancia mínima aceptada [s] (la matriz es float32)
+BRIDGE_SPAN = 50        # longitud máxima de los tramos que intercambia el double-bridge
+BLOCK_ELEMS = 1_000_000 # elementos (filas·columnas) por bloque de la matriz de costes
+
+@dataclass
+class SequenceResult:
+    order: np.ndarray         # (N,) índices de los puntos en orden de visita
+    q: np.ndarray             # (N, n) configuraciones articulares en orden de visita [rad]
+    q_path: np.ndarray        # (K, n) waypoints para plan_joint_trajectory (inicio, puntos y regreso)
+    cycle_before: float       # tiempo de ciclo previsto con el orden original [s]
+    cycle_after: float        # tiempo de ciclo previsto con el orden optimizado [s]
+    dwell: float              # espera por punto incluida en los ciclos [s]
+    elapsed: float            # tiempo de optimización [s]
+
+    @property
+    def improvement(self):
+        """Reducción relativa del tiempo de ciclo (0.25 = 25 % más rápido)."""
+        return 1.0 - self.cycle_after / self.cycle_before if self.cycle_before > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.order.size} puntos: ciclo {self.cycle_before:.3f} s -> {self.cycle_after:.3f} s "
+                f"({100.0 * self.improvement:.1f} % menos, optimizado en {self.elapsed:.2f} s)")
+
+# ==============================================================
+# CONFIGURACIONES Y MATRIZ DE COSTES
+# ==============================================================
+def pick_configs(model, points, branch=None, tol=1e-3):
+    """
+    Configuración articular de cada punto con ik_rvm2_position_batch.
+    branch: "up"/"down" fija la rama del codo; None toma la primera válida
+    (codo arriba si ambas lo son). Cada configuración se comprueba con una FK:
+    lanza ValueError si algún punto no tiene rama dentro de límites que llegue
+    a menos de tol mm.
+    """
+    P = np.atleast_2d(np.asarray(points, dtype=float))
+    sols, ok = ik_rvm2_position_batch(model, P, tol=tol)
+    if branch is None:
+        col = np.where(ok[:, 0] | ~ok[:, 1], 0, 1)
+    elif branch in ("up", "down"):
+        col = np.full(P.shape[0], 0 if branch == "up" else 1)
+    else:
+        raise ValueError(f"Rama desconocida: {branch} (usar 'up', 'down' o None)")
+    rows = np.arange(P.shape[0])
+    Q = sols[rows, col]
+    err = np.linalg.norm(fk_dh_batch(model, Q)[:, :3, 3] - P, axis=1)
+    bad = np.flatnonzero(~ok[rows, col] | ~(err <= tol))
+    if bad.size:
+        raise ValueError(f"{bad.size} puntos sin solución que los alcance dentro de límites "
+                         f"(p. ej. índices {bad[:10].tolist()})")
+    return Q
+
+def travel_time_matrix(model, Q, profile="trapezoid", vel_scale=1.0, acc_scale=1.0, dtype=np.float32):
+    """
+    Matriz (M, M) de tiempos de viaje punto a punto entre las configuraciones Q (M, n).
+    Se construye por bloques de filas para acotar la memoria temporal; en float32
+    ocupa 4·M² bytes (100 MB para 5000 puntos).
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil desconocido: {profile} (usar {list(PROFILES)})")
+    Q = np.atleast_2d(np.asarray(Q, dtype=float))
+    M, n = Q.shape
+    inv_v = 1.0 / (model.limits.dq_max * vel_scale)
+    inv_a = 1.0 / (model.limits.ddq_max * acc_scale)
+    D = np.empty((M, M), dtype=dtype)
+    block = max(1, BLOCK_ELEMS // M)
+    rv = np.empty((block, M))
+    ra = np.empty((block, M))
+    dq = np.empty((block, M))
+    for r0 in range(0, M, block):
+        b = min(block, M - r0)
+        rv_b, ra_b, dq_b = rv[:b], ra[:b], dq[:b]
+        rv_b[:] = 0.0
+        ra_b[:] = 0.0
+        # Junta a junta sobre arrays (b, M): sin temporales (b, M, n)
+        for j in range(n):
+            np.subtract(Q[r0:r0 + b, j, None], Q[None, :, j], out=dq_b)
+            np.abs(dq_b, out=dq_b)
+            np.maximum(rv_b, dq_b * inv_v[j], out=rv_b)
+            np.maximum(ra_b, dq_b * inv_a[j], out=ra_b)
+        D[r0:r0 + b] = segment_duration(rv_b, ra_b, PROFILES[profile])
+    return D
+
+def _neighbor_lists(D, k):
+    """k vecinos más próximos (por tiempo de viaje) de cada nodo, (M, k) int."""
+    M = D.shape[0]
+    k = min(k, M - 1)
+    NB = np.empty((M, k), dtype=np.int64)
+    block = max(1, BLOCK_ELEMS // M)
+    for r0 in range(0, M, block):
+        rows = np.array(D[r0:r0 + block], dtype=float)
+        idx = np.arange(rows.shape[0])
+        rows[idx, r0 + idx] = np.inf
+        part = np.argpartition(rows, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(rows, part, axis=1), axis=1)
+        NB[r0:r0 + block] = np.take_along_axis(part, order, axis=1)
+    return NB
+
+def tour_cost(D, tour):
+    """Coste del ciclo tour (el último nodo vuelve al primero)."""
+    return float(np.sum(D[tour, np.roll(tour, -1)], dtype=float))
+
+# ==============================================================
+# BÚSQUEDA LOCAL (el nodo 0 es el inicio y queda fijo en la posición 0)
+# ==============================================================
+def _nearest_neighbor_tour(D):
+    M = D.shape[0]
+    tour = np.empty(M, dtype=np.int64)
+    free = np.ones(M, dtype=bool)
+    cur = 0
+    tour[0] = 0
+    free[0] = False
+    for k in range(1, M):
+        row = np.where(free, D[cur], np.inf)
+        cur = int(np.argmin(row))
+        tour[k] = cur
+        free[cur] = False
+    return tour
+
+def _two_opt_pass(D, NB, tour, pos, nodes):
+    """
+    Una pasada 2-opt sobre los nodos activos: evalúa en bloque los candidatos
+    (x, y) de sus listas de vecinos (quitar x→sx, y→sy; poner x–y, sx–sy) y
+    aplica en orden de ganancia los que siguen mejorando con la ruta ya
+    modificada. Retorna (ganancia, nodos tocados).
+    """
+    M = tour.size
+    pred = tour[pos - 1]
+    a = np.repeat(nodes, NB.shape[1])
+    c = NB[nodes].ravel()
+    X = np.r_[a, pred[a]]
+    Y = np.r_[c, pred[c]]
+    i, j = pos[X], pos[Y]
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+    u, v = tour[lo], tour[hi]
+    su, sv = tour[(lo + 1) % M], tour[(hi + 1) % M]
+    g = D[u, su] + D[v, sv] - D[u, v] - D[su, sv]
+    g[hi - lo < 2] = 0.0
+    cand = np.flatnonzero(g > EPS)
+    gained, touched = 0.0, []
+    for idx in cand[np.argsort(-g[cand], kind="stable")]:
+        i, j = pos[X[idx]], pos[Y[idx]]
+        lo, hi = (i, j) if i < j else (j, i)
+        if hi - lo < 2:
+            continue
+        u, v, su, sv = tour[lo], tour[hi], tour[lo + 1], tour[(hi + 1) % M]
+        gain = float(D[u, su]) + float(D[v, sv]) - float(D[u, v]) - float(D[su, sv])
+        if gain > EPS:
+            seg = tour[lo + 1:hi + 1][::-1].copy()
+            tour[lo + 1:hi + 1] = seg
+            pos[seg] = np.arange(lo + 1, hi + 1)
+            gained += gain
+            touched += [u, v, su, sv]
+    return gained, touched
+
+def _or_opt_pass(D, NB, tour, pos, nodes, max_len=3):
+    """
+    Una pasada or-opt: mueve tramos de 1..max_len nodos (sin el inicio) que
+    contienen algún nodo activo junto a un vecino de su primer o último nodo,
+    en el mismo sentido o invertidos. Retorna (ganancia, nodos tocados).
+    """
+    M = tour.size
+    K = NB.shape[1]
+    R = np.repeat(np.array([False, True, True, False]), K)[None, :]
+    gained, touched = 0.0, []
+    for L in range(1, min(max_len, M - 2) + 1):
+        i = np.unique((pos[nodes][:, None] - np.arange(L)).ravel())
+        i = i[(i >= 1) & (i <= M - L)]
+        if i.size == 0:
+            continue
+        f, l = tour[i], tour[i + L - 1]
+        p, n = tour[i - 1], tour[(i + L) % M]
+        rem = D[p, f] + D[l, n] - D[p, n]
+        pred = tour[pos - 1]
+        nf, nl = NB[f], NB[l]
+        # Inserción entre u y su sucesor; R marca el tramo invertido
+        U = np.concatenate([nf, pred[nf], nl, pred[nl]], axis=1)
+        V = tour[(pos[U] + 1) % M]
+        F, Lr = f[:, None], l[:, None]
+        head = np.where(R, Lr, F)
+        tail = np.where(R, F, Lr)
+        g = rem[:, None] - (D[U, head] + D[tail, V] - D[U, V])
+        pu = pos[U]
+        g[((pu >= i[:, None]) & (pu <= (i + L - 1)[:, None])) | (U == p[:, None])] = 0.0
+        cand = np.flatnonzero(g > EPS)
+        if cand.size == 0:
+            continue
+        rows, cols = np.unravel_index(cand[np.argsort(-g.ravel()[cand], kind="stable")], g.shape)
+        for r, col in zip(rows, cols):
+            fr, lr, u, rev = f[r], l[r], U[r, col], bool(R[0, col])
+            s = pos[fr]
+            e = s + L - 1
+            if s < 1 or e > M - 1 or tour[e] != lr:
+                continue                              # el tramo ya no existe tal cual
+            pu = pos[u]
+            pp, nn = tour[s - 1], tour[(e + 1) % M]
+            if s <= pu <= e or u == pp:
+                continue
+            vv = tour[(pu + 1) % M]
+            hd, tl = (lr, fr) if rev else (fr, lr)
+            gain = (float(D[pp, fr]) + float(D[lr, nn]) - float(D[pp, nn])
+                    - float(D[u, hd]) - float(D[tl, vv]) + float(D[u, vv]))
+            if gain <= EPS:
+                continue
+            seg = tour[s:e + 1]
+            if rev:
+                seg = seg[::-1]
+            rest = np.concatenate([tour[:s], tour[e + 1:]])
+            k = pu if pu < s else pu - L
+            tour[:] = np.concatenate([rest[:k + 1], seg, rest[k + 1:]])
+            pos[tour] = np.arange(M)
+            gained += gain
+            touched += [pp, nn, fr, lr, u, vv]
+    return gained, touched
+
+def _local_search(D, NB, tour, active=None):
+    """
+    2-opt + or-opt hasta óptimo local. Solo se reevalúan los nodos tocados por
+    el último movimiento (don't-look bits). Con active=None se parte de todos
+    y se confirma el óptimo con una pasada completa final; tras una
+    perturbación basta con pasar los extremos de los cortes.
+    """
+    tour = tour.copy()
+    pos = np.empty_like(tour)
+    pos[tour] = np.arange(tour.size)
+    full = active is None
+    nodes = np.arange(tour.size) if full else np.unique(active)
+    while True:
+        g1, t1 = _two_opt_pass(D, NB, tour, pos, nodes)
+        g2, t2 = _or_opt_pass(D, NB, tour, pos, nodes)
+        if g1 + g2 > EPS:
+            nodes = np.unique(np.array(t1 + t2, dtype=np.int64))
+        elif full and nodes.size < tour.size:
+            nodes = np.arange(tour.size)
+        else:
+            return tour
+
+def _double_bridge(tour, rng):
+    """
+    Perturbación double-bridge local: intercambia dos tramos contiguos cortos.
+    Retorna (ruta, nodos en los extremos de los cortes).
+    """
+    M = tour.size
+    span = max(1, min(BRIDGE_SPAN, (M - 1) // 3))
+    p1 = int(rng.integers(1, M - 2))
+    p2 = min(M - 1, p1 + int(rng.integers(1, span + 1)))
+    p3 = min(M, p2 + int(rng.integers(1, span + 1)))
+    ends = tour[[p1 - 1, p1, p2 - 1, p2, p3 - 1, p3 % M]]
+    return np.concatenate([tour[:p1], tour[p2:p3], tour[p1:p2], tour[p3:]]), ends
+
+def _iterated_search(D, NB, start, seed, kicks):
+    """Búsqueda local iterada: perturbar la mejor ruta, optimizar y aceptar si mejora."""
+    rng = np.random.default_rng(seed)
+    best = _local_search(D, NB, start)
+    best_cost = tour_cost(D, best)
+    if best.size < 5:
+        return best, best_cost
+    for _ in range(int(kicks)):
+        kicked, ends = _double_bridge(best, rng)
+        cand = _local_search(D, NB, kicked, active=ends)
+        cost = tour_cost(D, cand)
+        if cost < best_cost - EPS:
+            best, best_cost = cand, cost
+    return best, best_cost
+
+# ==============================================================
+# TRABAJADORES (matriz de costes en memoria compartida)
+# ==============================================================
+_W = {}
+
+def _init_worker(shm_name, shape, dtype, NB):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _W["shm"] = shm     # mantener el bloque mapeado mientras viva el proceso
+    _W["D"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _W["NB"] = NB
+
+def _search_task(task):
+    start, seed, kicks = task
+    return _iterated_search(_W["D"], _W["NB"], start, seed, kicks)
+
+# ==============================================================
+# API
+# ==============================================================
+def optimize_sequence(model, points, q_start=None, closed=True, dwell=0.0, branch=None,
+                      profile="trapezoid", vel_scale=1.0, acc_scale=1.0, neighbors=10,
+                      rounds=3, kicks=200, workers=None, seed=0, time_limit=None):
+    """
+    Reordena los puntos (N, 3) mm para minimizar el tiempo de ciclo.
+    - q_start: configuración de inicio (por defecto q = 0); no se reordena
+    - closed: True si el ciclo vuelve a q_start tras el último punto
+    - dwell: espera por punto (pinza) [s], solo se suma al tiempo de ciclo
+    - branch: rama del codo para pick_configs
+    - neighbors: tamaño de las listas de vecinos de la búsqueda local
+    - rounds / kicks: rondas sincronizadas del pool y perturbaciones por tarea;
+      cada ronda lanza una tarea por proceso desde la mejor ruta encontrada
+    - workers: procesos (por defecto: núcleos; 1 = sin pool)
+    - time_limit: no empezar rondas nuevas pasado este tiempo [s]
+    Retorna SequenceResult (tiempos de ciclo previstos antes y después).
+    """
+    t0 = time.perf_counter()
+    Qp = pick_configs(model, points, branch)
+    N, n = Qp.shape
+    q0 = np.zeros(n) if q_start is None else np.asarray(q_start, dtype=float)
+    Q = np.vstack([q0, Qp])                       # nodo 0 = inicio
+
+    D = travel_time_matrix(model, Q, profile, vel_scale, acc_scale)
+    NB = _neighbor_lists(D, neighbors) if N > 1 else np.zeros((N + 1, 0), dtype=np.int64)
+    if not closed:
+        D[:, 0] = 0.0                             # regresar al inicio no cuesta
+
+    given = np.arange(N + 1)
+    best, best_cost = given, tour_cost(D, given)
+    workers = int(workers or os.cpu_count() or 1)
+    if N >= 3:
+        nn = _nearest_neighbor_tour(D)
+        starts = [given] + [nn] * (workers - 1) if workers > 1 else [nn]
+        shm = pool = None
+        try:
+            if workers > 1:
+                shm = shared_memory.SharedMemory(create=True, size=D.nbytes)
+                np.ndarray(D.shape, dtype=D.dtype, buffer=shm.buf)[:] = D
+                pool = Pool(workers, initializer=_init_worker,
+                            initargs=(shm.name, D.shape, D.dtype.str, NB))
+                run = pool.map
+            else:
+                _W.update(D=D, NB=NB)
+                run = lambda fn, tasks: list(map(fn, tasks))
+            for r in range(int(rounds)):
+                tasks = [(s, (seed, r, k), kicks) for k, s in enumerate(starts)]
+                for tour, cost in run(_search_task, tasks):
+                    if cost < best_cost - EPS:
+                        best, best_cost = tour, cost
+                starts = [best] * workers
+                if time_limit is not None and time.perf_counter() - t0 > time_limit:
+                    break
+        finally:
+            _W.clear()
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    # Tiempos exactos (float64) sobre los waypoints: coinciden con plan_joint_trajectory
+    def cycle(tour):
+        path = Q[np.r_[tour, 0]] if closed else Q[tour]
+        T = segment_timing(np.abs(np.diff(path, axis=0)), model.limits.dq_max * vel_scale,
+                           model.limits.ddq_max * acc_scale, PROFILES[profile])[0]
+        return float(T.sum()) + dwell * N, path
+
+    before, _ = cycle(given)
+    after, path = cycle(best)
+    if after > before:
+        best, (after, path) = given, (before, cycle(given)[1])
+    order = best[1:] - 1
+    return SequenceResult(order=order, q=Qp[order], q_path=path, cycle_before=before,
+                          cycle_after=after, dwell=float(dwell), elapsed=time.perf_counter() - t0)
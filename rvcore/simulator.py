@@ -0,0 +1,311 @@
+# rvcore/simulator.py
+import threading
+from typing import NamedTuple
+import numpy as np
+from rvcore.kinematics import fk_dh, model_chain
+from rvcore.ik import ik_step_dls
+from rvcore.controllers import PID3
+from rvcore.utils import wrap_to_pi, clip_joints
+from rvcore import profiling
+
+AXES = {"x": 0, "y": 1, "z": 2}
+
+class SimState(NamedTuple):
+    """Foto inmutable del simulador publicada tras cada paso (lectura sin bloqueo)."""
+    ticks: int
+    q: np.ndarray           # rad
+    T: np.ndarray           # (4,4) base→tool
+    joints: np.ndarray      # (n+2, 3) mm
+    ee_target: np.ndarray   # mm
+    residual: float         # |ee_target - ee| mm
+
+def _frozen(a):
+    a = np.array(a, dtype=float)
+    a.flags.writeable = False
+    return a
+
+class Simulator:
+    """
+    Simulación sin interfaz del RV-M2: estado articular, modo IK y PID3.
+    Cada step() equivale a un tick de la GUI (dx en mm/tick), sin dibujo ni
+    temporización: se puede ejecutar tan rápido como permita la CPU.
+    """
+    def __init__(self, model, dt=1.0/30, lam=2.0, use_analytic_ik=False,
+                 use_pid=False, pid=None, workspace=None, workspace_mode="reject",
+                 recorder=None, ik_cache=None):
+        self.model = model
+        self.dt = float(dt)
+        self.lam = float(lam)                                # Damping λ (DLS)
+        self.use_analytic_ik = bool(use_analytic_ik)
+        self.use_pid = bool(use_pid)
+        self.pid = pid if pid is not None else PID3(tau=0.05)
+
+        # Índice de espacio alcanzable (opcional, ver rvcore.workspace):
+        # "reject" descarta jogs hacia fuera, "project" los lleva al punto alcanzable más cercano
+        self.workspace = workspace
+        self.workspace_mode = workspace_mode
+
+        # Caché de soluciones de la IK analítica (opcional, ver rvcore.ik_cache.IKCache)
+        self.ik_cache = ik_cache
+
+        # Consignas articulares en streaming (ver set_stream / rvcore.streaming)
+        self.stream = None
+        self.stream_fault = None                             # Setpoint cuya IK no convergió
+
+        # Grabación opcional de cada paso (ver rvcore.recording.TrajectoryRecorder)
+        self.recorder = recorder
+        self.last_dx = np.zeros(3)                           # último incremento comandado
+
+        # Entradas (palancas / impulsos) por eje X, Y, Z
+        self.target_vel = np.zeros(3)                        # mm/tick
+        self.impulse_pending = np.zeros(3)                   # mm (un único tick)
+        self.lever_active = np.zeros(3, dtype=bool)
+        # Protege solo las entradas (pueden llegar desde otro hilo, p.ej. la GUI)
+        self._input_lock = threading.Lock()
+
+        # Estado cinemático (T, joints se actualizan tras cada paso)
+        self.T = np.empty((4, 4), dtype=float)
+        self.joints = np.empty((model.dof + 2, 3), dtype=float)
+        self.ticks = 0
+        self.home()
+
+    # ==============================================================
+    # ESTADO
+    # ==============================================================
+    def home(self):
+        """Vuelve a q = 0, detiene entradas y resetea objetivo y PID."""
+        self.q = np.zeros(self.model.dof, dtype=float)       # rad
+        with self._input_lock:
+            self.target_vel[:] = 0.0
+            self.impulse_pending[:] = 0.0
+            self.lever_active[:] = False
+        self.stream = None
+        self.stream_fault = None
+        self.pid.reset()
+        self._update_fk()
+        self.ee_target = self.T[:3, 3].copy()                # objetivo cartesiano absoluto
+        self.residual = 0.0
+        self._publish()
+
+    def _publish(self):
+        # Asignar una referencia es atómico: los lectores ven la foto vieja o la nueva
+        self.state = SimState(ticks=self.ticks, q=_frozen(self.q), T=_frozen(self.T),
+                              joints=_frozen(self.joints), ee_target=_frozen(self.ee_target),
+                              residual=self.residual)
+
+    @property
+    def t(self):
+        """Tiempo simulado [s]."""
+        return self.ticks * self.dt
+
+    @property
+    def ee_position(self):
+        return self.T[:3, 3].copy()
+
+    def _update_fk(self):
+        chain = model_chain(self.model)
+        if chain is not None:
+            chain.fk_into(self.q, self.T, self.joints)
+        else:
+            self.T[...], self.joints[...] = fk_dh(self.model, self.q)
+
+    def _joint_bounds(self):
+        if hasattr(self.model, "joint_limits") and isinstance(self.model.joint_limits, np.ndarray):
+            # esperado: shape (dof, 2) -> [:,0]=min, [:,1]=max
+            return self.model.joint_limits[:, 0], self.model.joint_limits[:, 1]
+        if hasattr(self.model, "limits") and hasattr(self.model.limits, "q_min") and hasattr(self.model.limits, "q_max"):
+            return self.model.limits.q_min, self.model.limits.q_max
+        return None, None
+
+    # ==============================================================
+    # ENTRADAS
+    # ==============================================================
+    def set_lever(self, axis, vel, active=None):
+        """Velocidad continua de un eje ('x'|'y'|'z' o 0..2) en mm/tick; 0 suelta la palanca."""
+        idx = AXES.get(axis, axis)
+        with self._input_lock:
+            self.target_vel[idx] = vel
+            self.lever_active[idx] = abs(vel) > 0.0 if active is None else active
+
+    def add_impulse(self, axis, step_mm):
+        """Impulso de un tick (botones finos); se ignora si la palanca del eje está activa."""
+        idx = AXES.get(axis, axis)
+        with self._input_lock:
+            if not self.lever_active[idx]:
+                self.impulse_pending[idx] += step_mm
+
+    # ==============================================================
+    # PASO DE SIMULACIÓN
+    # ==============================================================
+    @profiling.timed("sim.step")
+    def step(self, dx=None):
+        """
+        Avanza un tick. dx (mm) opcional sustituye a palancas + impulsos.
+        Retorna q tras el paso.
+        """
+        if self.stream is not None:
+            sp = next(self.stream, None)
+            if sp is not None:
+                return self._step_setpoint(sp)
+            self.stream = None
+
+        ee_meas = self.T[:3, 3]
+
+        if dx is None:
+            # Velocidades continuas + impulsos de click si la palanca está centrada
+            with self._input_lock:
+                dx = self.target_vel.copy()
+                pend = (~self.lever_active) & (self.impulse_pending != 0.0)
+                dx[pend] += self.impulse_pending[pend]
+                self.impulse_pending[pend] = 0.0
+        else:
+            dx = np.asarray(dx, dtype=float).copy()
+
+        if self.workspace is not None and np.any(dx != 0.0):
+            target = self.ee_target + dx
+            if not self.workspace.is_reachable(target):
+                if self.workspace_mode == "project":
+                    dx = self.workspace.project(target) - self.ee_target
+                else:
+                    dx[:] = 0.0  # sin IK fallida este tick
+
+        # Acumular objetivo absoluto (dx en mm/tick se integra directo por tick)
+        self.ee_target += dx
+        self.last_dx = dx
+
+        if self.use_pid:
+            # El PID sigue al objetivo absoluto y entrega el incremento del tick
+            dx = self.pid.step(self.ee_target - ee_meas, self.dt)
+
+        if np.any(dx != 0.0):
+            ik_solver = getattr(self.model, "ik_solver", None)
+            if self.use_analytic_ik and ik_solver:
+                # IK analítica (suavizada)
+                target_pos = self.ee_target.copy()
+
+                # >>> PARCHE: reflejar SOLO el delta Z respecto a la medición actual | Corrección
+                # (equivalente a: target_pos[2] = ee_meas[2] - (target_pos[2] - ee_meas[2]))
+                target_pos[2] = 2.0 * ee_meas[2] - target_pos[2]
+
+                if self.ik_cache is not None:
+                    sols = self.ik_cache.analytic(target_pos)
+                else:
+                    sols = ik_solver(self.model, target_pos)
+                if sols:
+                    q_new = sols[0]
+                    self.q += 0.5 * (q_new - self.q)  # suavizado para evitar vibración
+            else:
+                # DLS por defecto (estable e incremental)
+                self.q = ik_step_dls(self.model, self.q, dx_mm=dx, lam=self.lam)
+
+        return self._finish_step()
+
+    def _step_setpoint(self, sp):
+        """Tick en modo streaming: la consigna articular sustituye a palancas e IK."""
+        if not sp.ok:
+            # IK sin converger: no se aplica su q. Se corta la ruta, se mantiene
+            # la pose actual y la consigna queda en stream_fault
+            self.stream = None
+            self.stream_fault = sp
+            self.last_dx = np.zeros(3)
+            self.ee_target = self.T[:3, 3].copy()
+            return self._finish_step()
+        self.last_dx = sp.p - self.ee_target
+        self.ee_target = np.array(sp.p, dtype=float)
+        self.q = np.array(sp.q, dtype=float)
+        return self._finish_step()
+
+    def _finish_step(self):
+        # Normalizar y limitar juntas
+        self.q = wrap_to_pi(self.q)
+        qmin, qmax = self._joint_bounds()
+        if qmin is not None and qmax is not None:
+            with profiling.span("sim.clip"):
+                q = clip_joints(self.q, qmin, qmax)
+            if profiling.is_enabled():
+                # juntas detenidas en su límite en este paso
+                profiling.gauge("sim.clipped_joints", np.count_nonzero(q != self.q))
+            self.q = q
+
+        # La FK del lazo va por DHChain.fk_into (no por fk_dh): se mide aquí
+        with profiling.span("sim.fk"):
+            self._update_fk()
+        self.residual = float(np.linalg.norm(self.ee_target - self.T[:3, 3]))
+        profiling.gauge("ik.residual", self.residual)
+        self.ticks += 1
+        self._publish()
+        if self.recorder is not None:
+            self.recorder.record(self)
+        return self.q
+
+    def set_stream(self, setpoints):
+        """
+        Sigue un iterable de consignas (rvcore.streaming.Setpoint): cada step()
+        consume una. Al agotarse vuelve el control por palancas. None lo cancela.
+        Una consigna con ok=False detiene el seguimiento en la pose actual y se
+        guarda en stream_fault (None mientras la ruta va bien).
+        """
+        self.stream = iter(setpoints) if setpoints is not None else None
+        self.stream_fault = None
+
+    def follow_path(self, source, **planner_kwargs):
+        """Planifica `source` en streaming (StreamingPlanner a 1/dt Hz) desde la pose actual."""
+        from rvcore.streaming import StreamingPlanner
+        planner = StreamingPlanner(self.model, rate_hz=1.0 / self.dt, **planner_kwargs)
+        self.set_stream(planner.stream(source, self.q))
+
+    def run(self, n_ticks, dx=None):
+        """Ejecuta n_ticks pasos seguidos (con dx fijo opcional)."""
+        for _ in range(int(n_ticks)):
+            self.step(dx)
+        return self.q
+
+    # ==============================================================
+    # PROGRAMAS
+    # ==============================================================
+    def run_program(self, program):
+        """
+        Ejecuta un programa de jog/waypoints sin pantalla. Cada instrucción es una tupla:
+          ("jog", (vx, vy, vz), n_ticks)       velocidad constante en mm/tick
+          ("move", (dx, dy, dz))               impulso relativo de un tick
+          ("goto", (x, y, z), speed, tol, max_ticks)
+                                               ir a un punto a <= speed mm/tick
+                                               (speed, tol y max_ticks opcionales)
+          ("wait", n_ticks)                    mantener posición
+          ("path", source, {opciones})         seguir una ruta cartesiana en streaming
+                                               (ver rvcore.streaming; opciones opcionales)
+          ("home",)
+        Retorna el número de ticks ejecutados.
+        """
+        start = self.ticks
+        zero = np.zeros(3)
+        for instr in program:
+            op, args = instr[0], instr[1:]
+            if op == "jog":
+                self.run(args[1], dx=np.asarray(args[0], dtype=float))
+            elif op == "move":
+                self.step(dx=np.asarray(args[0], dtype=float))
+            elif op == "goto":
+                self._goto(*args)
+            elif op == "path":
+                self.follow_path(args[0], **(args[1] if len(args) > 1 else {}))
+                while self.stream is not None:
+                    self.step()
+            elif op == "wait":
+                self.run(args[0], dx=zero)
+            elif op == "home":
+                self.home()
+            else:
+                raise ValueError(f"Instrucción desconocida: {op}")
+        return self.ticks - start
+
+    def _goto(self, target, speed=5.0, tol=0.5, max_ticks=1000):
+        target = np.asarray(target, dtype=float)
+        for _ in range(int(max_ticks)):
+            e = target - self.T[:3, 3]
+            dist = float(np.linalg.norm(e))
+            if dist <= tol:
+                break
+            # Reanclar el objetivo a la medida para no acumular deriva de DLS
+            self.ee_target = self.T[:3, 3].copy()
+            self.step(dx=e * min(1.0, speed / dist))
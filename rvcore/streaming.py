@@ -0,0 +1,298 @@
+# rvcore/streaming.py
+"""
+Planificador cartesiano en streaming.
+Consume un iterable (posiblemente infinito) de instrucciones de trayectoria y
+entrega consignas articulares a tasa fija, bajo demanda:
+
+  planner = StreamingPlanner(model, rate_hz=30, speed=80, accel=400, blend=10, lookahead=8)
+  for sp in planner.stream(source, q0):   # sp: Setpoint(t, p, q, speed, ok)
+      ...
+
+Instrucciones aceptadas en `source`:
+  (x, y, z)                          recta hasta el punto a la velocidad por defecto
+  ("line", (x, y, z), speed)         recta (speed en mm/s opcional)
+  ("arc", (x, y, z), (x, y, z), speed)
+                                     arco por un punto intermedio hasta el final
+
+Solo se guardan `lookahead` segmentos a la vez: la memoria no depende de la
+longitud del programa. Las esquinas se redondean con una curva de Bézier
+cuadrática de hasta `blend` mm por lado, y la velocidad se planifica sobre la
+ventana (aceleración limitada, parada al final de la ventana), así que se
+frena lo justo antes de cada esquina. Para consignas en vivo (joystick),
+lookahead=1 evita esperar a que se llene la ventana.
+"""
+from collections import deque
+import math
+from typing import NamedTuple
+import numpy as np
+from rvcore.ik import ik_solve, ee_position
+
+# Giros más cerrados que esto (coseno entre tangentes, ~155°) no se redondean: se para
+BLEND_MIN_COS = -0.9
+
+class Setpoint(NamedTuple):
+    t: float            # s desde el inicio del stream
+    p: np.ndarray       # posición cartesiana de la herramienta [mm]
+    q: np.ndarray       # consigna articular [rad]
+    speed: float        # velocidad de trayectoria [mm/s]
+    ok: bool            # IK convergida en este punto
+
+# ==============================================================
+# PRIMITIVAS GEOMÉTRICAS (parametrizadas por longitud de arco)
+# ==============================================================
+class _Line:
+    def __init__(self, p0, p1, speed):
+        self.p0 = p0
+        d = p1 - p0
+        self.length = float(np.linalg.norm(d))
+        self.u = d / self.length if self.length > 0 else np.zeros(3)
+        self.end = p1
+        self.speed = speed
+        self.vmax = speed
+
+    def point(self, s):
+        return self.p0 + self.u * s
+
+    def tangent(self, s):
+        return self.u
+
+class _Arc:
+    """Arco de circunferencia que pasa por p0, via y p1."""
+    def __init__(self, p0, via, p1, speed, accel):
+        a, b = via - p0, p1 - p0
+        n = np.cross(a, b)
+        nn = float(n @ n)
+        if nn < 1e-12:
+            raise ValueError("Arco degenerado: los tres puntos están alineados")
+        # Centro del círculo circunscrito
+        c = p0 + (np.cross(n, a) * (b @ b) + np.cross(b, n) * (a @ a)) / (2.0 * nn)
+        self.center = c
+        self.radius = float(np.linalg.norm(p0 - c))
+        self.e1 = (p0 - c) / self.radius
+        self.e2 = np.cross(n / math.sqrt(nn), self.e1)      # sentido p0 → via → p1
+        ang = math.atan2((p1 - c) @ self.e2, (p1 - c) @ self.e1)
+        self.angle = ang if ang > 0 else ang + 2.0 * math.pi
+        self.length = self.radius * self.angle
+        self.end = p1
+        self.speed = speed
+        self.vmax = min(speed, math.sqrt(accel * self.radius))   # aceleración centrípeta
+
+    def point(self, s):
+        phi = s / self.radius
+        return self.center + self.radius * (math.cos(phi) * self.e1 + math.sin(phi) * self.e2)
+
+    def tangent(self, s):
+        phi = s / self.radius
+        return -math.sin(phi) * self.e1 + math.cos(phi) * self.e2
+
+class _Blend:
+    """Bézier cuadrática P0-P1-P2 con tabla fija de longitud de arco."""
+    SAMPLES = 16
+
+    def __init__(self, P0, P1, P2, speed, accel):
+        self.P = (P0, P1, P2)
+        t = np.linspace(0.0, 1.0, self.SAMPLES + 1)
+        pts = self._bezier(t)
+        self.t_tab = t
+        self.s_tab = np.r_[0.0, np.cumsum(np.linalg.norm(np.diff(pts, axis=0), axis=1))]
+        self.length = float(self.s_tab[-1])
+        self.end = P2
+        # Curvatura máxima (en los extremos o el centro para una Bézier cuadrática)
+        dd = 2.0 * (P0 - 2.0 * P1 + P2)
+        kappa = 0.0
+        for tt in (0.0, 0.5, 1.0):
+            d1 = 2.0 * ((1.0 - tt) * (P1 - P0) + tt * (P2 - P1))
+            nd = float(np.linalg.norm(d1))
+            if nd > 1e-12:
+                kappa = max(kappa, float(np.linalg.norm(np.cross(d1, dd))) / nd**3)
+        self.vmax = speed if kappa <= 0 else min(speed, math.sqrt(accel / kappa))
+
+    def _bezier(self, t):
+        P0, P1, P2 = self.P
+        t = np.asarray(t, dtype=float)[..., None]
+        return (1.0 - t)**2 * P0 + 2.0 * (1.0 - t) * t * P1 + t**2 * P2
+
+    def point(self, s):
+        return self._bezier(np.interp(s, self.s_tab, self.t_tab))
+
+class _Stop:
+    """Vértice con parada obligatoria (longitud nula)."""
+    length = 0.0
+    vmax = 0.0
+
+    def __init__(self, p):
+        self.end = p
+
+    def point(self, s):
+        return self.end
+
+class _Piece:
+    """Tramo [s0, s1] de una primitiva; la ventana es una cola de tramos."""
+    __slots__ = ("geom", "s0", "s1", "open")
+
+    def __init__(self, geom, s0, s1, open_end=False):
+        self.geom, self.s0, self.s1, self.open = geom, s0, s1, open_end
+
+    @property
+    def length(self):
+        return self.s1 - self.s0
+
+    @property
+    def vmax(self):
+        return self.geom.vmax
+
+    def point(self, s):
+        return self.geom.point(self.s0 + s)
+
+# ==============================================================
+# PLANIFICADOR
+# ==============================================================
+class StreamingPlanner:
+    """
+    - rate_hz: frecuencia de las consignas (p.ej. 1/sim.dt)
+    - speed: velocidad cartesiana por defecto [mm/s]
+    - accel: aceleración cartesiana máxima (tangencial y centrípeta) [mm/s²]
+    - blend: radio de redondeo de esquinas [mm] (0 = parar en cada esquina)
+    - lookahead: segmentos (rectas/arcos) planificados por delante
+    - ik_tol / ik_max_iter: IK por punto (ik_solve con arranque en caliente)
+    """
+    def __init__(self, model, rate_hz=30.0, speed=50.0, accel=300.0, blend=10.0,
+                 lookahead=8, ik_tol=1e-2, ik_max_iter=20):
+        self.model = model
+        self.dt = 1.0 / float(rate_hz)
+        self.speed = float(speed)
+        self.accel = float(accel)
+        self.blend = float(blend)
+        self.lookahead = max(int(lookahead), 1)
+        self.ik_tol = float(ik_tol)
+        self.ik_max_iter = int(ik_max_iter)
+
+    # ---------- Ventana de tramos ----------
+    def _make_segment(self, instr, p_start):
+        if isinstance(instr, tuple) and instr and isinstance(instr[0], str):
+            op, args = instr[0], instr[1:]
+        else:
+            op, args = "line", (instr,)
+        if op == "line":
+            speed = float(args[1]) if len(args) > 1 and args[1] is not None else self.speed
+            return _Line(p_start, np.asarray(args[0], dtype=float), speed)
+        if op == "arc":
+            speed = float(args[2]) if len(args) > 2 and args[2] is not None else self.speed
+            return _Arc(p_start, np.asarray(args[0], dtype=float), np.asarray(args[1], dtype=float),
+                        speed, self.accel)
+        raise ValueError(f"Instrucción de trayectoria desconocida: {op}")
+
+    def _append(self, pieces, seg, pos):
+        """Añade un segmento a la ventana redondeando la esquina con el último abierto."""
+        if seg.length <= 1e-9:
+            return False
+        last = pieces[-1] if pieces else None
+        if last is None or not last.open:
+            pieces.append(_Piece(seg, 0.0, seg.length, open_end=True))
+            return True
+
+        prev = last.geom
+        last.open = False
+        turn = float(prev.tangent(prev.length) @ seg.tangent(0.0))
+        if turn >= 1.0 - 1e-9:
+            # Continuidad tangente: no hay esquina
+            pieces.append(_Piece(seg, 0.0, seg.length, open_end=True))
+            return True
+
+        # Longitud disponible al final del tramo abierto (no se recorta lo ya recorrido)
+        used = pos if last is pieces[0] else 0.0
+        d = min(self.blend, 0.5 * prev.length, 0.5 * seg.length, last.s1 - last.s0 - used)
+        if d > 1e-6 and turn > BLEND_MIN_COS:
+            P0, P2 = prev.point(prev.length - d), seg.point(d)
+            P1 = _tangent_intersection(P0, prev.tangent(prev.length - d), P2, seg.tangent(d), prev.end)
+            last.s1 = prev.length - d
+            blend = _Blend(P0, P1, P2, min(prev.speed, seg.speed), self.accel)
+            pieces.append(_Piece(blend, 0.0, blend.length))
+            pieces.append(_Piece(seg, d, seg.length, open_end=True))
+        else:
+            # Esquina viva (sin redondeo o giro casi completo): parada en el vértice
+            pieces.append(_Piece(_Stop(prev.end), 0.0, 0.0))
+            pieces.append(_Piece(seg, 0.0, seg.length, open_end=True))
+        return True
+
+    def _allowed_speed(self, pieces, pos, v):
+        """Velocidad admisible ahora: aceleración, límite del tramo y frenado ante lo que viene."""
+        a, dt = self.accel, self.dt
+        adt = a * dt
+        # Frenado en tiempo discreto: la mayor v con la que, tras avanzar v·dt, aún se
+        # llega a vp a la distancia dist frenando a ≤ a por tick (v² + 2a·dt·v ≤ vp² + 2a·dist)
+        brake = lambda vp, dist: -adt + math.sqrt(adt * adt + vp * vp + 2.0 * a * max(dist, 0.0))
+        # Parada: al quedar menos de un tick de frenada se aterriza justo en el punto
+        stop = lambda dist: brake(0.0, dist) if dist > adt * dt else max(dist, 0.0) / dt
+        v_ok = min(v + adt, pieces[0].vmax)
+        dist = pieces[0].length - pos
+        for p in list(pieces)[1:]:
+            v_ok = min(v_ok, stop(dist) if p.vmax <= 0.0 else brake(p.vmax, dist))
+            dist += p.length
+        # Parada al final de la ventana
+        return max(min(v_ok, stop(dist)), 0.0), dist
+
+    # ---------- Generador principal ----------
+    def points(self, source, p0):
+        """Genera (t, p, speed) cartesianos a tasa fija desde p0 (mm)."""
+        it = iter(source)
+        pieces = deque()
+        state = dict(p_end=np.asarray(p0, dtype=float), nseg=0, exhausted=False)
+        pos, v, k = 0.0, 0.0, 0
+
+        def refill(limit=self.lookahead):
+            # Completar la ventana hasta `limit` segmentos (bloquea si la fuente espera)
+            while not state["exhausted"] and state["nseg"] < limit:
+                instr = next(it, None)
+                if instr is None:
+                    state["exhausted"] = True
+                    break
+                seg = self._make_segment(instr, state["p_end"])
+                if self._append(pieces, seg, pos):
+                    state["p_end"] = seg.end
+                    state["nseg"] += 1
+
+        refill()
+        yield 0.0, state["p_end"].copy() if not pieces else pieces[0].point(0.0), 0.0
+        while pieces:
+            v, remaining = self._allowed_speed(pieces, pos, v)
+            if remaining <= 1e-9:
+                # Parado al final de la ventana: pedir un segmento más o terminar
+                refill(state["nseg"] + 1)
+                if state["exhausted"] and len(pieces) == 1:
+                    break
+                continue
+            pos += v * self.dt
+            # Pasar a los tramos siguientes (el último abierto se queda en su final)
+            while pos >= pieces[0].length - 1e-9 and len(pieces) > 1:
+                pos = max(pos - pieces[0].length, 0.0)
+                if isinstance(pieces.popleft().geom, (_Line, _Arc)):
+                    state["nseg"] -= 1
+            pos = min(pos, pieces[0].length)
+            refill()
+            k += 1
+            yield k * self.dt, pieces[0].point(pos), v
+
+    def stream(self, source, q0):
+        """
+        Genera Setpoint a tasa fija: la ruta arranca en la posición actual de la
+        herramienta (FK de q0) y cada punto se resuelve con ik_solve desde la
+        consigna anterior.
+        """
+        q = np.asarray(q0, dtype=float).copy()
+        for t, p, v in self.points(source, ee_position(self.model, q)):
+            res = ik_solve(self.model, p, q, tol=self.ik_tol, max_iter=self.ik_max_iter)
+            q = res.q
+            yield Setpoint(t=t, p=np.array(p, dtype=float), q=q.copy(), speed=v, ok=res.converged)
+
+def _tangent_intersection(P0, u0, P2, u2, fallback):
+    """Punto medio de la perpendicular común a las tangentes en P0 y P2 (control de la Bézier)."""
+    b = float(u0 @ u2)
+    den = 1.0 - b * b
+    if den < 1e-9:
+        return fallback
+    w = P0 - P2
+    d, e = float(u0 @ w), float(u2 @ w)
+    t0 = (b * e - d) / den
+    t2 = (e - b * d) / den
+    return 0.5 * ((P0 + t0 * u0) + (P2 + t2 * u2))
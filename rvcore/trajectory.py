@@ -0,0 +1,166 @@
+# rvcore/trajectory.py
+from dataclasses import dataclass
+import numpy as np
+from rvcore.ik import ik_solve
+
+# k = duración de rampa relativa: la S-curve (aceleración sen²) tarda el doble
+# en llegar a la misma velocidad que el trapecio con igual aceleración pico.
+PROFILES = {"trapezoid": 1.0, "scurve": 2.0}
+
+@dataclass
+class JointTrajectory:
+    """
+    Trayectoria articular por tramos (parada en cada waypoint).
+    Cada tramo se recorre con un parámetro s ∈ [0,1] común a todas las juntas,
+    q = q_a + s·(q_b - q_a), con perfil trapezoidal o S-curve en s.
+    """
+    waypoints: np.ndarray   # (K, n) rad
+    t_knots: np.ndarray     # (K,) s, instante de llegada a cada waypoint
+    v_peak: np.ndarray      # (K-1,) velocidad pico de s por tramo [1/s]
+    a_peak: np.ndarray      # (K-1,) aceleración pico de s por tramo [1/s²]
+    t_ramp: np.ndarray      # (K-1,) duración de cada rampa (acel./decel.) [s]
+    profile: str = "trapezoid"
+
+    @property
+    def duration(self):
+        return float(self.t_knots[-1])
+
+    def evaluate(self, t):
+        """
+        Evalúa la trayectoria en los instantes t (vectorizado).
+        Retorna q, dq, ddq con forma (len(t), n).
+        """
+        t = np.clip(np.atleast_1d(np.asarray(t, dtype=float)), 0.0, self.duration)
+        nseg = self.waypoints.shape[0] - 1
+        if nseg == 0:
+            q = np.broadcast_to(self.waypoints[0], (t.size, self.waypoints.shape[1])).copy()
+            return q, np.zeros_like(q), np.zeros_like(q)
+
+        seg = np.clip(np.searchsorted(self.t_knots, t, side="right") - 1, 0, nseg - 1)
+        tau = t - self.t_knots[seg]
+        T = self.t_knots[seg + 1] - self.t_knots[seg]
+        Vp, A, Ta = self.v_peak[seg], self.a_peak[seg], self.t_ramp[seg]
+        scurve = self.profile == "scurve"
+
+        # Rampa de subida / de bajada (simétrica) y crucero
+        s1, v1, a1 = _ramp(tau, A, Ta, scurve)
+        s3, v3, a3 = _ramp(T - tau, A, Ta, scurve)
+        s_ramp = 0.5 * Vp * Ta
+        s2 = s_ramp + Vp * (tau - Ta)
+
+        up = tau < Ta
+        down = tau > T - Ta
+        s = np.where(up, s1, np.where(down, 1.0 - s3, s2))
+        ds = np.where(up, v1, np.where(down, v3, Vp))
+        dds = np.where(up, a1, np.where(down, -a3, 0.0))
+
+        qa = self.waypoints[seg]
+        dQ = self.waypoints[seg + 1] - qa
+        q = qa + s[:, None] * dQ
+        dq = ds[:, None] * dQ
+        ddq = dds[:, None] * dQ
+        return q, dq, ddq
+
+    def sample(self, rate_hz):
+        """
+        Muestrea toda la trayectoria a rate_hz en arrays contiguos.
+        Retorna t (K,), q, dq, ddq (K, n).
+        """
+        n = int(np.floor(self.duration * rate_hz + 1e-9)) + 1
+        t = np.arange(n, dtype=float) / rate_hz
+        if t[-1] < self.duration:
+            t = np.append(t, self.duration)
+        q, dq, ddq = self.evaluate(t)
+        return t, q, dq, ddq
+
+def _ramp(tau, A, Ta, scurve):
+    """Posición, velocidad y aceleración de s durante una rampa de aceleración."""
+    tau = np.clip(tau, 0.0, Ta)
+    if not scurve:
+        return 0.5 * A * tau**2, A * tau, A + 0.0 * tau
+    # Aceleración sen²: a = A·sin²(πτ/Ta), continua en los extremos
+    Ta_safe = np.where(Ta > 0, Ta, 1.0)
+    w = 2.0 * np.pi / Ta_safe
+    a = A * np.sin(0.5 * w * tau)**2
+    v = A * (0.5 * tau - np.sin(w * tau) / (2.0 * w))
+    s = A * (0.25 * tau**2 + (np.cos(w * tau) - 1.0) / (2.0 * w**2))
+    return s, v, a
+
+def segment_duration(rv, ra, k=1.0):
+    """
+    Duración de tramos punto a punto a partir de los cocientes de la junta más
+    exigida: rv = max|Δq|/dq_max [s] y ra = max|Δq|/ddq_max [s²] (cualquier forma).
+    Crucero si rv² > k·ra (T = rv + k·ra/rv); si no, triangular (T = 2·√(k·ra)).
+    """
+    rv_safe = np.where(rv > 0, rv, 1.0)
+    return np.where(rv * rv > k * ra, rv + k * ra / rv_safe, 2.0 * np.sqrt(k * ra))
+
+def segment_timing(dQ, vmax, amax, k=1.0):
+    """
+    Temporización de tramos punto a punto (vectorizada sobre cualquier forma).
+      dQ: (..., n) desplazamiento articular absoluto de cada tramo [rad]
+      k: duración de rampa relativa (PROFILES)
+    Retorna T, Vp, A, Ta con forma (...): duración [s], velocidad y aceleración
+    pico de s y duración de rampa. Los tramos nulos duran 0.
+    """
+    # Límites sobre s: la junta más exigida en cada tramo manda (V = 1/rv, A = 1/ra)
+    rv = np.max(dQ / vmax, axis=-1)
+    ra = np.max(dQ / amax, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        A = 1.0 / ra
+        # Trapecio/S-curve en s ∈ [0,1]; si no alcanza V, perfil triangular
+        Vp = np.minimum(1.0 / rv, np.sqrt(A / k))
+        Ta = k * Vp / A
+    return segment_duration(rv, ra, k), Vp, A, Ta
+
+def plan_joint_trajectory(model, waypoints, profile="trapezoid", vel_scale=1.0, acc_scale=1.0):
+    """
+    Parametriza en el tiempo una lista de waypoints articulares respetando
+    model.limits.dq_max y model.limits.ddq_max (escalados por vel_scale/acc_scale).
+    - waypoints: (K, n) rad
+    - profile: "trapezoid" o "scurve"
+    Retorna JointTrajectory.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil desconocido: {profile} (usar {list(PROFILES)})")
+    k = PROFILES[profile]
+
+    W = np.atleast_2d(np.asarray(waypoints, dtype=float))
+    if W.shape[1] != model.dof:
+        raise ValueError(f"Los waypoints deben tener {model.dof} columnas, obtuve {W.shape[1]}")
+
+    # Quitar waypoints repetidos consecutivos (tramos de longitud cero)
+    if W.shape[0] > 1:
+        keep = np.r_[True, np.any(np.diff(W, axis=0) != 0.0, axis=1)]
+        W = W[keep]
+
+    dQ = np.abs(np.diff(W, axis=0))                     # (K-1, n)
+    vmax = model.limits.dq_max * vel_scale
+    amax = model.limits.ddq_max * acc_scale
+    T, Vp, A, Ta = segment_timing(dQ, vmax, amax, k)
+
+    t_knots = np.r_[0.0, np.cumsum(T)]
+    return JointTrajectory(waypoints=W, t_knots=t_knots, v_peak=Vp, a_peak=A,
+                           t_ramp=Ta, profile=profile)
+
+def plan_cartesian_trajectory(model, points, q0, profile="trapezoid", vel_scale=1.0,
+                              acc_scale=1.0, tol=1e-2, cache=None):
+    """
+    Igual que plan_joint_trajectory pero con waypoints cartesianos (K, 3) en mm.
+    Cada punto se resuelve con ik_solve arrancando desde la solución anterior
+    (q0 para el primero); entre waypoints se interpola en espacio articular.
+    cache: IKCache opcional (rvcore.ik_cache) para reutilizar soluciones de
+    objetivos ya visitados (programas que repiten puntos).
+    """
+    P = np.atleast_2d(np.asarray(points, dtype=float))
+    W = np.empty((P.shape[0], model.dof), dtype=float)
+    q = np.asarray(q0, dtype=float)
+    for i, p in enumerate(P):
+        if cache is not None:
+            res = cache.solve(p, q, tol=tol)
+        else:
+            res = ik_solve(model, p, q, tol=tol)
+        if not res.converged:
+            raise ValueError(f"Waypoint {i} {p} inalcanzable (residuo {res.residual:.3f} mm)")
+        q = W[i] = res.q
+    return plan_joint_trajectory(model, W, profile=profile, vel_scale=vel_scale, acc_scale=acc_scale)
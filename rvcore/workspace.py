@@ -0,0 +1,183 @@
+# rvcore/workspace.py
+import inspect
+import itertools
+import os
+import zipfile
+import numpy as np
+from rvcore.kinematics import fk_dh_batch
+from rvcore.robot_model import model_fingerprint
+
+class WorkspaceGrid:
+    """
+    Índice voxelizado del espacio de trabajo alcanzable de la herramienta.
+    - occupied[i,j,k]: el vóxel contiene al menos una muestra de FK dentro de límites
+    - nearest[i,j,k]: índice (en points/qs) de la muestra alcanzable más cercana
+    Las consultas son O(1) por punto (solo aritmética de índices).
+    """
+    def __init__(self, origin, voxel, occupied, nearest, points, qs, fingerprint="",
+                 samples=None, seed=None):
+        self.origin = np.asarray(origin, dtype=float)    # esquina mínima [mm]
+        self.voxel = float(voxel)                        # lado del vóxel [mm]
+        self.occupied = occupied                         # (nx, ny, nz) bool
+        self.nearest = nearest                           # (nx, ny, nz) int32
+        self.points = points                             # (K, 3) punto representativo por vóxel
+        self.qs = qs                                     # (K, n) configuración que lo alcanza
+        self.fingerprint = fingerprint
+        self.samples = samples                           # parámetros de muestreo (None = desconocidos)
+        self.seed = seed
+
+    @property
+    def shape(self):
+        return self.occupied.shape
+
+    def _index(self, P):
+        P = np.asarray(P, dtype=float)
+        ijk = np.floor((P - self.origin) / self.voxel).astype(np.int64)
+        inside = np.all((ijk >= 0) & (ijk < self.shape), axis=-1)
+        return np.clip(ijk, 0, np.array(self.shape) - 1), inside
+
+    def is_reachable(self, P):
+        """True si el punto (o cada fila de (M,3)) cae en un vóxel alcanzable."""
+        ijk, inside = self._index(P)
+        return inside & self.occupied[ijk[..., 0], ijk[..., 1], ijk[..., 2]]
+
+    def nearest_reachable(self, P):
+        """
+        Punto alcanzable más cercano (a resolución de vóxel) y su configuración semilla.
+        Retorna (points, qs) con la misma forma de entrada que P.
+        """
+        ijk, _ = self._index(P)
+        idx = self.nearest[ijk[..., 0], ijk[..., 1], ijk[..., 2]]
+        return self.points[idx], self.qs[idx]
+
+    def project(self, P):
+        """Deja P igual si es alcanzable; si no, lo sustituye por el punto alcanzable más cercano."""
+        P = np.asarray(P, dtype=float)
+        near, _ = self.nearest_reachable(P)
+        ok = self.is_reachable(P)
+        return np.where(ok[..., None], P, near)
+
+    # ---------- Persistencia ----------
+    def save(self, path):
+        """Escritura atómica: se escribe en un temporal y se renombra."""
+        tmp = str(path) + ".tmp.npz"
+        extra = {k: getattr(self, k) for k in ("samples", "seed") if getattr(self, k) is not None}
+        try:
+            np.savez_compressed(tmp, origin=self.origin, voxel=self.voxel, occupied=self.occupied,
+                                nearest=self.nearest, points=self.points, qs=self.qs,
+                                fingerprint=np.array(self.fingerprint), **extra)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            extra = {k: int(z[k]) for k in ("samples", "seed") if k in z.files}
+            return cls(origin=z["origin"], voxel=float(z["voxel"]), occupied=z["occupied"],
+                       nearest=z["nearest"], points=z["points"], qs=z["qs"],
+                       fingerprint=str(z["fingerprint"]), **extra)
+
+def build_workspace(model, voxel=15.0, samples=2_000_000, seed=0, chunk=200_000):
+    """
+    Muestrea uniformemente q dentro de limits.q_min/q_max, calcula la FK en lotes
+    y voxeliza las posiciones de la herramienta. Después propaga a todos los vóxeles
+    el índice de la muestra alcanzable más cercana (jump flooding).
+    """
+    rng = np.random.default_rng(seed)
+    qmin, qmax = model.limits.q_min, model.limits.q_max
+
+    Q = np.empty((samples, model.dof), dtype=float)
+    P = np.empty((samples, 3), dtype=float)
+    for s in range(0, samples, chunk):
+        e = min(s + chunk, samples)
+        Q[s:e] = rng.uniform(qmin, qmax, size=(e - s, model.dof))
+        P[s:e] = fk_dh_batch(model, Q[s:e])[:, :3, 3]
+
+    # Rejilla con un vóxel de margen alrededor de las muestras
+    origin = P.min(axis=0) - voxel
+    shape = tuple(np.floor((P.max(axis=0) + voxel - origin) / voxel).astype(int) + 1)
+    ijk = np.floor((P - origin) / voxel).astype(np.int64)
+    flat = np.ravel_multi_index(ijk.T, shape)
+
+    # Un representante (la primera muestra) por vóxel ocupado
+    cells, first = np.unique(flat, return_index=True)
+    points, qs = P[first], Q[first]
+
+    occupied = np.zeros(shape, dtype=bool)
+    occupied.flat[cells] = True
+
+    nearest = np.full(int(np.prod(shape)), -1, dtype=np.int32)
+    nearest[cells] = np.arange(cells.size, dtype=np.int32)
+    nearest = _jump_flood(nearest.reshape(shape), points, origin, voxel)
+
+    return WorkspaceGrid(origin, voxel, occupied, nearest, points, qs,
+                         fingerprint=model_fingerprint(model), samples=samples, seed=seed)
+
+def _jump_flood(seed_idx, points, origin, voxel):
+    """
+    Jump flooding: cada vóxel hereda la semilla más cercana de sus 26 vecinos a
+    distancias N/2, N/4, ..., 1 (+1 pasada extra). Aproxima la transformada de
+    distancia euclídea con ~log2(N) pasadas vectorizadas sobre vistas desplazadas.
+    """
+    shape = seed_idx.shape
+    axes = [origin[a] + (np.arange(shape[a]) + 0.5) * voxel for a in range(3)]
+    centers = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)      # (nx, ny, nz, 3)
+
+    best = seed_idx.copy()
+    seed_pos = np.where(best[..., None] >= 0, points[np.maximum(best, 0)], np.inf)
+    best_d = np.sum((seed_pos - centers)**2, axis=-1)
+
+    offsets = [o for o in itertools.product((-1, 0, 1), repeat=3) if any(o)]
+    steps = []
+    k = 1 << int(np.ceil(np.log2(max(shape))))
+    while k > 1:
+        k //= 2
+        steps.append(k)
+    steps.append(1)
+
+    def _sl(o, n):
+        # destino ← origen desplazado o (vóxel v toma la semilla de v + o)
+        return (slice(max(0, -o), n - max(0, o)), slice(max(0, o), n + min(0, o)))
+
+    for k in steps:
+        for off in offsets:
+            (dx, sx), (dy, sy), (dz, sz) = (_sl(o * k, n) for o, n in zip(off, shape))
+            if dx.start >= dx.stop or dy.start >= dy.stop or dz.start >= dz.stop:
+                continue
+            dst, src = (dx, dy, dz), (sx, sy, sz)
+            cand_pos = seed_pos[src]
+            d = np.sum((cand_pos - centers[dst])**2, axis=-1)
+            better = d < best_d[dst]
+            if not better.any():
+                continue
+            best_d[dst][better] = d[better]
+            best[dst][better] = best[src][better]
+            seed_pos[dst][better] = cand_pos[better]
+    return best
+
+def load_or_build_workspace(model, cache_path, **kwargs):
+    """
+    Carga el índice desde cache_path si corresponde al mismo modelo (huella DH/tool/
+    límites) y a los mismos parámetros de construcción (voxel, samples, seed); si no,
+    lo construye con build_workspace y lo guarda.
+    """
+    fp = model_fingerprint(model)
+    defaults = inspect.signature(build_workspace).parameters
+    wanted = {k: kwargs.get(k, defaults[k].default) for k in ("voxel", "samples", "seed")}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            ws = WorkspaceGrid.load(cache_path)
+            if ws.fingerprint == fp and all(getattr(ws, k) == v for k, v in wanted.items()):
+                return ws
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            pass
+    ws = build_workspace(model, **kwargs)
+    if cache_path:
+        try:
+            ws.save(cache_path)
+        except OSError:
+            pass
+    return ws
@@ -0,0 +1,185 @@
+# ui/export_frames.py
+"""
+Exportación de movimientos a secuencias de imágenes, fuera de pantalla y en paralelo.
+
+  python -m ui.export_frames q.npy -o frames/                # (T, n) rad -> frames/frame_000000.png ...
+  python -m ui.export_frames grabacion/ -o frames/ -j 4      # directorio de TrajectoryRecorder
+  python -m ui.export_frames q.npy -o video.npy --rgb        # (T, H, W, 3) uint8 en un solo .npy
+
+Cada proceso crea una única figura Agg (OffscreenRenderer) y por frame solo
+actualiza los datos de los artistas. Los frames se reparten en bloques; la
+entrada se lee por memoria mapeada y cada bloque se escribe directamente a
+disco, así la memoria de cada proceso no depende de la longitud del movimiento.
+"""
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+import numpy as np
+
+from rvcore.io import load_robot_from_csv_dir
+from rvcore.kinematics import fk_dh_batch
+from rvcore.recording import META_FILE, TrajectoryLog
+from rvcore.robot_model import from_csv_bundle
+
+FRAME_PATTERN = "frame_{:06d}.png"
+
+# ==============================================================
+# ENTRADA
+# ==============================================================
+class _Source:
+    """Lectura por bloques de q (y t si existe) desde un .npy (T, n) o una grabación."""
+    def __init__(self, path, rate_hz=None):
+        self.path = str(path)
+        self.rate_hz = rate_hz
+        if os.path.isfile(os.path.join(self.path, META_FILE)):
+            self.log, self.Q = TrajectoryLog(self.path), None
+            self.frames = len(self.log)
+        else:
+            self.log, self.Q = None, np.load(self.path, mmap_mode="r")
+            if self.Q.ndim != 2:
+                raise ValueError(f"La trayectoria debe ser (T, n), obtuve {self.Q.shape}")
+            self.frames = self.Q.shape[0]
+
+    def read(self, idx):
+        """q (len(idx), n) y t (len(idx),) o None para los frames idx (crecientes)."""
+        if self.log is not None:
+            rec = self.log.read(int(idx[0]), int(idx[-1]) + 1)[idx - idx[0]]
+            return np.asarray(rec["q"], dtype=float), rec["t"]
+        q = np.asarray(self.Q[idx], dtype=float)
+        return q, (idx / self.rate_hz if self.rate_hz else None)
+
+def _as_source_path(source, out_dir):
+    """Ruta legible por los procesos (un array en memoria se vuelca una vez a .npy)."""
+    if isinstance(source, TrajectoryLog):
+        return source.path, None
+    if isinstance(source, (str, os.PathLike)):
+        return str(source), None
+    tmp = Path(out_dir) / "frames.input.npy"
+    np.save(tmp, np.atleast_2d(np.asarray(source, dtype=float)))
+    return str(tmp), str(tmp)
+
+def auto_limits(model, src, stride=1, chunk=65536, pad=0.05):
+    """Cubo común a todos los frames (ejes iguales) con margen pad, recorrido por bloques."""
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    idx = np.arange(0, src.frames, stride)
+    for s in range(0, idx.size, chunk):
+        q, _ = src.read(idx[s:s + chunk])
+        _, J = fk_dh_batch(model, q, return_joints=True)
+        lo = np.minimum(lo, J.min(axis=(0, 1)))
+        hi = np.maximum(hi, J.max(axis=(0, 1)))
+    c = 0.5 * (lo + hi)
+    r = 0.5 * float(np.max(hi - lo)) * (1.0 + pad) or 1.0
+    return tuple((float(ci - r), float(ci + r)) for ci in c)
+
+# ==============================================================
+# TRABAJADORES
+# ==============================================================
+_W = {}
+
+def _init_worker(model, src_path, rate_hz, stride, out, rgb, scene, png_level):
+    from ui.viz_matplotlib import OffscreenRenderer
+    _W["model"] = model
+    _W["src"] = _Source(src_path, rate_hz)
+    _W["stride"] = stride
+    _W["renderer"] = OffscreenRenderer(np.zeros((model.dof + 2, 3)), **scene)
+    _W["out"] = np.load(out, mmap_mode="r+") if rgb else out
+    _W["rgb"] = rgb
+    _W["png_level"] = png_level
+
+def _render_chunk(span):
+    s, e = span
+    src, renderer, out = _W["src"], _W["renderer"], _W["out"]
+    idx = np.arange(s, e) * _W["stride"]
+    q, t = src.read(idx)
+    _, J = fk_dh_batch(_W["model"], q, return_joints=True)
+    if not _W["rgb"]:
+        from PIL import Image
+    for r, k in enumerate(idx):
+        text = f"frame {k}" if t is None else f"frame {k}  t = {float(t[r]):.3f} s"
+        img = renderer.render(J[r], text)
+        if _W["rgb"]:
+            out[s + r] = img[..., :3]
+        else:
+            Image.fromarray(img[..., :3]).save(os.path.join(out, FRAME_PATTERN.format(s + r)),
+                                               compress_level=_W["png_level"])
+    if _W["rgb"]:
+        out.flush()
+    return e - s
+
+# ==============================================================
+# API
+# ==============================================================
+def export_frames(model, source, out, rgb=False, workers=None, chunk=128, stride=1, rate_hz=None,
+                  limits=None, figsize=(6, 5), dpi=100, elev=20, azim=-60, title=None, png_level=1):
+    """
+    Renderiza una trayectoria articular fuera de pantalla.
+    - source: array (T, n) rad, ruta .npy (T, n) o grabación (directorio / TrajectoryLog)
+    - out: directorio de PNG numerados (FRAME_PATTERN) o, con rgb=True, ruta .npy
+      donde se escribe un array (F, H, W, 3) uint8 mapeado en memoria
+    - stride: exportar uno de cada stride frames (F = ceil(T / stride))
+    - rate_hz: frecuencia de un .npy para rotular el tiempo (las grabaciones ya lo traen)
+    - limits: ejes fijos ((x0, x1), (y0, y1), (z0, z1)) mm; por defecto cubo que
+      contiene todo el movimiento
+    - png_level: compresión zlib de los PNG (1 = rápida, 9 = más pequeña)
+    Retorna (ruta de salida, número de frames).
+    """
+    out = Path(out)
+    (out.parent if rgb else out).mkdir(parents=True, exist_ok=True)
+    src_path, tmp = _as_source_path(source, out.parent if rgb else out)
+    try:
+        src = _Source(src_path, rate_hz)
+        n_out = -(-src.frames // stride)
+        if limits is None:
+            limits = auto_limits(model, src, stride)
+        scene = dict(limits=limits, figsize=figsize, dpi=dpi, elev=elev, azim=azim, title=title)
+
+        if rgb:
+            from ui.viz_matplotlib import OffscreenRenderer
+            h, w = OffscreenRenderer(np.zeros((model.dof + 2, 3)), **scene).shape
+            np.lib.format.open_memmap(out, mode="w+", dtype=np.uint8, shape=(n_out, h, w, 3)).flush()
+
+        spans = [(s, min(s + chunk, n_out)) for s in range(0, n_out, chunk)]
+        init = (model, src_path, rate_hz, stride, str(out), rgb, scene, png_level)
+        with Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=init) as pool:
+            done = 0
+            for n in pool.imap_unordered(_render_chunk, spans):
+                done += n
+                print(f"\r{done}/{n_out} frames", end="", file=sys.stderr)
+        print(file=sys.stderr)
+        return str(out), n_out
+    finally:
+        if tmp:
+            os.remove(tmp)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Exporta un movimiento del RV-M2 a imágenes (fuera de pantalla, en paralelo)")
+    ap.add_argument("input", help="trayectoria .npy (T, n) en rad o directorio de grabación")
+    ap.add_argument("-o", "--output", required=True, help="directorio de PNG o, con --rgb, archivo .npy")
+    ap.add_argument("--rgb", action="store_true", help="frames RGB crudos en un único .npy mapeado")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="procesos (por defecto: núcleos)")
+    ap.add_argument("--chunk", type=int, default=128, help="frames por bloque")
+    ap.add_argument("--stride", type=int, default=1, help="exportar uno de cada N frames")
+    ap.add_argument("--rate", type=float, default=None, help="Hz del .npy para rotular el tiempo")
+    ap.add_argument("--figsize", type=float, nargs=2, default=(6, 5), metavar=("ANCHO", "ALTO"), help="pulgadas")
+    ap.add_argument("--dpi", type=int, default=100)
+    ap.add_argument("--elev", type=float, default=20)
+    ap.add_argument("--azim", type=float, default=-60)
+    ap.add_argument("--config", default=str(Path(__file__).resolve().parent.parent / "config_csv"))
+    args = ap.parse_args(argv)
+
+    bundle = load_robot_from_csv_dir(args.config, name="Mitsubishi RV-M2 (CSV)")
+    model = from_csv_bundle(bundle)
+
+    t0 = time.perf_counter()
+    out, n = export_frames(model, args.input, args.output, rgb=args.rgb, workers=args.workers,
+                           chunk=args.chunk, stride=args.stride, rate_hz=args.rate,
+                           figsize=tuple(args.figsize), dpi=args.dpi, elev=args.elev, azim=args.azim)
+    dt = time.perf_counter() - t0
+    print(f"{n} frames en {dt:.2f} s ({n / dt:.1f} frames/s) -> {out}")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,15 @@
 # ui/gui_tk.py
+import time
 import tkinter as tk
 from tkinter import ttk
-import numpy as np
 from rvcore.kinematics import fk_dh
-from rvcore.ik import ik_step_dls
-from rvcore.utils import wrap_to_pi, clip_joints
+from rvcore.simulator import Simulator
+from rvcore.realtime import SimulationThread
+from rvcore import profiling
+from ui.viz_matplotlib import RobotArtists, draw_robot_frame, setup_robot_axes
 
 # === Bandera global para mostrar/ocultar PID (UI + lógica) ===
 SHOW_PID = False
-if SHOW_PID:
-    from rvcore.controllers import PID3  # solo si activamos el PID
 
 # Matplotlib embebido
 import matplotlib
@@ -19,16 +19,24 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 
 class RobotGUI(tk.Tk):
-    def __init__(self, model, update_hz=30):
+    def __init__(self, model, update_hz=30, workspace=None, recorder=None, command_port=None):
         super().__init__()
         self.title("RV-M2 Sim - Palancas X/Y/Z (Tkinter)")
         self.model = model
         self.dt = 1.0 / update_hz
         self.running = False
 
-        # Estado del robot
-        self.q = np.zeros(self.model.dof, dtype=float)     # rad
-        self.target_vel = np.zeros(3)                      # [vx, vy, vz] mm/tick
+        # Estado del robot: lo gestiona el simulador (la GUI es solo vista + entradas).
+        # El paso de control corre en un hilo propio; la GUI solo lee sim.state.
+        self.sim = Simulator(model, dt=self.dt, workspace=workspace, recorder=recorder)
+        self.worker = SimulationThread(self.sim)
+        self._params = None                 # últimos parámetros de la UI enviados al simulador
+
+        # Servidor de comandos opcional (rvcore.command_server): jog remoto por TCP local
+        self.server = None
+        if command_port is not None:
+            from rvcore.command_server import CommandServer
+            self.server = CommandServer(self.sim, worker=self.worker).start_in_thread(port=command_port)
 
         # Variables ajustables (sliders)
         self.x_scale = tk.DoubleVar(value=1.5)             # mm/tick (palanca X)
@@ -49,28 +57,25 @@ class RobotGUI(tk.Tk):
         # Modo de IK (por defecto DLS)
         self.use_analytic_ik = tk.BooleanVar(value=False)
 
-        # Palancas: estado
-        self.lever_active = {"x": False, "y": False, "z": False}  # True si arrastrando
-        self.impulse_pending = {"x": 0.0, "y": 0.0, "z": 0.0}     # impulsos por click
-
         # Layout general
         self.columnconfigure(0, weight=0)
         self.columnconfigure(1, weight=1)
         self._build_controls(side=0)
         self._build_plot(side=1)
 
-        # Objetivo cartesiano absoluto (lo mantenemos para futuras extensiones)
-        T0e, _ = fk_dh(self.model, self.q)
-        self.ee_target = T0e[:3, 3].copy()
+        self.after_id = None
+        self._next_frame = None
+        self._replay = None
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
-        # Instancia de PID solo si está habilitado
-        if SHOW_PID:
-            self.pid = PID3(kp=(self.kp.get(), self.kp.get(), self.kp.get()),
-                            ki=(self.ki.get(), self.ki.get(), self.ki.get()),
-                            kd=(self.kd.get(), self.kd.get(), self.kd.get()),
-                            tau=0.05)
+    # Atajos al estado del simulador
+    @property
+    def q(self):
+        return self.sim.q
 
-        self.after_id = None
+    @property
+    def ee_target(self):
+        return self.sim.ee_target
 
     # ==============================================================
     # UI: CONTROLES
@@ -162,6 +167,17 @@ class RobotGUI(tk.Tk):
             row=6, column=0, columnspan=3, pady=(8, 6)
         )
 
+        # -------- Métricas (instrumentación opcional) --------
+        metfrm = ttk.LabelFrame(panel, text="Métricas")
+        metfrm.grid(row=7, column=0, columnspan=4, sticky="we", pady=6)
+        self.show_metrics = tk.BooleanVar(value=profiling.is_enabled())
+        ttk.Checkbutton(metfrm, text="Medir FK / IK / paso / dibujo", variable=self.show_metrics,
+                        command=self._toggle_metrics).grid(row=0, column=0, sticky="w", padx=6, pady=4)
+        self.metrics_var = tk.StringVar(value="")
+        self.metrics_label = ttk.Label(metfrm, textvariable=self.metrics_var, font=("Consolas", 8),
+                                       justify="left")
+        self.metrics_label.grid(row=1, column=0, sticky="w", padx=6, pady=(0, 4))
+
     # Helpers UI
     def _build_lever_column(self, parent, col, axis, title, minus_text, plus_text, on_minus, on_plus):
         """Construye una columna con la palanca y los botones finos para un eje."""
@@ -229,17 +245,11 @@ class RobotGUI(tk.Tk):
         plotfrm.columnconfigure(0, weight=1)
 
         # Figura y ejes 3D
-        self.fig = plt.Figure(figsize=(6,5))
-        self.ax = self.fig.add_subplot(111, projection="3d")
-        self.ax.set_xlabel("X [mm]")
-        self.ax.set_ylabel("Y [mm]")
-        self.ax.set_zlabel("Z [mm]")
-        self.ax.set_title("RV-M2 - Vista 3D")
-
         # Vista inicial
         self.default_elev = 20
         self.default_azim = -60
-        self.ax.view_init(elev=self.default_elev, azim=self.default_azim)
+        self.fig = plt.Figure(figsize=(6,5))
+        self.ax = setup_robot_axes(self.fig, elev=self.default_elev, azim=self.default_azim)
 
         # Canvas embebido en Tkinter
         self.canvas = FigureCanvasTkAgg(self.fig, master=plotfrm)
@@ -260,6 +270,18 @@ class RobotGUI(tk.Tk):
         ttk.Button(camfrm, text="Superior",
                    command=lambda: self._set_view(elev=90, azim=-90)).grid(row=1, column=3, padx=4)
 
+        # Lectura de tiempo de frame (media móvil)
+        self.frame_var = tk.StringVar(value="Ctrl: --- Hz | Frame: --- ms | --- Hz")
+        ttk.Label(plotfrm, textvariable=self.frame_var, font=("Consolas", 9)).grid(row=2, column=0, pady=(2, 4))
+        self.frame_ms = 0.0          # coste del refresco de pantalla [ms]
+        self.frame_hz = 0.0          # tasa real de refresco [Hz]
+        self._t_last_tick = None
+        self._frame_count = 0
+
+        # Artistas creados una sola vez; cada frame solo actualiza sus datos
+        self.artists = RobotArtists(self.ax, self.sim.joints)
+        self._drawn_q = None
+
         # Dibujo inicial del robot
         self._draw_robot()
 
@@ -288,18 +310,14 @@ class RobotGUI(tk.Tk):
 
         # Velocidad continua en el eje correspondiente
         speed = {"x": self.x_scale.get(), "y": self.y_scale.get(), "z": self.z_scale.get()}[axis]
-        idx = {"x": 0, "y": 1, "z": 2}[axis]
-        self.target_vel[idx] = speed * dy_norm * 5.0
-        self.lever_active[axis] = abs(dy_norm) > 1e-3
+        self.sim.set_lever(axis, speed * dy_norm * 5.0, active=abs(dy_norm) > 1e-3)
 
     def _on_release_axis(self, axis):
         cv = self.lever[axis]
         x = cv.winfo_width() // 2
         y = self.lever_center_y[axis]
         self._move_axis_knob(axis, x, y)
-        idx = {"x": 0, "y": 1, "z": 2}[axis]
-        self.target_vel[idx] = 0.0
-        self.lever_active[axis] = False
+        self.sim.set_lever(axis, 0.0)
 
         # Si en el futuro activas PID, aquí podrías "pegar" el setpoint y resetear estados del eje
         if SHOW_PID:
@@ -313,59 +331,109 @@ class RobotGUI(tk.Tk):
     # BOTONES FINOS (impulsos por click)
     # ==============================================================
     def _btn_x_minus(self):
-        if not self.lever_active["x"]:
-            self.impulse_pending["x"] -= self.x_step.get()
+        self.sim.add_impulse("x", -self.x_step.get())
 
     def _btn_x_plus(self):
-        if not self.lever_active["x"]:
-            self.impulse_pending["x"] += self.x_step.get()
+        self.sim.add_impulse("x", self.x_step.get())
 
     def _btn_y_minus(self):
-        if not self.lever_active["y"]:
-            self.impulse_pending["y"] -= self.y_step.get()
+        self.sim.add_impulse("y", -self.y_step.get())
 
     def _btn_y_plus(self):
-        if not self.lever_active["y"]:
-            self.impulse_pending["y"] += self.y_step.get()
+        self.sim.add_impulse("y", self.y_step.get())
 
     def _btn_z_down(self):
-        if not self.lever_active["z"]:
-            self.impulse_pending["z"] -= self.z_step.get()
+        self.sim.add_impulse("z", -self.z_step.get())
 
     def _btn_z_up(self):
-        if not self.lever_active["z"]:
-            self.impulse_pending["z"] += self.z_step.get()
+        self.sim.add_impulse("z", self.z_step.get())
 
     # ==============================================================
     # CICLO DE SIMULACIÓN
     # ==============================================================
     def start(self):
         if not self.running:
+            # Si había una grabación reproduciéndose, se corta: la vista vuelve al simulador
+            if self.after_id:
+                self.after_cancel(self.after_id)
+                self.after_id = None
+            self._replay = None
+            self._drawn_q = None
             self.running = True
             self._update_led_state()
+            self._sync_params()
+            self.worker.start()
+            self._next_frame = time.perf_counter()
             self._tick()
 
+    def follow_path(self, source, **planner_kwargs):
+        """
+        Sigue una ruta cartesiana (rectas/arcos, ver rvcore.streaming) con el
+        simulador en marcha; las palancas vuelven a mandar cuando termina (o al
+        primer punto sin IK, ver Simulator.stream_fault).
+        """
+        self.worker.call(lambda: self.sim.follow_path(source, **planner_kwargs))
+        if not self.running:
+            self.start()
+
     def pause(self):
+        """Detiene el lazo. Retorna False si el hilo de simulación sigue en un paso (ver SimulationThread.stop)."""
         self.running = False
+        stopped = self.worker.stop()
+        self._t_last_tick = None
         self._update_led_state()
         if self.after_id:
             self.after_cancel(self.after_id)
             self.after_id = None
+        self._draw_robot()
+        return stopped
+
+    def _on_close(self):
+        stopped = self.pause()
+        if self.server is not None:
+            self.server.stop_thread()
+        rec = self.sim.recorder
+        if rec is not None:
+            if stopped:
+                rec.close()
+            else:
+                # El paso en curso aún va a grabar: el cierre lo hace el hilo al salir
+                self.worker.call(rec.close)
+        self.destroy()
+
+    # ==============================================================
+    # REPRODUCCIÓN DE GRABACIONES
+    # ==============================================================
+    def play_log(self, log, speed=1.0, start=0):
+        """Reproduce una grabación (rvcore.recording.TrajectoryLog) en la vista 3D sin tocar el simulador."""
+        if len(log) == 0:
+            return
+        self.pause()
+        self._replay = (log, float(speed), time.perf_counter(), float(log[start]["t"]))
+        self._replay_tick()
+
+    def _replay_tick(self):
+        log, speed, wall0, t0 = self._replay
+        # Salto directo al frame que corresponde al tiempo transcurrido (sin recorrer los intermedios)
+        k = log.seek_time(t0 + (time.perf_counter() - wall0) * speed)
+        T, joints = fk_dh(self.model, log[k]["q"])
+        self.artists.update(joints)
+        self.canvas.draw_idle()
+        p = T[:3,3]
+        self.pose_var.set(f"EE: ({p[0]:7.1f}, {p[1]:7.1f}, {p[2]:7.1f}) mm")
+
+        if k < len(log) - 1 and not self.running:
+            self.after_id = self.after(max(1, int(self.dt * 1000)), self._replay_tick)
+        else:
+            self._replay = None
+            self._drawn_q = None
 
     def home(self):
-        self.q = np.zeros(self.model.dof, dtype=float)
-        # Centrar palancas y detener velocidades
+        # Centrar palancas; el simulador vuelve a q=0, detiene velocidades y
+        # resetea objetivo e impulsos (y el PID)
         for ax in ("x", "y", "z"):
             self._on_release_axis(ax)
-            self.impulse_pending[ax] = 0.0
-
-        # Reset de objetivo (sin PID)
-        T0e, _ = fk_dh(self.model, self.q)
-        self.ee_target = T0e[:3, 3].copy()
-
-        # Si activas PID en el futuro:
-        # if SHOW_PID:
-        #     self.pid.reset()
+        self.worker.call(self.sim.home)   # entre pasos si el hilo está activo
 
         self._draw_robot()
         self._update_led_state()
@@ -381,83 +449,79 @@ class RobotGUI(tk.Tk):
         else:
             self._set_led("red")
 
+    def _sync_params(self):
+        """
+        Pasa los valores de la UI (sliders/checks) al simulador. Se leen aquí,
+        en el hilo de Tk, y se aplican entre pasos en el hilo de simulación;
+        solo se encolan si cambiaron desde la última vez.
+        """
+        params = (self.lam.get(), self.use_analytic_ik.get())
+        if SHOW_PID:
+            params += (self.use_pid.get(), self.kp.get(), self.ki.get(), self.kd.get())
+        if params != self._params:
+            self._params = params
+            self.worker.call(self._apply_params, params)
+
+    def _apply_params(self, params):
+        self.sim.lam, self.sim.use_analytic_ik = params[:2]
+        if SHOW_PID:
+            self.sim.use_pid = params[2]
+            self.sim.pid.kp[:], self.sim.pid.ki[:], self.sim.pid.kd[:] = params[3:]
+
+    @profiling.timed("gui.tick")
     def _tick(self):
-        T, _ = fk_dh(self.model, self.q)
-        ee_meas = T[:3, 3]
-
-        # Construir dx a partir de velocidades continuas
-        # (Rama PID completamente desactivada cuando SHOW_PID=False)
-        dx = self.target_vel.copy()
-
-        # Añadir impulsos de click (un único tick) si la palanca correspondiente está centrada
-        for ax, idx in (("x",0), ("y",1), ("z",2)):
-            if not self.lever_active[ax] and abs(self.impulse_pending[ax]) > 0.0:
-                dx[idx] += self.impulse_pending[ax]
-                self.impulse_pending[ax] = 0.0
-        
-        # Acumular objetivo absoluto para IK analítica (clave)
-        #    dx está en mm/tick, así que se integra directo por tick
-        self.ee_target += dx
-
-        # NOTA: Si se usa el PID en el futuro:
-        # if SHOW_PID and self.use_pid.get():
-        #     ...  # lógica PID aquí
-        # else:
-        #     dx = self.target_vel.copy()
-        #     ...
-
-        if np.any(dx != 0.0):
-            if self.use_analytic_ik.get() and hasattr(self.model, "ik_solver") and self.model.ik_solver:
-                # IK analítica (suavizada)
-                #T, _ = fk_dh(self.model, self.q)
-                #current_pos = T[:3, 3]
-                #target_pos = current_pos + dx
-                target_pos = self.ee_target.copy()
-
-                # >>> PARCHE: reflejar SOLO el delta Z respecto a la medición actual | Corrección
-                # (equivalente a: target_pos[2] = ee_meas[2] - (target_pos[2] - ee_meas[2]))
-                target_pos[2] = 2.0 * ee_meas[2] - target_pos[2]
-
-                sols = self.model.ik_solver(self.model, target_pos)
-                if sols:
-                    q_new = sols[0]
-                    self.q += 0.5 * (q_new - self.q)  # suavizado para evitar vibración
-            else:
-                # DLS por defecto (estable e incremental)
-                self.q = ik_step_dls(self.model, self.q, dx_mm=dx, lam=self.lam.get())
-
-        # Normalizar y limitar juntas
-        self.q = wrap_to_pi(self.q)
-
-        qmin = qmax = None
-        if hasattr(self.model, "joint_limits") and isinstance(self.model.joint_limits, np.ndarray):
-            # esperado: shape (dof, 2) -> [:,0]=min, [:,1]=max
-            qmin, qmax = self.model.joint_limits[:, 0], self.model.joint_limits[:, 1]
-        elif hasattr(self.model, "limits") and hasattr(self.model.limits, "q_min") and hasattr(self.model.limits, "q_max"):
-            qmin, qmax = self.model.limits.q_min, self.model.limits.q_max
-        if qmin is not None and qmax is not None:
-            self.q = clip_joints(self.q, qmin, qmax)
-
-        # Dibujo
+        # Refresco de pantalla: el paso de control corre en self.worker.
+        # Aquí solo se pasan parámetros de la UI y se dibuja la última foto.
+        t0 = time.perf_counter()
+        self._sync_params()
         self._draw_robot()
+        self._update_frame_stats(t0)
 
         if self.running:
-            self.after_id = self.after(int(self.dt * 1000), self._tick)
+            # Plazo absoluto (t0 + k·dt): el coste del frame no se acumula como deriva
+            self._next_frame += self.dt
+            now = time.perf_counter()
+            if self._next_frame < now:
+                self._next_frame = now
+            delay_ms = max(1, int(round((self._next_frame - now) * 1000)))
+            self.after_id = self.after(delay_ms, self._tick)
 
     # ==============================================================
     # DIBUJO DEL ROBOT
     # ==============================================================
-    def _draw_robot(self):
-        T, joints = fk_dh(self.model, self.q)
-        self.ax.cla()
-        xs, ys, zs = joints[:,0], joints[:,1], joints[:,2]
-        self.ax.plot(xs, ys, zs, marker='o')
-        self.ax.scatter([xs[0]],[ys[0]],[zs[0]], s=35, color='black')   # base
-        self.ax.scatter([xs[-1]],[ys[-1]],[zs[-1]], s=50, color='red')  # efector
-        self.ax.set_xlabel("X [mm]"); self.ax.set_ylabel("Y [mm]"); self.ax.set_zlabel("Z [mm]")
-        self.ax.set_title("RV-M2 - Vista 3D")
-        self.ax.set_xlim(-50, 500); self.ax.set_ylim(-300, 300); self.ax.set_zlim(0, 600)
-        self.canvas.draw()
-
-        p = T[:3,3]
+    @profiling.timed("gui.draw")
+    def _draw_robot(self, force=False):
+        state = self.sim.state  # foto inmutable publicada por el simulador
+        # Sin cambios en q no hay nada que redibujar
+        if not draw_robot_frame(self.artists, self.canvas, state, None if force else self._drawn_q):
+            return
+        self._drawn_q = state.q
+
+        p = state.T[:3,3]
         self.pose_var.set(f"EE: ({p[0]:7.1f}, {p[1]:7.1f}, {p[2]:7.1f}) mm")
+
+    def _update_frame_stats(self, t0, alpha=0.1):
+        """Media móvil del coste por frame y de la tasa real; refresca la etiqueta cada 10 frames."""
+        now = time.perf_counter()
+        self.frame_ms += alpha * ((now - t0) * 1000.0 - self.frame_ms)
+        if self._t_last_tick is not None:
+            period = now - self._t_last_tick
+            if period > 0:
+                self.frame_hz += alpha * (1.0 / period - self.frame_hz)
+        self._t_last_tick = now
+
+        self._frame_count += 1
+        if self._frame_count % 10 == 0:
+            self.frame_var.set(f"Ctrl: {self.worker.loop.rate_hz:5.1f} Hz | "
+                               f"Frame: {self.frame_ms:5.1f} ms | {self.frame_hz:5.1f} Hz")
+            if self.show_metrics.get():
+                self.metrics_var.set(profiling.format_stats())
+
+    def _toggle_metrics(self):
+        """Activa/desactiva la instrumentación global; apagada no cuesta más que una comprobación."""
+        on = self.show_metrics.get()
+        profiling.enable(on)
+        if on:
+            profiling.reset()
+        else:
+            self.metrics_var.set("")
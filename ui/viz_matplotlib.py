@@ -34,3 +34,112 @@ def _set_axes_equal(ax):
     ax.set_xlim([c - r, c + r])
     ax.set_ylim([c - r, c + r])
     ax.set_zlim([c - r, c + r])
+
+class RobotArtists:
+    """
+    Artistas 3D del robot creados una sola vez sobre un eje existente.
+    update() solo cambia los datos (sin ax.cla()), para redibujar por frame.
+    """
+    def __init__(self, ax, joints, base_kw=None, tool_kw=None):
+        base_kw = base_kw or dict(s=35, color='black')
+        tool_kw = tool_kw or dict(s=50, color='red')
+        xs, ys, zs = np.array(joints, dtype=float).T
+        self.line, = ax.plot(xs, ys, zs, marker='o')
+        self.base = ax.scatter([xs[0]], [ys[0]], [zs[0]], **base_kw)     # base
+        self.tool = ax.scatter([xs[-1]], [ys[-1]], [zs[-1]], **tool_kw)  # efector
+
+    def update(self, joints):
+        # Copia: el llamador puede reutilizar su buffer de juntas
+        xs, ys, zs = np.array(joints, dtype=float).T
+        self.line.set_data_3d(xs, ys, zs)
+        self.base._offsets3d = (xs[:1], ys[:1], zs[:1])
+        self.tool._offsets3d = (xs[-1:], ys[-1:], zs[-1:])
+
+    @property
+    def artists(self):
+        return (self.line, self.base, self.tool)
+
+# ==============================================================
+# VISTA DE LA GUI (compartida con benchmarks/bench.py)
+# ==============================================================
+GUI_LIMITS = ((-50, 500), (-300, 300), (0, 600))   # mm
+
+def setup_robot_axes(fig, limits=GUI_LIMITS, elev=20, azim=-60, title="RV-M2 - Vista 3D"):
+    """Ejes 3D de la vista de la GUI: etiquetas, límites fijos (sin autoescala) y cámara."""
+    ax = fig.add_subplot(111, projection="3d")
+    ax.set_xlabel("X [mm]")
+    ax.set_ylabel("Y [mm]")
+    ax.set_zlabel("Z [mm]")
+    ax.set_title(title)
+    (x0, x1), (y0, y1), (z0, z1) = limits
+    ax.set_xlim(x0, x1); ax.set_ylim(y0, y1); ax.set_zlim(z0, z1)
+    ax.set_autoscale_on(False)
+    ax.view_init(elev=elev, azim=azim)
+    return ax
+
+def draw_robot_frame(artists, canvas, state, drawn_q=None):
+    """
+    Cuerpo de un frame de la vista: actualiza los artistas con state.joints y
+    pide el redibujado. Retorna False sin tocar nada si state.q es igual a drawn_q.
+    En TkAgg draw_idle se agrupa con el bucle de eventos; en Agg dibuja en el acto.
+    """
+    if drawn_q is not None and np.array_equal(drawn_q, state.q):
+        return False
+    artists.update(state.joints)
+    canvas.draw_idle()
+    return True
+
+class OffscreenRenderer:
+    """
+    Escena Agg fuera de pantalla (sin pyplot ni display) para exportar frames.
+    El fondo (paneles, rejilla, ejes) se dibuja una sola vez; cada frame lo
+    restaura y redibuja solo los artistas del robot y la etiqueta (blitting).
+      limits: ((xmin, xmax), (ymin, ymax), (zmin, zmax)) en mm, fijos para todos los frames
+    """
+    def __init__(self, joints, limits, figsize=(6, 5), dpi=100, elev=20, azim=-60, title=None):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.ax = self.fig.add_subplot(111, projection="3d")
+        ax.set_xlabel("X [mm]")
+        ax.set_ylabel("Y [mm]")
+        ax.set_zlabel("Z [mm]")
+        if title:
+            ax.set_title(title)
+        ax.set_xlim(*limits[0]); ax.set_ylim(*limits[1]); ax.set_zlim(*limits[2])
+        ax.set_autoscale_on(False)
+        ax.view_init(elev=elev, azim=azim)
+
+        self.robot = RobotArtists(ax, joints)
+        self.label = ax.text2D(0.02, 0.96, "", transform=ax.transAxes, family="monospace")
+        dynamic = self.robot.artists + (self.label,)
+        for a in dynamic:
+            a.set_visible(False)
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for a in dynamic:
+            a.set_visible(True)
+            a.set_animated(True)
+
+    @property
+    def shape(self):
+        """(alto, ancho) del frame en píxeles."""
+        w, h = self.canvas.get_width_height()
+        return h, w
+
+    def render(self, joints, text=""):
+        """
+        Dibuja un frame y retorna la imagen (H, W, 4) uint8. Es una vista del
+        buffer de Agg: se sobrescribe en el siguiente render().
+        """
+        self.robot.update(joints)
+        self.label.set_text(text)
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.robot.line)
+        # Como Axes3D.draw: colecciones proyectadas y pintadas de atrás hacia delante
+        for c in sorted((self.robot.base, self.robot.tool), key=lambda c: c.do_3d_projection(), reverse=True):
+            self.ax.draw_artist(c)
+        self.ax.draw_artist(self.label)
+        return np.asarray(self.canvas.buffer_rgba())